@@ -0,0 +1,126 @@
+"""API asyncio para resolver labirintos sem bloquear o event loop.
+
+    As buscas rodam em um executor(por padrão o ThreadPoolExecutor do
+    loop) e o event loop fica livre para o I/O de rede. Cancelamento e
+    timeout avisam a busca em andamento por um threading.Event, que o
+    encontra_menor_caminho verifica periodicamente.
+
+    Exemplo:
+        app = matriz.Aplicativo('matriz.txt', verboso=False)
+        menor = await resolve(app, timeout=5)
+        async for par, path in resolve_pares(app):
+            ...
+"""
+
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import labirinto_matriz
+import matriz
+
+
+async def resolve_par(matriz_labirinto, origem, destino, shape=None,
+                      executor=None, timeout=None):
+    """Encontra o menor caminho entre a origem e o destino
+
+    Args:
+        matriz_labirinto (list): matriz com os valores
+        origem (tuple): (y, x) da entrada
+        destino (tuple): (y, x) da saída
+        shape (tuple): (linhas, colunas), calculado se None
+        executor (Executor): onde a busca roda, None para o padrão
+        timeout (float): segundos, None para sem limite
+
+    Raises:
+        asyncio.TimeoutError: a busca passou do timeout
+
+    Returns:
+        list|bool: o trajeto como em encontra_menor_caminho
+    """
+    if shape is None:
+        shape = (len(matriz_labirinto), len(matriz_labirinto[0]))
+    loop = asyncio.get_running_loop()
+    interrompe = threading.Event()
+    kwargs = {}
+    # um Event não atravessa processos, no ProcessPoolExecutor só as
+    # buscas que ainda não começaram são canceladas
+    if not isinstance(executor, ProcessPoolExecutor):
+        kwargs['interrompe'] = interrompe
+    futuro = loop.run_in_executor(executor, partial(
+        labirinto_matriz.encontra_menor_caminho,
+        matriz_labirinto, origem, destino, shape, **kwargs))
+    try:
+        return await asyncio.wait_for(futuro, timeout)
+    finally:
+        # cancelado ou timeout: a busca em andamento para logo
+        interrompe.set()
+
+
+async def carrega(app, executor=None):
+    """Retorna o Aplicativo, lendo o arquivo no executor se preciso
+
+    Args:
+        app (matriz.Aplicativo|str): aplicativo ou arquivo da matriz
+        executor (Executor): onde a leitura roda
+    """
+    if isinstance(app, matriz.Aplicativo):
+        return app
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, partial(matriz.Aplicativo, app, verboso=False))
+
+
+async def resolve_pares(app, executor=None, timeout=None):
+    """Resolve todos os pares entrada x saída, entregando cada
+    resultado assim que fica pronto.
+
+    Args:
+        app (matriz.Aplicativo|str): aplicativo ou arquivo da matriz
+        executor (Executor): onde as buscas rodam
+        timeout (float): limite em segundos para todos os pares
+
+    Yields:
+        tuple: (((origem),(destino)), path ou False)
+    """
+    app = await carrega(app, executor)
+    shape = app.formato_matriz()
+
+    async def resolve_um(par):
+        path = await resolve_par(
+            app.matriz_labirinto, par[0], par[1], shape, executor)
+        return par, path
+
+    tarefas = [
+        asyncio.ensure_future(resolve_um(par))
+        for par in itertools.product(app.entradas, app.saidas)
+    ]
+    try:
+        for proximo in asyncio.as_completed(tarefas, timeout=timeout):
+            yield await proximo
+    finally:
+        # fim antecipado, timeout ou cancelamento
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+async def resolve(app, executor=None, timeout=None):
+    """Resolve o labirinto e retorna o menor caminho entre todos os
+    pares, como o Aplicativo.resolve_labirinto.
+
+    Args:
+        app (matriz.Aplicativo|str): aplicativo ou arquivo da matriz
+        executor (Executor): onde as buscas rodam
+        timeout (float): limite em segundos para todos os pares
+
+    Returns:
+        list|bool: o menor trajeto ou False
+    """
+    menor = False
+    async for _, path in resolve_pares(app, executor, timeout):
+        if path and (not menor or len(path) < len(menor)):
+            menor = path
+    return menor
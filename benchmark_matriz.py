@@ -0,0 +1,349 @@
+"""Medição de desempenho dos motores de busca, da carga e do desenho.
+
+    Roda cada motor registrado em motores_matriz sobre labirintos
+    gerados pelo gerador_matriz em escalas crescentes e sobre os
+    arquivos informados(fixtures), medindo também a carga do arquivo,
+    a exportação em PNG e o desenho em tiles da janela(Qt offscreen,
+    sem servidor gráfico).
+
+    Para cada etapa registra o tempo de parede(o melhor de N
+    repetições), os nodos expandidos(estatisticas do motor) e o pico
+    de memória alocada(tracemalloc, em uma execução separada para não
+    distorcer o tempo). Os trajetos de todos os pares são conferidos
+    pelo verifica_matriz, fora do tempo medido.
+
+    O resultado é gravado em JSON. Com --base ele é comparado a um
+    resultado anterior e o processo termina com erro se alguma etapa
+    ficar mais lenta ou usar mais memória além do limite, se algum
+    trajeto for inválido ou se a distância mudar.
+
+    Uso:
+        python3 benchmark_matriz.py [fixtures...] [--escalas 101 201 401]
+            [--motores dijkstra bfs] [-o benchmark.json]
+            [--base base.json --limite 0.25]
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import gerador_matriz
+import imagem_matriz
+import matriz
+import motores_matriz
+import verifica_matriz
+
+ESCALAS = (51, 101, 201, 401)
+
+# abaixo destes valores a diferença é ruído de medição
+TEMPO_MINIMO = 0.005
+MEMORIA_MINIMA = 256 * 1024
+
+
+def mede(fn, repeticoes=1, memoria=True):
+    """Executa fn medindo o tempo e o pico de memória
+
+    Args:
+        fn (function): função sem argumentos
+        repeticoes (int): execuções cronometradas, vale a mais rápida
+        memoria (bool): faz uma execução extra com tracemalloc
+
+    Returns:
+        tuple: (resultado, tempo em segundos, pico em bytes ou None)
+    """
+    tempo = math.inf
+    for _ in range(max(1, repeticoes)):
+        t1 = time.perf_counter()
+        resultado = fn()
+        tempo = min(tempo, time.perf_counter() - t1)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            fn()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return resultado, tempo, pico
+
+
+def casos(escalas, diretorio, algoritmo='backtracking', semente=1,
+          fixtures=()):
+    """Arquivos usados na medição
+
+    Args:
+        escalas (list): lado das matrizes geradas
+        diretorio (str): onde gravar as matrizes geradas
+        algoritmo (str): algoritmo do gerador_matriz
+        semente (int): semente do gerador, fixa para comparar
+        fixtures (list): arquivos de matriz já existentes
+
+    Returns:
+        list: tuplas (nome do caso, arquivo)
+    """
+    lista = []
+    for lado in escalas:
+        nome = '%s-%d' % (algoritmo, lado)
+        arquivo = os.path.join(diretorio, nome + '.txt')
+        gerador_matriz.salva(
+            gerador_matriz.gera(lado, lado, algoritmo, semente=semente),
+            arquivo)
+        lista.append((nome, arquivo))
+    for arquivo in fixtures:
+        lista.append((os.path.basename(arquivo), arquivo))
+    return lista
+
+
+def resolve_pares(nome, app):
+    """Resolve todos os pares entrada/saída com um motor, somando os
+    nodos expandidos
+
+    Returns:
+        tuple: (menor trajeto ou False, nodos expandidos, trajetos de
+        todos os pares)
+    """
+    busca = motores_matriz.obtem(nome)
+    medida = motores_matriz.medida(nome, app.matriz_labirinto)
+    shape = app.formato_matriz()
+    menor = False
+    expandidos = 0
+    caminhos = []
+    for origem, destino in itertools.product(app.entradas, app.saidas):
+        estatisticas = {}
+        path = busca(
+            app.matriz_labirinto, origem, destino, shape, estatisticas)
+        expandidos += estatisticas.get('nodos_expandidos', 0)
+        caminhos.append(path)
+        if path and (not menor or medida(path) < medida(menor)):
+            menor = path
+    return menor, expandidos, caminhos
+
+
+def verifica_pares(motor, app, caminhos, info=print):
+    """Confere os trajetos encontrados com o verifica_matriz
+
+    Returns:
+        bool: todos os trajetos encontrados são válidos
+    """
+    caminhos = [c for c in caminhos if c]
+    if not caminhos:
+        return True
+    estrito = motor not in motores_matriz.ATRAVESSA_PAREDES
+    resultado = verifica_matriz.verifica(
+        app.matriz_labirinto, caminhos, estrito)
+    for i in (~resultado['valido']).nonzero()[0]:
+        info('trajeto inválido(%s): %s' % (
+            motor, verifica_matriz.motivos(resultado, i, estrito)))
+    return bool(resultado['valido'].all())
+
+
+def mede_viewport(grade, caminho, largura=800, altura=600):
+    """Desenho da janela em tiles, em um QImage offscreen
+
+    Returns:
+        tuple: (função do desenho frio, função do desenho com cache,
+        widget que precisa continuar vivo durante a medição)
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtWidgets import QApplication, QWidget
+    import viewport_matriz
+
+    aplicacao = QApplication.instance() or QApplication([])
+    widget = QWidget()
+    widget.resize(largura, altura)
+    viewport = viewport_matriz.Viewport(widget)
+
+    def pinta():
+        imagem = QImage(largura, altura, QImage.Format_RGB32)
+        painter = QPainter(imagem)
+        viewport.desenha(painter, imagem.rect())
+        painter.end()
+
+    def frio():
+        # invalida os tiles e espera todos ficarem prontos
+        viewport.define_grade(grade)
+        viewport.define_caminho(caminho)
+        pinta()
+        viewport.pool.waitForDone()
+        aplicacao.processEvents()
+        pinta()
+
+    frio()
+    return frio, pinta, widget
+
+
+def executa(arquivos, motores, repeticoes=1, memoria=True, gui=True,
+            info=print):
+    """Mede todas as etapas de todos os casos
+
+    Args:
+        arquivos (list): tuplas (nome do caso, arquivo), ver casos()
+        motores (list): nomes em motores_matriz.MOTORES
+        repeticoes (int): execuções cronometradas de cada etapa
+        memoria (bool): mede o pico de memória
+        gui (bool): mede o desenho da janela(PySide6)
+        info (function): recebe cada linha do relatório
+
+    Returns:
+        list: dicionários com caso, etapa, motor, tempo, memoria_pico,
+        nodos_expandidos, distancia e valido
+    """
+    resultados = []
+
+    def registra(caso, app, etapa, motor, tempo, pico, **extra):
+        linhas, colunas = app.formato_matriz()
+        resultado = {
+            'caso': caso,
+            'linhas': linhas,
+            'colunas': colunas,
+            'etapa': etapa,
+            'motor': motor,
+            'tempo': tempo,
+            'memoria_pico': pico,
+        }
+        resultado.update(extra)
+        resultados.append(resultado)
+        info('%-24s %-10s %-10s %10.4fs %10s %s' % (
+            caso, etapa, motor or '-', tempo,
+            '-' if pico is None else '%.1fMiB' % (pico / 2**20),
+            extra.get('nodos_expandidos', '')))
+
+    for caso, arquivo in arquivos:
+        app, tempo, pico = mede(
+            lambda: matriz.Aplicativo(arquivo, verboso=False),
+            repeticoes, memoria)
+        registra(caso, app, 'carga', None, tempo, pico)
+
+        caminho = False
+        for motor in motores:
+            (path, expandidos, caminhos), tempo, pico = mede(
+                lambda: resolve_pares(motor, app), repeticoes, memoria)
+            registra(caso, app, 'busca', motor, tempo, pico,
+                     nodos_expandidos=expandidos,
+                     distancia=len(path) if path else None,
+                     valido=verifica_pares(motor, app, caminhos, info))
+            caminho = caminho or path
+
+        _, tempo, pico = mede(
+            lambda: imagem_matriz.renderiza(app.matriz_labirinto, caminho),
+            repeticoes, memoria)
+        registra(caso, app, 'png', None, tempo, pico)
+
+        if gui:
+            grade = app.matriz_labirinto.grade
+            frio, cache, _widget = mede_viewport(grade, caminho)
+            _, tempo, pico = mede(frio, repeticoes, memoria)
+            registra(caso, app, 'janela', None, tempo, pico)
+            _, tempo, pico = mede(cache, repeticoes, memoria)
+            registra(caso, app, 'janela-cache', None, tempo, pico)
+    return resultados
+
+
+def chave(resultado):
+    return (resultado['caso'], resultado['etapa'], resultado['motor'])
+
+
+def compara(resultados, base, limite=0.25):
+    """Compara com um resultado anterior
+
+    Args:
+        resultados (list): resultados atuais
+        base (dict): JSON gravado por uma execução anterior
+        limite (float): aumento tolerado, 0.25 = 25%
+
+    Returns:
+        list: descrição de cada regressão encontrada
+    """
+    anteriores = {chave(r): r for r in base['resultados']}
+    regressoes = []
+    for resultado in resultados:
+        if resultado.get('valido') is False:
+            regressoes.append('%s %s %s: trajeto inválido' % (
+                resultado['caso'], resultado['etapa'], resultado['motor']))
+        anterior = anteriores.get(chave(resultado))
+        if anterior is None:
+            continue
+        for campo, minimo in (('tempo', TEMPO_MINIMO),
+                              ('memoria_pico', MEMORIA_MINIMA)):
+            novo, antigo = resultado.get(campo), anterior.get(campo)
+            if novo is None or antigo is None:
+                continue
+            if novo > max(antigo, minimo) * (1 + limite):
+                regressoes.append('%s %s %s: %s %s -> %s' % (
+                    resultado['caso'], resultado['etapa'],
+                    resultado['motor'] or '-', campo, antigo, novo))
+        # os nodos expandidos não variam entre execuções
+        novo = resultado.get('nodos_expandidos')
+        antigo = anterior.get('nodos_expandidos')
+        if novo is not None and antigo is not None and novo > antigo:
+            regressoes.append('%s %s %s: nodos_expandidos %s -> %s' % (
+                resultado['caso'], resultado['etapa'], resultado['motor'],
+                antigo, novo))
+        # a distância de cada motor é determinística
+        novo, antigo = resultado.get('distancia'), anterior.get('distancia')
+        if novo != antigo and 'distancia' in anterior:
+            regressoes.append('%s %s %s: distancia %s -> %s' % (
+                resultado['caso'], resultado['etapa'], resultado['motor'],
+                antigo, novo))
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Mede o desempenho dos motores, da carga e do desenho.')
+    parser.add_argument('fixtures', nargs='*',
+                        help='arquivos de matriz medidos além dos gerados')
+    parser.add_argument('--escalas', type=int, nargs='*',
+                        default=list(ESCALAS))
+    parser.add_argument('--algoritmo', choices=gerador_matriz.ALGORITMOS,
+                        default='backtracking')
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--motores', nargs='+',
+                        choices=sorted(motores_matriz.MOTORES),
+                        default=sorted(motores_matriz.MOTORES))
+    parser.add_argument('-r', '--repeticoes', type=int, default=3)
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help='não mede o pico de memória')
+    parser.add_argument('--sem-gui', action='store_true',
+                        help='não mede o desenho da janela')
+    parser.add_argument('-o', '--saida', default='benchmark.json')
+    parser.add_argument('--base', help='JSON de uma execução anterior')
+    parser.add_argument('--limite', type=float, default=0.25,
+                        help='aumento tolerado em relação à base')
+    args = parser.parse_args()
+    for lado in args.escalas:
+        aviso = gerador_matriz.aviso_escala(lado, lado, args.algoritmo)
+        if aviso:
+            print(aviso, file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        resultados = executa(
+            casos(args.escalas, diretorio, args.algoritmo, args.semente,
+                  args.fixtures),
+            args.motores, args.repeticoes, not args.sem_memoria,
+            not args.sem_gui)
+
+    with open(args.saida, 'w') as saida:
+        json.dump({
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'resultados': resultados,
+        }, saida, indent=2)
+    print('Resultados gravados em', args.saida)
+
+    if args.base:
+        with open(args.base) as arquivo:
+            regressoes = compara(resultados, json.load(arquivo), args.limite)
+        for regressao in regressoes:
+            print('REGRESSÃO', regressao)
+        if regressoes:
+            sys.exit(1)
+        print('Sem regressões em relação a', args.base)
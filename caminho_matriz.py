@@ -0,0 +1,184 @@
+"""Representação compacta de trajetos.
+
+    Os motores retornam o trajeto como lista de tuplas (x, y), o que
+    custa dezenas de bytes por ponto. O CaminhoCompacto guarda só o
+    primeiro ponto e a direção de cada passo em 2 bits(4 passos por
+    byte), e gera sob demanda os pontos, os índices planos ou a máscara
+    booleana da matriz para testar se um nodo está no trajeto em O(1).
+
+    A conversão de e para a lista de tuplas não perde informação,
+    inclusive o destino repetido no início das listas dos motores.
+"""
+
+import numpy as np
+
+# código de 2 bits de cada direção (dx, dy)
+DIRECOES = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.int64)
+# deslocamentos dos 4 códigos dentro do byte
+_DESLOCAMENTOS = np.array([0, 2, 4, 6], dtype=np.uint8)
+
+
+class CaminhoCompacto:
+    """Trajeto como ponto inicial e direções empacotadas
+
+    Se comporta como a lista de tuplas para len(), iteração, índices e
+    comparação, então pode substituí-la onde o trajeto é guardado.
+    """
+    __slots__ = ('inicio', 'passos', 'total', 'repete_inicio',
+                 '_conjunto', '_mascara')
+
+    def __init__(self, inicio, passos=b'', total=0, repete_inicio=False):
+        # primeiro ponto (x, y)
+        self.inicio = (int(inicio[0]), int(inicio[1]))
+        # códigos de direção, 4 por byte
+        self.passos = bytes(passos)
+        # total de passos
+        self.total = total
+        # o primeiro ponto aparece duas vezes na lista original
+        self.repete_inicio = repete_inicio
+        # caches sob demanda
+        self._conjunto = None
+        self._mascara = None
+
+    @classmethod
+    def de_lista(cls, pontos):
+        """Cria o trajeto a partir da lista de tuplas (x, y)
+
+        Args:
+            pontos (list): trajeto no formato dos motores
+
+        Raises:
+            ValueError: pontos consecutivos não vizinhos
+
+        Returns:
+            CaminhoCompacto: o trajeto compactado
+        """
+        pontos = np.asarray(pontos, dtype=np.int64).reshape(-1, 2)
+        repete = len(pontos) > 1 and (pontos[0] == pontos[1]).all()
+        if repete:
+            pontos = pontos[1:]
+        delta = np.diff(pontos, axis=0)
+        if (np.abs(delta).sum(axis=1) != 1).any():
+            raise ValueError('pontos consecutivos não são vizinhos')
+        codigos = np.where(
+            delta[:, 0] == 1, 0, np.where(
+                delta[:, 0] == -1, 1, np.where(
+                    delta[:, 1] == 1, 2, 3))).astype(np.uint8)
+        total = len(codigos)
+        # completa com zeros até múltiplo de 4 e junta 4 por byte
+        codigos = np.resize(codigos, -(-total // 4) * 4)
+        codigos[total:] = 0
+        empacotado = (codigos.reshape(-1, 4) << _DESLOCAMENTOS).sum(
+            axis=1, dtype=np.uint8)
+        return cls(tuple(pontos[0]) if len(pontos) else (0, 0),
+                   empacotado.tobytes(), total, bool(repete))
+
+    def codigos(self):
+        """Códigos de direção de cada passo
+
+        Returns:
+            nparray: uint8 com valores de 0 a 3
+        """
+        empacotado = np.frombuffer(self.passos, dtype=np.uint8)
+        codigos = (empacotado[:, None] >> _DESLOCAMENTOS) & 3
+        return codigos.reshape(-1)[:self.total]
+
+    def pontos(self):
+        """Pontos do trajeto, sem a repetição do início
+
+        Returns:
+            nparray: (passos + 1, 2) com x, y
+        """
+        pontos = np.empty((self.total + 1, 2), dtype=np.int64)
+        pontos[0] = self.inicio
+        np.cumsum(DIRECOES[self.codigos()], axis=0, out=pontos[1:])
+        pontos[1:] += self.inicio
+        return pontos
+
+    def para_lista(self):
+        """Lista de tuplas (x, y) idêntica à usada na criação
+        """
+        pontos = [tuple(p) for p in self.pontos().tolist()]
+        if self.repete_inicio:
+            pontos.insert(0, pontos[0])
+        return pontos
+
+    def indices_planos(self, colunas):
+        """Índices planos(y * colunas + x) dos pontos
+
+        Args:
+            colunas (int): total de colunas da matriz
+
+        Returns:
+            nparray: índices int64
+        """
+        pontos = self.pontos()
+        return pontos[:, 1] * colunas + pontos[:, 0]
+
+    def mascara(self, shape):
+        """Máscara booleana da matriz com os nodos do trajeto
+
+        Args:
+            shape (tuple): (linhas, colunas)
+
+        Returns:
+            nparray: bool(linhas, colunas), em cache para o shape
+        """
+        shape = tuple(shape)
+        if self._mascara is None or self._mascara.shape != shape:
+            mascara = np.zeros(shape, dtype=bool)
+            pontos = self.pontos()
+            mascara[pontos[:, 1], pontos[:, 0]] = True
+            self._mascara = mascara
+        return self._mascara
+
+    @property
+    def nbytes(self):
+        """Bytes usados pelos passos empacotados
+        """
+        return len(self.passos)
+
+    def fim(self):
+        """Último ponto (x, y)
+        """
+        if not self.total:
+            return self.inicio
+        delta = DIRECOES[self.codigos()].sum(axis=0)
+        return (self.inicio[0] + int(delta[0]),
+                self.inicio[1] + int(delta[1]))
+
+    def __len__(self):
+        return self.total + 1 + self.repete_inicio
+
+    def __iter__(self):
+        return iter(self.para_lista())
+
+    def __getitem__(self, indice):
+        if isinstance(indice, int):
+            if indice in (0, -len(self)) or (
+                    indice == 1 and self.repete_inicio):
+                return self.inicio
+            if indice in (-1, len(self) - 1):
+                return self.fim()
+        return self.para_lista()[indice]
+
+    def __contains__(self, ponto):
+        if self._conjunto is None:
+            self._conjunto = set(self.para_lista())
+        return tuple(ponto) in self._conjunto
+
+    def __eq__(self, outro):
+        if isinstance(outro, CaminhoCompacto):
+            return (self.inicio == outro.inicio
+                    and self.passos == outro.passos
+                    and self.total == outro.total
+                    and self.repete_inicio == outro.repete_inicio)
+        if isinstance(outro, list):
+            return self.para_lista() == outro
+        return NotImplemented
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return 'CaminhoCompacto(%s, %d passos)' % (self.inicio, self.total)
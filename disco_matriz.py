@@ -0,0 +1,336 @@
+"""Busca em blocos para labirintos maiores que a memória.
+
+    A matriz é lida de um .npy em memory-map(modelo_matriz.Labirinto
+    carrega assim) e nunca fica inteira na memória. A busca divide a
+    matriz em blocos de TAMANHO_BLOCO x TAMANHO_BLOCO nodos e processa
+    um bloco por vez:
+        * cada bloco recebe sementes(nodos da borda alcançados por um
+          bloco vizinho, com a distância) e faz uma busca em largura
+          local a partir delas;
+        * os nodos da borda que melhoraram viram sementes dos blocos
+          vizinhos;
+        * a fila de blocos é ordenada pela menor semente pendente. Um
+          bloco pode ser processado de novo se receber sementes
+          melhores(correção de rótulos), e a busca para quando nenhuma
+          semente pendente pode melhorar a distância do destino.
+
+    As distâncias ficam em um np.memmap int32 em um diretório
+    temporário(4 bytes por nodo em disco). Só os blocos de distância
+    usados mais recentemente(RESIDENTES) ficam na memória; os outros
+    são gravados no arquivo ao sair do cache e relidos quando voltam à
+    fronteira. A memória da busca depende do tamanho e do total de
+    blocos residentes, não do tamanho do labirinto: o limite passa a
+    ser o disco. O diretório segue o tempfile(TMPDIR) ou o parâmetro
+    diretorio.
+
+    Como nos motores vetorial e de terreno, parede(1) é intransponível
+    e os outros valores custam 1. O trajeto é reconstruído do destino
+    seguindo distâncias decrescentes, no formato do
+    encontra_menor_caminho: lista reversa de (x, y), do destino
+    (repetido) até a origem.
+"""
+
+import heapq
+import os
+import tempfile
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from estatisticas_matriz import cronometro, notifica
+
+# lado dos blocos em nodos
+TAMANHO_BLOCO = 256
+# blocos de distância mantidos na memória
+RESIDENTES = 64
+# distância dos nodos não alcançados
+INF = 2**31 - 1
+
+
+class Distancias:
+    """ Distâncias em blocos: cache LRU na memória e np.memmap no disco
+    """
+
+    def __init__(self, shape, bloco, residentes, diretorio) -> None:
+        self.bloco = bloco
+        self.limite = max(1, residentes)
+        self.arquivo = os.path.join(diretorio, 'distancias.i32')
+        # arquivo esparso: só os blocos gravados ocupam o disco
+        self.disco = np.memmap(
+            self.arquivo, dtype=np.int32, mode='w+', shape=shape)
+        # (by, bx): nparray int32 do bloco
+        self.residentes = OrderedDict()
+        # blocos alterados desde a última gravação
+        self.sujos = set()
+        # blocos com cópia válida no disco
+        self.gravados = set()
+        self.despejados = 0
+
+    def fatia(self, chave):
+        """Fatias (linhas, colunas) do bloco na matriz
+        """
+        by, bx = chave
+        lado = self.bloco
+        return (slice(by * lado, (by + 1) * lado),
+                slice(bx * lado, (bx + 1) * lado))
+
+    def obtem(self, chave):
+        """Bloco de distâncias, lido do disco ou criado com INF
+
+        Args:
+            chave (tuple): (by, bx) do bloco
+
+        Returns:
+            nparray: int32 (linhas, colunas) do bloco, alterável
+        """
+        bloco = self.residentes.get(chave)
+        if bloco is not None:
+            self.residentes.move_to_end(chave)
+            return bloco
+        fatia = self.disco[self.fatia(chave)]
+        if chave in self.gravados:
+            bloco = np.array(fatia)
+        else:
+            bloco = np.full(fatia.shape, INF, dtype=np.int32)
+        self.residentes[chave] = bloco
+        self.despeja()
+        return bloco
+
+    def altera(self, chave):
+        """Marca o bloco para ser gravado quando sair do cache
+        """
+        self.sujos.add(chave)
+
+    def despeja(self):
+        # grava no disco os blocos menos usados além do limite
+        while len(self.residentes) > self.limite:
+            chave, bloco = self.residentes.popitem(last=False)
+            if chave in self.sujos:
+                self.disco[self.fatia(chave)] = bloco
+                self.sujos.discard(chave)
+                self.gravados.add(chave)
+                self.despejados += 1
+
+    def valor(self, y, x):
+        """Distância do nodo (y, x), INF se não alcançado
+        """
+        lado = self.bloco
+        chave = (y // lado, x // lado)
+        bloco = self.residentes.get(chave)
+        if bloco is not None:
+            return int(bloco[y - chave[0] * lado, x - chave[1] * lado])
+        if chave in self.gravados:
+            return int(self.disco[y, x])
+        return INF
+
+    def fecha(self):
+        # libera o memory-map antes de apagar o diretório
+        self.residentes.clear()
+        self.disco = None
+
+
+class BuscaDisco:
+    """ Busca em largura bloco a bloco sobre a matriz em memory-map
+    """
+
+    def __init__(self, grade, bloco, residentes, diretorio) -> None:
+        self.grade = grade
+        self.linhas, self.colunas = grade.shape
+        self.bloco = bloco
+        self.distancias = Distancias(
+            grade.shape, bloco, residentes, diretorio)
+        self.expandidos = 0
+        self.retiradas = 0
+        self.relaxamentos = 0
+        self.processados = 0
+
+    def expande(self, chave, sementes):
+        """Busca em largura dentro do bloco a partir das sementes
+
+        Args:
+            chave (tuple): (by, bx) do bloco
+            sementes (dict): {índice local: distância}
+
+        Returns:
+            dict: {chave do vizinho: {índice local: distância}} com os
+            nodos alcançados fora do bloco
+        """
+        lado = self.bloco
+        by, bx = chave
+        y0, x0 = by * lado, bx * lado
+        fatia = self.distancias.fatia(chave)
+        livre = self.grade[fatia] != 1
+        h, w = livre.shape
+        livre = livre.tobytes()
+        bloco = self.distancias.obtem(chave)
+        dist = bloco.ravel().tolist()
+        inicio = sorted(
+            (d, i) for i, d in sementes.items() if livre[i] and d < dist[i])
+        bordas = {}
+        if not inicio:
+            return bordas
+        for d, i in inicio:
+            dist[i] = d
+        # blocos vizinhos e a largura de cada um
+        acima = (by - 1, bx) if by > 0 else None
+        abaixo = (by + 1, bx) if y0 + h < self.linhas else None
+        esquerda = (by, bx - 1) if bx > 0 else None
+        direita = (by, bx + 1) if x0 + w < self.colunas else None
+        largura_direita = min(lado, self.colunas - x0 - w)
+
+        def semeia(vizinho, j, d):
+            novas = bordas.setdefault(vizinho, {})
+            if d < novas.get(j, INF):
+                novas[j] = d
+
+        # as sementes e a fila estão em ordem crescente de distância,
+        # a busca retira sempre a menor das duas
+        fila = deque()
+        k = 0
+        total = len(inicio)
+        retiradas = expandidos = relaxamentos = 0
+        while k < total or fila:
+            if fila and (k == total or fila[0][0] <= inicio[k][0]):
+                d, i = fila.popleft()
+            else:
+                d, i = inicio[k]
+                k += 1
+            retiradas += 1
+            if d > dist[i]:
+                continue
+            expandidos += 1
+            ly, lx = divmod(i, w)
+            d += 1
+            for j, dentro, vizinho, local in (
+                    (i - w, ly > 0, acima, (lado - 1) * w + lx),
+                    (i + w, ly < h - 1, abaixo, lx),
+                    (i - 1, lx > 0, esquerda, ly * lado + lado - 1),
+                    (i + 1, lx < w - 1, direita, ly * largura_direita)):
+                if dentro:
+                    if livre[j] and d < dist[j]:
+                        dist[j] = d
+                        fila.append((d, j))
+                        relaxamentos += 1
+                elif vizinho is not None:
+                    semeia(vizinho, local, d)
+        bloco.reshape(-1)[:] = dist
+        self.distancias.altera(chave)
+        self.retiradas += retiradas
+        self.expandidos += expandidos
+        self.relaxamentos += relaxamentos
+        self.processados += 1
+        return bordas
+
+    def executa(self, origem, destino, estatisticas=None):
+        """Processa os blocos até a distância do destino ficar final
+
+        Args:
+            origem (tuple): (y, x)
+            destino (tuple): (y, x)
+            estatisticas (dict): opcional, recebe o progresso
+
+        Returns:
+            int: distância do destino, INF se não alcançável
+        """
+        lado = self.bloco
+        distancias = self.distancias
+        chave = (origem[0] // lado, origem[1] // lado)
+        largura = min(lado, self.colunas - chave[1] * lado)
+        local = (origem[0] % lado) * largura + origem[1] % lado
+        pendentes = {chave: {local: 0}}
+        fila = [(0, chave)]
+        destino_chave = (destino[0] // lado, destino[1] // lado)
+        melhor = INF
+        while fila:
+            menor, chave = heapq.heappop(fila)
+            if menor >= melhor:
+                # nenhuma semente pendente melhora o destino
+                break
+            sementes = pendentes.pop(chave, None)
+            if sementes is None:
+                # já processadas por uma entrada menor da fila
+                continue
+            for vizinho, novas in self.expande(chave, sementes).items():
+                atuais = pendentes.setdefault(vizinho, {})
+                for j, d in novas.items():
+                    if d < atuais.get(j, INF):
+                        atuais[j] = d
+                heapq.heappush(fila, (min(novas.values()), vizinho))
+            if chave == destino_chave:
+                melhor = distancias.valor(*destino)
+            if estatisticas is not None and not self.processados & 63:
+                self.contadores(estatisticas)
+                notifica(estatisticas, 'progresso')
+        return melhor
+
+    def reconstroi(self, destino):
+        """Trajeto do destino à origem por distâncias decrescentes
+
+        Returns:
+            list: trajeto reverso de (x, y), destino repetido no início
+        """
+        valor = self.distancias.valor
+        y, x = destino
+        d = valor(y, x)
+        path = [(x, y), (x, y)]
+        while d > 0:
+            d -= 1
+            for vy, vx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                if (0 <= vy < self.linhas and 0 <= vx < self.colunas
+                        and valor(vy, vx) == d):
+                    y, x = vy, vx
+                    break
+            path.append((x, y))
+        return path
+
+    def contadores(self, estatisticas):
+        estatisticas['nodos_expandidos'] = self.expandidos
+        estatisticas['retiradas'] = self.retiradas
+        estatisticas['relaxamentos'] = self.relaxamentos
+        estatisticas['blocos_processados'] = self.processados
+        estatisticas['blocos_gravados'] = self.distancias.despejados
+
+
+def encontra_menor_caminho(img, src, dst, shape, estatisticas=None,
+                           bloco=TAMANHO_BLOCO, residentes=RESIDENTES,
+                           diretorio=None):
+    """Encontra o menor caminho entre a origem e o destino com a busca
+    em blocos. Mesma assinatura e retorno do encontra_menor_caminho
+    do labirinto_matriz.
+
+    Args:
+        img (list|nparray): matriz com os valores, de preferência um
+            Labirinto carregado de .npy(memory-map)
+        src (tuple): Origem (y, x)
+        dst (tuple): Destino (y, x)
+        shape (tuple): (linhas, colunas)
+        estatisticas (dict): opcional, recebe os contadores e as fases
+            (ver estatisticas_matriz)
+        bloco (int): lado dos blocos em nodos
+        residentes (int): blocos de distância mantidos na memória
+        diretorio (str): onde criar o arquivo de distâncias, None para
+            o diretório temporário do sistema
+
+    Returns:
+        [list|False]: trajeto reverso de (x, y) ou False
+    """
+    grade = np.asarray(img).reshape(shape)
+    origem = (int(src[0]), int(src[1]))
+    destino = (int(dst[0]), int(dst[1]))
+    if grade[origem] == 1 or grade[destino] == 1:
+        return False
+    with tempfile.TemporaryDirectory(
+            prefix='disco_matriz', dir=diretorio) as pasta:
+        with cronometro(estatisticas, 'montagem'):
+            busca = BuscaDisco(grade, bloco, residentes, pasta)
+        try:
+            with cronometro(estatisticas, 'busca'):
+                distancia = busca.executa(origem, destino, estatisticas)
+            if estatisticas is not None:
+                busca.contadores(estatisticas)
+            if distancia == INF:
+                return False
+            with cronometro(estatisticas, 'reconstrucao'):
+                return busca.reconstroi(destino)
+        finally:
+            busca.distancias.fecha()
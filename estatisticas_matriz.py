@@ -0,0 +1,111 @@
+"""Instrumentação dos motores de busca: tempos por fase, contadores e
+gancho de acompanhamento.
+
+    Os motores recebem um dicionário opcional(estatisticas) e preenchem:
+        nodos_expandidos    nodos cujos vizinhos foram analisados
+        retiradas           nodos retirados da fila de prioridades
+        relaxamentos        distâncias melhoradas
+        trocas_heap         trocas de posição no heap
+        calculos_distancia  chamadas do cálculo de distância da aresta
+        celulas_varridas    nodos percorridos em varreduras(jps)
+        blocos_processados  buscas locais em blocos(disco)
+        blocos_gravados     blocos de distância gravados em disco(disco)
+        fases               {fase: segundos}, ex. montagem, busca,
+                            reconstrucao
+    Cada motor preenche só os contadores que fazem sentido para ele.
+
+    Estatisticas é um dict com o gancho e a soma de vários resultados,
+    então um dict comum continua aceito pelos motores. Com detalhado o
+    motor também cronometra as partes internas da busca(heap e
+    distância no dijkstra), o que deixa a busca mais lenta.
+
+    O gancho é chamado como gancho(evento, estatisticas), com o nome
+    da fase ao fim de cada fase e 'progresso' periodicamente durante
+    a busca.
+"""
+
+import time
+from contextlib import contextmanager
+
+CONTADORES = (
+    'nodos_expandidos', 'retiradas', 'relaxamentos', 'trocas_heap',
+    'calculos_distancia', 'celulas_varridas', 'blocos_processados',
+    'blocos_gravados')
+
+
+class Estatisticas(dict):
+    """ Contadores e tempos por fase de uma ou mais buscas
+    """
+
+    def __init__(self, gancho=None, detalhado=False) -> None:
+        super().__init__()
+        # callback gancho(evento, estatisticas)
+        self.gancho = gancho
+        # cronometra as partes internas da busca
+        self.detalhado = detalhado
+
+    def soma(self, outra):
+        """Acumula os contadores e tempos de outra busca
+
+        Args:
+            outra (dict): estatísticas de um motor
+        """
+        for nome, valor in outra.items():
+            if nome == 'fases':
+                fases = self.setdefault('fases', {})
+                for fase, segundos in valor.items():
+                    fases[fase] = fases.get(fase, 0.0) + segundos
+            elif nome in CONTADORES:
+                self[nome] = self.get(nome, 0) + valor
+
+    def resumo(self):
+        """Texto de uma linha com os contadores e as fases
+
+        Returns:
+            str: ex. 'retiradas: 2500 ... | montagem: 0.0102s ...'
+        """
+        contadores = ' '.join(
+            '%s: %d' % (nome, self[nome])
+            for nome in CONTADORES if nome in self)
+        fases = ' '.join(
+            '%s: %.4fs' % item for item in self.get('fases', {}).items())
+        return contadores + (' | ' + fases if fases else '')
+
+
+def notifica(estatisticas, evento):
+    """Chama o gancho das estatísticas, se houver
+
+    Args:
+        estatisticas (dict|None): estatísticas do motor
+        evento (str): nome da fase ou 'progresso'
+    """
+    gancho = getattr(estatisticas, 'gancho', None)
+    if gancho is not None:
+        gancho(evento, estatisticas)
+
+
+def acumula_fase(estatisticas, fase, segundos):
+    """Soma segundos ao tempo da fase
+    """
+    fases = estatisticas.setdefault('fases', {})
+    fases[fase] = fases.get(fase, 0.0) + segundos
+
+
+@contextmanager
+def cronometro(estatisticas, fase):
+    """Mede o tempo do bloco como uma fase e avisa o gancho.
+    Sem estatisticas(None) não faz nada.
+
+    Args:
+        estatisticas (dict|None): estatísticas do motor
+        fase (str): nome da fase
+    """
+    if estatisticas is None:
+        yield
+        return
+    t1 = time.perf_counter()
+    try:
+        yield
+    finally:
+        acumula_fase(estatisticas, fase, time.perf_counter() - t1)
+    notifica(estatisticas, fase)
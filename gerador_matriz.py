@@ -0,0 +1,381 @@
+"""Gerador de labirintos sintéticos para testes de carga e escala.
+
+    Gera labirintos perfeitos(um único trajeto entre dois nodos) e, com
+    a densidade de paredes, labirintos entrelaçados(com ciclos):
+        backtracking  busca em profundidade iterativa
+        kruskal       arestas em ordem aleatória, vetorizado em numpy
+                      (Borůvka sobre os pesos aleatórios, mesmo
+                      resultado; 10k x 10k em ~15s, sem viés)
+        prim          Prim aleatório sobre a fronteira de paredes
+        binaria       árvore binária vetorizada em numpy, a mais rápida
+                      (gera 10k x 10k em segundos, com viés diagonal)
+
+    backtracking e prim rodam em Python puro(~3us por célula); acima
+    de LIMITE_PYTHON nodos o gerador avisa e sugere kruskal ou binaria.
+
+    Os nodos ficam nas posições ímpares da matriz, as paredes entre
+    eles nas posições pares. Dimensões pares são reduzidas para o
+    ímpar abaixo. As entradas(-1) ficam na coluna direita e as saídas
+    na esquerda, como esperado pelo matriz.py.
+
+    A saída é o formato texto separado por tabs(escrito linha a linha,
+    sem montar o arquivo em memória) ou binário .npy(int8), que pode
+    ser aberto com numpy.load(mmap_mode='r').
+
+    Uso:
+        python3 gerador_matriz.py <linhas> <colunas> [-a backtracking]
+            [--entradas 3] [--saidas 3] [--densidade 0.4]
+            [--semente 1] [-o labirinto.txt|labirinto.npy]
+"""
+
+import argparse
+import random
+import sys
+
+import numpy as np
+
+ALGORITMOS = ('backtracking', 'kruskal', 'prim', 'binaria')
+
+# algoritmos em Python puro, lentos em matrizes grandes
+LENTOS = ('backtracking', 'prim')
+# nodos da matriz a partir dos quais os LENTOS levam mais de ~10s
+LIMITE_PYTHON = 4001 * 4001
+
+
+def _vizinhos(celula, altura, largura):
+    """Células vizinhas e o índice plano da parede entre elas
+    """
+    r, c = divmod(celula, largura)
+    colunas = 2 * largura + 1
+    meio = (2 * r + 1) * colunas + 2 * c + 1
+    if r > 0:
+        yield celula - largura, meio - colunas
+    if r < altura - 1:
+        yield celula + largura, meio + colunas
+    if c > 0:
+        yield celula - 1, meio - 1
+    if c < largura - 1:
+        yield celula + 1, meio + 1
+
+
+def _grade_inicial(altura, largura):
+    """Grade plana(bytearray) só com paredes e as células abertas
+    """
+    colunas = 2 * largura + 1
+    grade = bytearray(b'\x01') * ((2 * altura + 1) * colunas)
+    for r in range(altura):
+        inicio = (2 * r + 1) * colunas + 1
+        grade[inicio:inicio + 2 * largura:2] = bytes(largura)
+    return grade
+
+
+def backtracking(altura, largura, rnd):
+    """Labirinto perfeito por busca em profundidade iterativa
+
+    Args:
+        altura (int): células por coluna
+        largura (int): células por linha
+        rnd (random.Random): gerador aleatório
+
+    Returns:
+        bytearray: grade plana (2*altura+1) x (2*largura+1)
+    """
+    grade = _grade_inicial(altura, largura)
+    visitado = bytearray(altura * largura)
+    inicio = rnd.randrange(altura * largura)
+    visitado[inicio] = 1
+    pilha = [inicio]
+    while pilha:
+        opcoes = [
+            (v, parede)
+            for v, parede in _vizinhos(pilha[-1], altura, largura)
+            if not visitado[v]
+        ]
+        if not opcoes:
+            pilha.pop()
+            continue
+        v, parede = opcoes[rnd.randrange(len(opcoes))]
+        grade[parede] = 0
+        visitado[v] = 1
+        pilha.append(v)
+    return grade
+
+
+def kruskal(altura, largura, rnd):
+    """Labirinto perfeito por Kruskal aleatório, vetorizado em numpy
+
+    As arestas recebem pesos distintos em ordem aleatória; a árvore
+    geradora mínima desses pesos é exatamente a que o Kruskal monta
+    percorrendo as arestas nessa ordem. Ela é calculada com o algoritmo
+    de Borůvka: a cada rodada todo componente escolhe a aresta mais
+    leve que sai dele e os componentes ligados viram um só, então o
+    total de componentes cai pelo menos à metade por rodada(log2 das
+    células rodadas, cada uma com operações sobre todas as arestas).
+
+    Args:
+        altura (int): células por coluna
+        largura (int): células por linha
+        rnd (random.Random): gerador aleatório
+
+    Returns:
+        nparray: grade int8 (2*altura+1) x (2*largura+1)
+    """
+    total = altura * largura
+    colunas = 2 * largura + 1
+    tipo = np.int32 if (2 * altura + 1) * colunas < 2**31 else np.int64
+    # arestas 0..total-1 ligam a célula à direita,
+    # total..2*total-1 ligam a célula abaixo; o peso é a posição na
+    # ordem aleatória
+    ordem = np.random.default_rng(rnd.getrandbits(63)).permutation(
+        2 * total)
+    peso = np.empty(2 * total, dtype=tipo)
+    peso[ordem] = np.arange(2 * total, dtype=tipo)
+    del ordem
+    celulas = np.arange(total, dtype=tipo).reshape(altura, largura)
+    direita = celulas[:, :-1].ravel()
+    abaixo = celulas[:-1].ravel()
+    # componente de cada ponta e a parede(índice plano) de cada aresta
+    ru = np.concatenate([direita, abaixo])
+    rv = np.concatenate([direita + 1, abaixo + largura])
+    peso = np.concatenate([peso[direita], peso[total + abaixo]])
+    linha, coluna = np.divmod(ru, tipo(largura))
+    parede = (2 * linha + 1) * colunas + 2 * coluna + 1
+    parede[:len(direita)] += 1
+    parede[len(direita):] += colunas
+    del celulas, direita, abaixo, linha, coluna
+
+    grade = np.ones((2 * altura + 1, colunas), dtype=np.int8)
+    grade[1::2, 1::2] = 0
+    plana = grade.reshape(-1)
+    componentes = total
+    maximo = np.iinfo(tipo).max
+    while len(ru):
+        # aresta mais leve de cada componente
+        menor = np.full(componentes, maximo, dtype=tipo)
+        np.minimum.at(menor, ru, peso)
+        np.minimum.at(menor, rv, peso)
+        de_u = menor[ru] == peso
+        de_v = menor[rv] == peso
+        plana[parede[de_u | de_v]] = 0
+        # cada componente aponta para o vizinho da aresta escolhida;
+        # dois componentes que escolhem a mesma aresta apontam um para
+        # o outro e o menor deles vira a raiz
+        indice = np.arange(componentes, dtype=tipo)
+        ponteiro = indice.copy()
+        ponteiro[ru[de_u]] = rv[de_u]
+        ponteiro[rv[de_v]] = ru[de_v]
+        ciclo = (ponteiro[ponteiro] == indice) & (indice < ponteiro)
+        ponteiro[ciclo] = indice[ciclo]
+        while True:
+            proximo = ponteiro[ponteiro]
+            if (proximo == ponteiro).all():
+                break
+            ponteiro = proximo
+        # renumera as raízes e descarta as arestas internas
+        raiz = ponteiro == indice
+        mapa = (np.cumsum(raiz, dtype=tipo) - 1)[ponteiro]
+        componentes = int(np.count_nonzero(raiz))
+        ru = mapa[ru]
+        rv = mapa[rv]
+        externa = ru != rv
+        ru, rv = ru[externa], rv[externa]
+        peso, parede = peso[externa], parede[externa]
+    return grade
+
+
+def prim(altura, largura, rnd):
+    """Labirinto perfeito por Prim aleatório
+
+    Args:
+        altura (int): células por coluna
+        largura (int): células por linha
+        rnd (random.Random): gerador aleatório
+
+    Returns:
+        bytearray: grade plana (2*altura+1) x (2*largura+1)
+    """
+    grade = _grade_inicial(altura, largura)
+    visitado = bytearray(altura * largura)
+    inicio = rnd.randrange(altura * largura)
+    visitado[inicio] = 1
+    fronteira = list(_vizinhos(inicio, altura, largura))
+    while fronteira:
+        # retira uma parede aleatória em O(1)
+        i = rnd.randrange(len(fronteira))
+        fronteira[i], fronteira[-1] = fronteira[-1], fronteira[i]
+        v, parede = fronteira.pop()
+        if visitado[v]:
+            continue
+        visitado[v] = 1
+        grade[parede] = 0
+        fronteira.extend(
+            item for item in _vizinhos(v, altura, largura)
+            if not visitado[item[0]])
+    return grade
+
+
+def binaria(altura, largura, rng):
+    """Labirinto perfeito por árvore binária, vetorizado: cada célula
+    abre a parede de cima ou a da esquerda.
+
+    Args:
+        altura (int): células por coluna
+        largura (int): células por linha
+        rng (numpy.random.Generator): gerador aleatório
+
+    Returns:
+        nparray: grade int8 (2*altura+1) x (2*largura+1)
+    """
+    grade = np.ones((2 * altura + 1, 2 * largura + 1), dtype=np.int8)
+    grade[1::2, 1::2] = 0
+    acima = rng.random((altura, largura)) < 0.5
+    # a primeira linha só abre à esquerda e a primeira coluna só acima
+    acima[0, :] = False
+    acima[:, 0] = True
+    acima[0, 0] = False
+    esquerda = ~acima
+    esquerda[0, 0] = False
+    grade[0:-1:2, 1::2][acima] = 0
+    grade[1::2, 0:-1:2][esquerda] = 0
+    return grade
+
+
+def ajusta_densidade(grade, densidade, rng):
+    """Remove paredes internas aleatórias até a fração de paredes da
+    matriz chegar à densidade, criando ciclos(labirinto entrelaçado).
+
+    Args:
+        grade (nparray): grade int8, alterada no lugar
+        densidade (float): fração de paredes desejada, entre 0 e 1
+        rng (numpy.random.Generator): gerador aleatório
+    """
+    excesso = int((grade == 1).sum() - densidade * grade.size)
+    if excesso <= 0:
+        return
+    # paredes que separam duas células
+    candidatas = np.zeros(grade.shape, dtype=bool)
+    candidatas[2:-1:2, 1::2] = grade[2:-1:2, 1::2] == 1
+    candidatas[1::2, 2:-1:2] = grade[1::2, 2:-1:2] == 1
+    indices = np.flatnonzero(candidatas)
+    if excesso < len(indices):
+        indices = rng.choice(indices, excesso, replace=False)
+    grade.reshape(-1)[indices] = 0
+
+
+def gera(linhas, colunas, algoritmo='backtracking', entradas=1, saidas=1,
+         densidade=None, semente=None):
+    """Gera um labirinto
+
+    Args:
+        linhas (int): linhas da matriz(ímpar, pares são reduzidas)
+        colunas (int): colunas da matriz(ímpar, pares são reduzidas)
+        algoritmo (str): um de ALGORITMOS
+        entradas (int): aberturas na coluna direita
+        saidas (int): aberturas na coluna esquerda
+        densidade (float): fração de paredes, None para labirinto
+            perfeito
+        semente (int): semente dos geradores aleatórios
+
+    Returns:
+        nparray: matriz int8 com -1 aberturas, 0 piso e 1 paredes
+    """
+    if algoritmo not in ALGORITMOS:
+        raise ValueError('Algoritmo desconhecido: ' + algoritmo)
+    altura = max(1, (linhas - 1) // 2)
+    largura = max(1, (colunas - 1) // 2)
+    rnd = random.Random(semente)
+    rng = np.random.default_rng(semente)
+
+    if algoritmo == 'binaria':
+        grade = binaria(altura, largura, rng)
+    elif algoritmo == 'kruskal':
+        grade = kruskal(altura, largura, rnd)
+    else:
+        plana = globals()[algoritmo](altura, largura, rnd)
+        grade = np.frombuffer(plana, dtype=np.int8).reshape(
+            2 * altura + 1, 2 * largura + 1).copy()
+
+    if densidade is not None:
+        ajusta_densidade(grade, densidade, rng)
+
+    # aberturas em linhas de células distintas
+    entradas = min(entradas, altura)
+    saidas = min(saidas, altura)
+    grade[2 * rng.choice(altura, entradas, replace=False) + 1, -1] = -1
+    grade[2 * rng.choice(altura, saidas, replace=False) + 1, 0] = -1
+    return grade
+
+
+def aviso_escala(linhas, colunas, algoritmo):
+    """Aviso para algoritmos em Python puro em matrizes grandes
+
+    Returns:
+        str|None: texto do aviso ou None se a escala é adequada
+    """
+    if algoritmo in LENTOS and linhas * colunas >= LIMITE_PYTHON:
+        return ('Aviso: %s em %dx%d roda em Python puro e pode levar '
+                'minutos; use -a kruskal(sem viés) ou -a binaria'
+                % (algoritmo, linhas, colunas))
+    return None
+
+
+def escreve_texto(grade, saida):
+    """Escreve a matriz no formato texto(tabs e quebras de linha),
+    linha a linha e sem quebra de linha no final, como o carrega_matriz
+    espera.
+
+    Args:
+        grade (nparray): matriz int8
+        saida (file): arquivo binário de saída
+    """
+    linhas, colunas = grade.shape
+    # linhas só com 0 e 1 viram bytes direto: dígito, tab, dígito...
+    texto = np.empty(2 * colunas - 1, dtype=np.uint8)
+    texto[1::2] = ord('\t')
+    for i in range(linhas):
+        linha = grade[i]
+        if i:
+            saida.write(b'\n')
+        if linha.min() < 0 or linha.max() > 9:
+            saida.write('\t'.join(map(str, linha.tolist())).encode())
+            continue
+        texto[0::2] = linha + ord('0')
+        saida.write(texto.tobytes())
+
+
+def salva(grade, arquivo):
+    """Grava em .npy(binário) ou texto conforme a extensão, '-' para
+    texto na saída padrão.
+    """
+    if arquivo.endswith('.npy'):
+        np.save(arquivo, grade)
+    elif arquivo == '-':
+        escreve_texto(grade, sys.stdout.buffer)
+    else:
+        with open(arquivo, 'wb') as saida:
+            escreve_texto(grade, saida)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Gera labirintos sintéticos.')
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('colunas', type=int)
+    parser.add_argument('-a', '--algoritmo', choices=ALGORITMOS,
+                        default='backtracking')
+    parser.add_argument('--entradas', type=int, default=1)
+    parser.add_argument('--saidas', type=int, default=1)
+    parser.add_argument('--densidade', type=float, default=None,
+                        help='fração de paredes(remove paredes internas '
+                             'criando ciclos)')
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('-o', '--saida', default='-',
+                        help='.txt, .npy ou - para a saída padrão')
+    args = parser.parse_args()
+    aviso = aviso_escala(args.linhas, args.colunas, args.algoritmo)
+    if aviso:
+        print(aviso, file=sys.stderr)
+    salva(
+        gera(args.linhas, args.colunas, args.algoritmo, args.entradas,
+             args.saidas, args.densidade, args.semente),
+        args.saida)
@@ -0,0 +1,162 @@
+"""Exportação de labirintos resolvidos para PNG, sem interface gráfica.
+
+    A imagem é montada direto em um buffer numpy(um ou N pixels por 
+    nodo) e gravada em PNG apenas com a biblioteca padrão(zlib), então
+    não depende de Qt nem de servidor gráfico. As cores são as mesmas 
+    usadas na janela.
+
+    Uso:
+        python3 imagem_matriz.py <diretorio> <destino> [--escala N] [-j N]
+    resolve e exporta todos os arquivos .txt do diretório em paralelo.
+"""
+
+import argparse
+import glob
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import caminho_matriz
+
+# cores RGB
+COR_PISO = (0, 255, 255)
+COR_OUTRO = (100, 20, 254)
+COR_PAREDE = (0, 0, 0)
+COR_PATH = (139, 236, 80)
+
+
+def renderiza(matriz, caminho=None, escala=1):
+    """Monta a imagem RGB da matriz com o caminho
+
+    Args:
+        matriz (list|nparray): matriz com os valores
+        caminho (list|CaminhoCompacto): nodos (x, y) ou None
+        escala (int): pixels por nodo
+
+    Returns:
+        nparray: array (linhas*escala, colunas*escala, 3) uint8
+    """
+    grade = np.asarray(matriz)
+    rgb = np.empty(grade.shape + (3,), dtype=np.uint8)
+    rgb[:] = COR_OUTRO
+    rgb[(grade == 0) | (grade == -1)] = COR_PISO
+    rgb[grade == 1] = COR_PAREDE
+    if isinstance(caminho, caminho_matriz.CaminhoCompacto):
+        rgb[caminho.mascara(grade.shape)] = COR_PATH
+    elif caminho:
+        nodos = np.asarray(caminho, dtype=np.int64).reshape(-1, 2)
+        rgb[nodos[:, 1], nodos[:, 0]] = COR_PATH
+    if escala > 1:
+        rgb = rgb.repeat(escala, axis=0).repeat(escala, axis=1)
+    return rgb
+
+
+def _bloco_png(tipo, dados):
+    bloco = tipo + dados
+    return (struct.pack('>I', len(dados)) + bloco
+            + struct.pack('>I', zlib.crc32(bloco) & 0xffffffff))
+
+
+def salva_png(arquivo, rgb, compressao=6):
+    """Grava um array RGB em PNG(8 bits por canal)
+
+    Args:
+        arquivo (str): caminho do arquivo de saída
+        rgb (nparray): array (altura, largura, 3) uint8
+        compressao (int): nível de compressão do zlib
+    """
+    altura, largura = rgb.shape[:2]
+    # cada linha do PNG começa com o byte do filtro(0, nenhum)
+    linhas = np.zeros((altura, largura * 3 + 1), dtype=np.uint8)
+    linhas[:, 1:] = rgb.reshape(altura, largura * 3)
+    cabecalho = struct.pack('>IIBBBBB', largura, altura, 8, 2, 0, 0, 0)
+    with open(arquivo, 'wb') as saida:
+        saida.write(b'\x89PNG\r\n\x1a\n')
+        saida.write(_bloco_png(b'IHDR', cabecalho))
+        saida.write(_bloco_png(
+            b'IDAT', zlib.compress(linhas.tobytes(), compressao)))
+        saida.write(_bloco_png(b'IEND', b''))
+
+
+def renderiza_arquivo(arquivo, destino, escala=1):
+    """Resolve um arquivo de matriz e grava o PNG no destino
+
+    Args:
+        arquivo (str): arquivo com a matriz
+        destino (str): diretório de saída
+        escala (int): pixels por nodo
+
+    Returns:
+        str: caminho do PNG gravado
+    """
+    import matriz
+    app = matriz.Aplicativo(arquivo, verboso=False)
+    app.resolve_labirinto()
+    nome = os.path.splitext(os.path.basename(arquivo))[0] + '.png'
+    png = os.path.join(destino, nome)
+    app.exporta_png(png, escala)
+    return png
+
+
+def renderiza_protegido(arquivo, destino, escala=1):
+    """renderiza_arquivo sem deixar o erro de um arquivo interromper
+    o lote
+
+    Returns:
+        tuple: (caminho do PNG ou None, erro ou None)
+    """
+    try:
+        return renderiza_arquivo(arquivo, destino, escala), None
+    except Exception as e:
+        return None, repr(e)
+
+
+def renderiza_diretorio(diretorio, destino, escala=1, processos=None):
+    """Resolve e exporta em paralelo todos os .txt de um diretório
+
+    Args:
+        diretorio (str): diretório com os arquivos de matriz
+        destino (str): diretório de saída, criado se não existir
+        escala (int): pixels por nodo
+        processos (int): total de processos, None para os.cpu_count()
+
+    Returns:
+        tuple: (caminhos dos PNGs gravados, (arquivo, erro) de cada
+        arquivo que falhou)
+    """
+    os.makedirs(destino, exist_ok=True)
+    arquivos = sorted(glob.glob(os.path.join(diretorio, '*.txt')))
+    gravados = []
+    erros = []
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        for arquivo, (png, erro) in zip(arquivos, pool.map(
+                renderiza_protegido, arquivos,
+                [destino] * len(arquivos), [escala] * len(arquivos))):
+            if erro is None:
+                gravados.append(png)
+            else:
+                erros.append((arquivo, erro))
+    return gravados, erros
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Resolve e exporta para PNG os labirintos de um '
+                    'diretório.')
+    parser.add_argument('diretorio')
+    parser.add_argument('destino')
+    parser.add_argument('--escala', type=int, default=1,
+                        help='pixels por nodo')
+    parser.add_argument('-j', '--processos', type=int, default=None)
+    args = parser.parse_args()
+    gravados, erros = renderiza_diretorio(
+        args.diretorio, args.destino, args.escala, args.processos)
+    for png in gravados:
+        print(png)
+    for arquivo, erro in erros:
+        print('Erro em %s: %s' % (arquivo, erro), file=sys.stderr)
+    sys.exit(1 if erros else 0)
@@ -75,21 +75,24 @@ import sys
 import traceback
 
 from PySide6.QtCore import (
-    QEvent, QObject,  QRect, QThreadPool,
+    QEvent, QObject, QThreadPool, QTimer,
     Signal, Slot, QRunnable
 )
 from PySide6.QtGui import (
-    QBrush, QColor,  QPaintDevice, QPainter, QPen,
-    Qt
+    QPaintDevice, QPainter
 )
 from PySide6.QtWidgets import (
-    QApplication, QFileDialog,  QWidget
+    QApplication, QComboBox, QFileDialog, QProgressBar, QWidget
 )
 
 import itertools
 from datetime import datetime
-import labirinto_matriz
+import caminho_matriz
+import estatisticas_matriz
+import modelo_matriz
+import motores_matriz
 import interfaceui_matriz
+import viewport_matriz
 
 
 def trata_ponto_tupla(p):
@@ -155,7 +158,7 @@ class WorkerSignals(QObject):
     finished = Signal()
     error = Signal(tuple)
     result = Signal(object)
-    progress = Signal(str)
+    progress = Signal(object)
 
 
 def trata_caminho(c):
@@ -177,6 +180,128 @@ def trata_caminho(c):
     return info
 
 
+class CanalProgresso(QObject):
+    """ Canal de progresso entre os workers e a interface.
+
+    Os workers emitem o progresso estruturado(dict) e o canal apenas 
+    acumula contadores e linhas de log. Um QTimer descarrega tudo de
+    uma vez em intervalos fixos: as linhas vão para o log em um único
+    appendPlainText e a barra de progresso é atualizada. Assim o custo
+    na interface não depende do número de caminhos em execução.
+
+    O progresso recebido é um dict com:
+        caminho (tuple): ((origem),(destino))
+        distancia (int|None): tamanho do trajeto, None se não encontrou
+        medida (int|None): medida do trajeto usada para escolher o
+            melhor(motores_matriz.medida: custo nos motores ponderados,
+            tamanho nos outros), None se não encontrou
+        erro (Exception|None): exceção do motor, o caminho conta como
+            concluído
+        nodos_expandidos (int): nodos processados na busca
+        estatisticas (Estatisticas): contadores e tempos por fase,
+            mostrados no log e somados ao final
+
+    Implementa:
+        QObject : Qt6.
+    """
+
+    def __init__(self, log, barra, intervalo=100, parent=None) -> None:
+        super().__init__(parent)
+        # QPlainTextEdit do log e QProgressBar
+        self.log = log
+        self.barra = barra
+        # linhas ainda não enviadas para o log
+        self.linhas = []
+        # contadores
+        self.total = 0
+        self.concluidos = 0
+        self.melhor_medida = None
+        self.nodos_expandidos = 0
+        self.estatisticas = estatisticas_matriz.Estatisticas()
+        # timer que descarrega as atualizações
+        self.timer = QTimer(self)
+        self.timer.setInterval(intervalo)
+        self.timer.timeout.connect(self.descarrega)
+
+    def inicia(self, total):
+        """Zera os contadores para uma nova execução
+
+        Args:
+            total (int): total de caminhos a serem resolvidos
+        """
+        self.total = total
+        self.concluidos = 0
+        self.melhor_medida = None
+        self.nodos_expandidos = 0
+        self.estatisticas = estatisticas_matriz.Estatisticas()
+        self.barra.setRange(0, max(total, 1))
+        self.barra.setValue(0)
+        self.timer.start()
+
+    def mensagem(self, texto):
+        """Agenda uma linha para o log, mantendo a ordem com as
+        linhas de progresso.
+
+        Args:
+            texto (str): linha a ser mostrada no log
+        """
+        self.linhas.append(str(texto))
+        if not self.timer.isActive():
+            self.descarrega()
+
+    @Slot(object)
+    def recebe(self, progresso):
+        """ Callback do progress do worker que está resolvendo o 
+        labirinto
+
+        Args:
+            progresso (dict): progresso estruturado do worker
+        """
+        caminho = progresso['caminho']
+        distancia = progresso['distancia']
+        self.concluidos += 1
+        self.nodos_expandidos += progresso.get('nodos_expandidos', 0)
+        if progresso.get('erro') is not None:
+            self.linhas.append(
+                'Erro em ' + trata_caminho(caminho) + ': '
+                + repr(progresso['erro']))
+        elif distancia:
+            medida = progresso.get('medida', distancia)
+            if (self.melhor_medida is None
+                    or medida < self.melhor_medida):
+                self.melhor_medida = medida
+            info = trata_caminho(caminho)+' Distância: '+str(distancia)
+            if medida != distancia:
+                info += ' Custo: '+str(medida)
+            self.linhas.append(info)
+        else:
+            self.linhas.append(
+                'Caminho não encontrado '+trata_caminho(caminho))
+        estatisticas = progresso.get('estatisticas')
+        if estatisticas:
+            self.linhas.append('  ' + estatisticas.resumo())
+            self.estatisticas.soma(estatisticas)
+        if self.concluidos == self.total and self.estatisticas:
+            self.linhas.append(
+                'Estatísticas: ' + self.estatisticas.resumo())
+
+    @Slot()
+    def descarrega(self):
+        """Envia as linhas acumuladas para o log e atualiza a barra
+        """
+        if self.linhas:
+            self.log.appendPlainText('\n'.join(self.linhas))
+            self.linhas = []
+        self.barra.setValue(self.concluidos)
+        melhor = self.melhor_medida
+        self.barra.setFormat(
+            '%v/%m caminhos - melhor: '
+            + (str(melhor) if melhor is not None else '-')
+            + ' - nodos: ' + str(self.nodos_expandidos))
+        if self.concluidos >= self.total:
+            self.timer.stop()
+
+
 class Janela(QWidget):
     """ Janela principal do app.
 
@@ -189,22 +314,31 @@ class Janela(QWidget):
 
         # caminho do arquivo de imagem do labirinto
         self.arquivo_matriz = False
-        # matriz do labirinto
-        self.matriz_labirinto = []
+        # matriz do labirinto(modelo_matriz.Labirinto)
+        self.matriz_labirinto = None
         # caminhos encontrados
         self.caminhos = []
+        # threads concluídos, com ou sem caminho
+        self.concluidos = 0
         # variavel para medir tempo de execução
         self.t1 = None
         # thread pool
         self.thread_pool = QThreadPool(self)
         # total de threads
         self.total_threads = 3
+        # motor de busca usado em cada par
+        self.motor = motores_matriz.PADRAO
         # o caminho a ser desenhado
         # iniciado como False
         self.draw_path = False
         # carrega interface criada com QtCreator
         self.form = interfaceui_matriz.Ui_Form()
         self.form.setupUi(self)
+        # viewport com zoom e pan. Mantém em cache as camadas de 
+        # desenho em tiles: o fundo(paredes e piso) só é refeito ao 
+        # carregar a matriz e a camada do caminho só quando o draw_path
+        # muda.
+        self.viewport = viewport_matriz.Viewport(self.form.widgetImagem)
         # conecta evento "clicked" do botão de executar 
         # com função local
         self.form.controle_executa.clicked.connect(
@@ -217,6 +351,24 @@ class Janela(QWidget):
         self.form.widgetImagem.installEventFilter(self)
         # conecta botao abrir nova imagem
         self.form.toolButton.clicked.connect(self.seleciona_nova_matriz)
+        # seleção do motor de busca logo acima do botão executar
+        self.seletor_motor = QComboBox(self.form.groupBox)
+        self.seletor_motor.addItems(sorted(motores_matriz.MOTORES))
+        self.seletor_motor.setCurrentText(self.motor)
+        self.seletor_motor.currentTextChanged.connect(self.seleciona_motor)
+        self.form.verticalLayout.insertWidget(
+            self.form.verticalLayout.indexOf(self.form.controle_executa),
+            self.seletor_motor)
+        # barra de progresso logo acima do log
+        self.barra_progresso = QProgressBar(self.form.groupBox)
+        self.form.verticalLayout.insertWidget(
+            self.form.verticalLayout.indexOf(self.form.log),
+            self.barra_progresso)
+        # o log guarda no máximo essa quantidade de linhas
+        self.form.log.setMaximumBlockCount(10000)
+        # canal de progresso dos workers
+        self.progresso = CanalProgresso(
+            self.form.log, self.barra_progresso, parent=self)
 
 
     def seleciona_nova_matriz(self):
@@ -224,7 +376,7 @@ class Janela(QWidget):
         """
         qf = QFileDialog(self)
         qf.setFileMode(QFileDialog.FileMode.ExistingFiles)
-        qf.setNameFilters(['*.txt'])
+        qf.setNameFilters(['*.txt', '*.npy'])
         if qf.exec():
             arquivo = qf.selectedFiles()
             if arquivo:
@@ -232,22 +384,26 @@ class Janela(QWidget):
                 self.arquivo_matriz = arquivo[0]
                 self.carrega_matriz()
 
+    def seleciona_motor(self, motor):
+        """ Handler da troca do motor de busca
+
+        Args:
+            motor (str): nome do motor em motores_matriz.MOTORES
+        """
+        self.motor = motor
+
     def formato_matriz(self):
         """Retorna o formato da matriz
 
         Returns:
             tuple: (linhas,colunas)
         """
-        colunas = 0
-        linhas = len(self.matriz_labirinto)
-        if linhas > 0:
-            linha0 = self.matriz_labirinto[0]
-            colunas = len(linha0)
-
-        return (linhas, colunas)
+        if self.matriz_labirinto is None:
+            return (0, 0)
+        return self.matriz_labirinto.shape
 
     def carrega_matriz(self):
-        """Carrega a matriz
+        """Carrega a matriz(ver modelo_matriz.Labirinto)
         ao carregar a matriz ela será automaticamente pintada no widget.
 
         Aqui espera-se uma matriz como a seguir:
@@ -259,43 +415,28 @@ class Janela(QWidget):
              0 piso
         """
         self.draw_path = False
-        self.matriz_labirinto = []
+        self.matriz_labirinto = None
         self.caminhos = []
         
         # arquivo matriz inicia como False
         if self.arquivo_matriz:
             # ja foi informado o arquivo.
-            with open(self.arquivo_matriz, 'r') as arquivo:
-                matriz_lida = arquivo.read()
-            matriz = []
-
-            linhas = matriz_lida.split('\n')
-
-            for l in range(len(linhas)):
-                linha = list(map(int, linhas[l].split('\t')))
-                matriz.append(linha)
-
-            self.matriz_labirinto = matriz
+            self.matriz_labirinto = modelo_matriz.Labirinto.carrega(
+                self.arquivo_matriz)
             self.entradas = self.identifica_entradas()
             self.saidas = self.identifica_saidas()
-            self.form.widgetImagem.update()
+            # invalida as camadas, serão refeitas no próximo paint
+            # (o viewport usa o mesmo array, sem cópia)
+            self.viewport.define_grade(self.matriz_labirinto.grade)
             self.form.controle_executa.setEnabled(True)
 
     def identifica_entradas(self,):
-        """Identifica as entradas no labirinto
+        """Entradas encontradas na carga do labirinto
 
         Returns:
             list: Uma lista de Tuplas ou vazia
         """
-        entradas = []
-
-        linhas, colunas = self.formato_matriz()
-        for i in range(linhas):
-            linha = self.matriz_labirinto[i]
-            valor = linha[colunas-1]
-
-            if valor == -1:
-                entradas.append((i, len(linha)-1))
+        entradas = self.matriz_labirinto.entradas
         total = len(entradas)
         if total > 0:
             info = str(total) + ' entradas encontradas.'
@@ -305,18 +446,12 @@ class Janela(QWidget):
         return entradas
 
     def identifica_saidas(self):
-        """Identifica as saídas do labirinto
+        """Saídas encontradas na carga do labirinto
 
         Returns:
             list: Uma lista de Tuplas ou vazia
         """
-        saidas = []
-        linhas, colunas = self.formato_matriz()
-        for i in range(linhas):
-            linha = self.matriz_labirinto[i]
-            valor = linha[0]
-            if valor == -1:
-                saidas.append((i, 0))
+        saidas = self.matriz_labirinto.saidas
         total = len(saidas)
         if total > 0:
             info = str(total) + ' saidas encontradas.'
@@ -328,18 +463,14 @@ class Janela(QWidget):
     def menor_caminho(self):
         """ Os paths foram analisados pelos threads e se encontram
         na lista self.caminhos. 
-        O menor caminho é o caminho que tem o menor numero de nodos.        
+        O menor caminho é o caminho que tem o menor numero de nodos,
+        ou o menor custo nos motores de terreno ponderado.
 
         Returns:
             list: Lista de pontos a serem desenhados.
         """
-        menor = float("inf")
-        menor_caminho = False
-        for caminho in self.caminhos:
-            if len(caminho) < menor:
-                menor = len(caminho)
-                menor_caminho = caminho
-        return menor_caminho
+        return self.matriz_labirinto.menor_caminho(
+            self.caminhos, self.motor)
 
     def solucao_result(self, r):
         """Callback para o retorno do thread
@@ -348,47 +479,49 @@ class Janela(QWidget):
             r (list|bool): path ou False
         """
         if r:
-            # pinta o menor caminho
-            self.caminhos.append(r)
-            if len(self.caminhos) == (
-                    len(self.entradas)*len(self.saidas)):
-                menor = self.menor_caminho()
-                # só setar o caminho a ser desenhado. Ele vai ser 
-                # pintado do EventFilter do widget
-                self.draw_path = menor
-                # a lista de path é formada de modo reverso
-                # a entrada é o ultimo da lista, a saida o primeiro
-                origem = str(menor[-1:][0])
-                destino = str(menor[0])
-                info = 'Menor trajeto: Origem:'
-                info += origem + ' ->  Destino: ' + destino
-                self.form.lb_resultado.setText(info)                
-                t2 = datetime.now()
-                self.form.log.appendPlainText(
-                    'Tempo de execução: '+str(t2-self.t1))
-                self.form.widgetImagem.update()
-        else:
-            self.form.log.appendPlainText('Não encontrou o caminho')
+            # guarda o trajeto compactado(2 bits por passo)
+            self.caminhos.append(
+                caminho_matriz.CaminhoCompacto.de_lista(r))
 
     def solucao_thread_finished(self,):
-        """Callback do fim do thread
+        """Callback do fim do thread. Conta os threads concluídos,
+        com ou sem caminho, e depois do último mostra o menor caminho
         """
-        print('thread finished')
-
-    def solucao_progress(self, s):
-        """ Callback do progress do worker que está resolvendo o 
-        labirinto
-
-        Args:
-            s (str): Informação a ser mostrada no log
-        """
-        self.form.log.appendPlainText(str(s))
+        self.concluidos += 1
+        if self.concluidos < len(self.entradas)*len(self.saidas):
+            return
+        if self.caminhos:
+            # pinta o menor caminho
+            menor = self.menor_caminho()
+            # só setar o caminho a ser desenhado. Ele vai ser 
+            # pintado do EventFilter do widget
+            self.draw_path = menor
+            # o caminho mudou, refaz somente a camada do trajeto
+            self.viewport.define_caminho(menor)
+            # a lista de path é formada de modo reverso
+            # a entrada é o ultimo da lista, a saida o primeiro
+            origem = str(menor[-1:][0])
+            destino = str(menor[0])
+            info = 'Menor trajeto: Origem:'
+            info += origem + ' ->  Destino: ' + destino
+        else:
+            self.draw_path = False
+            self.viewport.define_caminho(False)
+            info = 'Menor trajeto: sem caminho'
+            self.progresso.mensagem('Não encontrou o caminho')
+        self.form.lb_resultado.setText(info)
+        t2 = datetime.now()
+        self.progresso.mensagem(
+            'Tempo de execução: '+str(t2-self.t1))
 
     def resolve_labirinto(self):
         """ Handler do click no botão executa.
             Inicia o pool e o worker que vai resolver o labirinto
         """
         self.t1 = datetime.now()
+        # threads concluídos e caminhos encontrados nesta execução
+        self.concluidos = 0
+        self.caminhos = []
         pool = self.thread_pool
         pool.setMaxThreadCount(self.total_threads)
         caminhos = list(
@@ -396,7 +529,8 @@ class Janela(QWidget):
                 self.entradas,
                 self.saidas
             ))
-        self.form.log.appendPlainText(
+        self.progresso.inicia(len(caminhos))
+        self.progresso.mensagem(
             'Caminhos possíveis: '+str(len(caminhos)))
 
         for caminho in caminhos:
@@ -406,7 +540,7 @@ class Janela(QWidget):
             worker = Worker(self.resolve_multithread)
             worker.signals.result.connect(self.solucao_result)
             worker.signals.finished.connect(self.solucao_thread_finished)
-            worker.signals.progress.connect(self.solucao_progress)
+            worker.signals.progress.connect(self.progresso.recebe)
             worker.kwargs['caminho'] = caminho
             pool.start(worker)
 
@@ -415,7 +549,8 @@ class Janela(QWidget):
         para encontrar os caminhos na imagem.
 
         Args:
-            progress_callback (Signal): Sinal para informar progresso.
+            progress_callback (Signal): Sinal para informar progresso,
+                emite um dict(ver CanalProgresso).
             caminho (tuple): tupla de tuplas com ((origem),(destino))
 
         Returns:
@@ -425,111 +560,59 @@ class Janela(QWidget):
 
         matriz = self.matriz_labirinto
         shape = self.formato_matriz()
+        busca = motores_matriz.obtem(self.motor)
+        medida = motores_matriz.medida(self.motor, matriz)
         path = False
         if caminho:
             origem = caminho[0]
             destino = caminho[1]
-            path = labirinto_matriz.encontra_menor_caminho(
-                matriz, origem, destino, shape
-            )
-            if path:
-                progress_callback.emit(
-                    trata_caminho(caminho)+' Distância: '+str(len(path)))
-            else:
-                progress_callback.emit(
-                    'Caminho não encontrado '+trata_caminho(caminho))
+            estatisticas = estatisticas_matriz.Estatisticas()
+            erro = None
+            try:
+                path = busca(
+                    matriz, origem, destino, shape, estatisticas=estatisticas
+                )
+            except Exception as e:
+                erro = e
+                raise
+            finally:
+                # o progresso sai mesmo com erro no motor, senão o
+                # CanalProgresso espera este caminho para sempre
+                progress_callback.emit({
+                    'caminho': caminho,
+                    'distancia': len(path) if path else None,
+                    'medida': medida(path) if path else None,
+                    'nodos_expandidos': estatisticas.get(
+                        'nodos_expandidos', 0),
+                    'estatisticas': estatisticas,
+                    'erro': erro,
+                })
 
         return path
 
-    def desenha_matriz(self, device: QPaintDevice):
+    def desenha_matriz(self, device: QPaintDevice, regiao=None):
         """Desenha a matriz no widget
 
+        Somente os tiles visíveis dentro da região exposta são 
+        desenhados, a partir do cache do viewport.
+
         Args:
             device (QPaintDevice): objeto que será pintado
+            regiao (QRect): região exposta, None para o widget todo
 
         """
-
+        if regiao is None:
+            regiao = device.rect()
         painter = QPainter(device)
-
-        # cores
-        cor_piso = QColor(0, 255, 255)
-        cor_outro = QColor(100, 20, 254)
-        cor_parede = QColor(0, 0, 0)
-        cor_path = QColor(139, 236, 80)
-
-        shape = self.formato_matriz()
-
-        linhas = shape[0]
-        colunas = shape[1]
-
-        matriz = self.matriz_labirinto
-        # tamanho do container onde a imagem vai ser pintada
-        width = device.width()
-        # 20 de margem
-        tamanho_nodo = (width - 20) // colunas
-
-        # brushs
-        brush_piso = QBrush()
-        brush_piso.setColor(cor_piso)
-        brush_piso.setStyle(Qt.SolidPattern)
-        pen = QPen()
-
-        brush_parede = QBrush()
-        brush_parede.setColor(cor_parede)
-        brush_parede.setStyle(Qt.SolidPattern)
-
-        brush_path = QBrush()
-        brush_path.setColor(cor_path)
-        brush_path.setStyle(Qt.SolidPattern)
-
-        brush_outro = QBrush()
-        brush_outro.setColor(cor_outro)
-        brush_outro.setStyle(Qt.SolidPattern)
-
-
-        for l in range(linhas):
-            for c in range(colunas):
-                valor = matriz[l][c]
-                if valor == -1:
-                    valor = 0
-                if int(valor) == 1:
-                    brush = brush_parede
-                elif int(valor) == 0:
-                    brush = brush_piso
-                else:
-                    brush = brush_outro
-
-                # se tiver caminho a ser pintado
-                if self.draw_path:
-                    # o draw_path é uma lista de tuplas
-                    # contendo os nodos que fazem parte do trajeto.
-                    t = (c, l)
-                    if t in self.draw_path:
-                        # se a coordenada esta no trajeto
-                        # usa a o brush com a cor do trajeto.
-                        brush = brush_path
-
-                # calcula o tamanho do nodos a serem pintados
-                left = l * tamanho_nodo
-                top = c * tamanho_nodo
-                width = tamanho_nodo
-                height = tamanho_nodo
-                # figura geometrica a ser pintada
-                rect = QRect(top, left, width, height)
-
-                # seta pen e brush no painter
-                pen.setWidth(0)
-                painter.setBrush(brush)
-                painter.setPen(pen)
-
-                # pinta o quadrado
-                painter.fillRect(rect, brush)
-                painter.drawRect(rect)
+        self.viewport.desenha(painter, regiao)
+        painter.end()
 
     def eventFilter(self, watched: QObject, event: QEvent) -> bool:
         """ Event Filter do widget
             Filtro de evento para manter pintado no widget a imagem
-            e o caminho traçado.
+            e o caminho traçado. Os eventos de mouse vão para o 
+            viewport(roda do mouse faz zoom, arrastar faz pan e duplo
+            clique volta a ajustar a matriz na largura).
         Args:
             watched (QObject): objeto Qt que gerou o evento
             event (QEvent): Evento emitido
@@ -540,7 +623,10 @@ class Janela(QWidget):
         if (watched == self.form.widgetImagem
                 and event.type() == QEvent.Paint):
             if self.matriz_labirinto:
-                self.desenha_matriz(watched)
+                self.desenha_matriz(watched, event.rect())
+        elif watched == self.form.widgetImagem:
+            if self.viewport.trata_evento(event):
+                return True
         return super().eventFilter(watched, event)
 
 
@@ -0,0 +1,292 @@
+"""Jump Point Search para grades 4-conectadas de custo uniforme.
+
+    Em salas abertas a busca nodo a nodo empilha muitos trajetos
+    simétricos(mesmo tamanho, ordem diferente de passos). O JPS fixa
+    uma ordem canônica e só coloca no heap os pontos de salto, onde o
+    trajeto canônico pode mudar de direção; as sequências de nodos
+    equivalentes entre eles são percorridas por varreduras em linha
+    reta, sem heap.
+
+    Ordem canônica: passos verticais antes dos horizontais. Um trecho
+    horizontal seguido de um vertical só é canônico se a troca dos dois
+    passos for impossível, isto é, se o nodo atrás na direção vertical
+    for parede. Daí as regras:
+        horizontal  segue em frente e só vira na vertical em um vizinho
+                    forçado: (x, y±1) livre e (x-dx, y±1) parede
+        vertical    segue em frente e pode virar na horizontal em
+                    qualquer nodo, então a cada passo faz as duas
+                    varreduras horizontais; se alguma encontra um ponto
+                    de salto, o nodo atual também é um
+    O destino é sempre ponto de salto.
+
+    A busca é um A* com a distância de Manhattan sobre os pontos de
+    salto, com estado (nodo, direção de chegada). Como nos motores
+    vetorial e de terreno, parede(1) é intransponível e os outros
+    valores custam 1. O trajeto é expandido de volta nodo a nodo no
+    formato do encontra_menor_caminho: lista reversa de (x, y), do
+    destino(repetido) até a origem.
+"""
+
+import heapq
+
+from estatisticas_matriz import cronometro
+
+# direção de chegada na origem: todas as saídas são naturais
+INICIO = (0, 0)
+
+# bytes de uma linha int8 para livre(1) ou parede(0)
+LIVRE = bytes(0 if valor == 1 else 1 for valor in range(256))
+
+
+def grade_livre(img, shape):
+    """Grade plana com borda de parede, 1 nos nodos livres
+
+    Args:
+        img (list|nparray): matriz com os valores
+        shape (tuple): (linhas, colunas)
+
+    Returns:
+        bytearray: (linhas+2) x (colunas+2), a borda evita testar limites
+    """
+    linhas, colunas = shape
+    largura = colunas + 2
+    livre = bytearray(largura * (linhas + 2))
+    for y in range(linhas):
+        inicio = (y + 1) * largura + 1
+        linha = img[y]
+        if isinstance(linha, memoryview) and linha.itemsize == 1:
+            # linha do modelo_matriz.Labirinto, convertida em C
+            livre[inicio:inicio + colunas] = linha.tobytes().translate(LIVRE)
+        else:
+            livre[inicio:inicio + colunas] = bytes(v != 1 for v in linha)
+    return livre
+
+
+class Salto:
+    """Varreduras em linha reta sobre a grade com borda.
+
+    As paradas da varredura horizontal(parede ou vizinho forçado) são
+    pré-calculadas para as duas direções em bytes com 1 nas paradas;
+    a varredura vira um bytes.find/rfind, em C. As linhas são tratadas
+    como inteiros de um byte por nodo, então as operações de bit valem
+    nodo a nodo e o deslocamento de 8 bits é o vizinho ao lado.
+    """
+
+    def __init__(self, livre, largura, destino) -> None:
+        self.livre = livre
+        self.largura = largura
+        self.destino = destino
+        # nodos percorridos pelas varreduras
+        self.varridos = 0
+        self.parada_direita, self.parada_esquerda = self.paradas()
+
+    def paradas(self):
+        """Paradas das varreduras para a direita e para a esquerda
+
+        Returns:
+            tuple: (bytes, bytes) do tamanho da grade
+        """
+        livre = self.livre
+        largura = self.largura
+        uns = int.from_bytes(b'\x01' * largura, 'little')
+        direita = bytearray(len(livre))
+        esquerda = bytearray(len(livre))
+        # as linhas da borda ficam paradas(paredes)
+        direita[:largura] = esquerda[:largura] = b'\x01' * largura
+        direita[-largura:] = esquerda[-largura:] = b'\x01' * largura
+        linha = lambda y: int.from_bytes(
+            livre[y * largura:(y + 1) * largura], 'little')
+        acima, atual = linha(0), linha(1)
+        for y in range(1, len(livre) // largura - 1):
+            abaixo = linha(y + 1)
+            paredes = uns ^ atual
+            # livre ao lado e parede atrás dele(vizinho forçado)
+            forcado_d = ((acima & (uns ^ ((acima << 8) & uns)))
+                         | (abaixo & (uns ^ ((abaixo << 8) & uns))))
+            forcado_e = ((acima & (uns ^ (acima >> 8)))
+                         | (abaixo & (uns ^ (abaixo >> 8))))
+            inicio = y * largura
+            direita[inicio:inicio + largura] = (
+                paredes | forcado_d).to_bytes(largura, 'little')
+            esquerda[inicio:inicio + largura] = (
+                paredes | forcado_e).to_bytes(largura, 'little')
+            acima, atual = atual, abaixo
+        return bytes(direita), bytes(esquerda)
+
+    def horizontal(self, u, dx):
+        """Varre a linha a partir de u na direção dx(+1/-1)
+
+        Returns:
+            int|None: índice do ponto de salto ou None se bater em
+            parede
+        """
+        destino = self.destino
+        if dx > 0:
+            v = self.parada_direita.find(1, u + 1)
+            if u < destino <= v:
+                v = destino
+        else:
+            v = self.parada_esquerda.rfind(1, 0, u)
+            if v <= destino < u:
+                v = destino
+        self.varridos += abs(v - u)
+        if not self.livre[v]:
+            return None
+        return v
+
+    def vertical(self, u, dy):
+        """Varre a coluna a partir de u na direção dy(+largura/-largura),
+        varrendo as linhas de cada nodo.
+
+        Returns:
+            int|None: índice do ponto de salto ou None
+        """
+        livre = self.livre
+        destino = self.destino
+        horizontal = self.horizontal
+        while True:
+            u += dy
+            self.varridos += 1
+            if not livre[u]:
+                return None
+            if u == destino:
+                return u
+            if (horizontal(u, 1) is not None
+                    or horizontal(u, -1) is not None):
+                return u
+
+    def direcoes(self, u, chegada):
+        """Direções a seguir a partir do ponto de salto u
+
+        Args:
+            u (int): índice do nodo
+            chegada (tuple): (dx, dy) da chegada, INICIO na origem
+
+        Returns:
+            list: tuplas (passo plano, vertical)
+        """
+        largura = self.largura
+        dx, dy = chegada
+        if chegada == INICIO:
+            return [(1, False), (-1, False),
+                    (largura, True), (-largura, True)]
+        if dy:
+            passo = dy * largura
+            return [(passo, True), (1, False), (-1, False)]
+        livre = self.livre
+        direcoes = [(dx, False)]
+        for passo in (largura, -largura):
+            if livre[u + passo] and not livre[u - dx + passo]:
+                direcoes.append((passo, True))
+        return direcoes
+
+
+def expande(pontos, largura):
+    """Expande os pontos de salto(do destino à origem) em todos os
+    nodos do trajeto, em (x, y) sem a borda
+
+    Args:
+        pontos (list): índices planos dos pontos de salto
+        largura (int): colunas da grade com borda
+
+    Returns:
+        list: trajeto reverso de (x, y), destino repetido no início
+    """
+    y, x = divmod(pontos[0], largura)
+    path = [(x - 1, y - 1)]
+    for a, b in zip(pontos, pontos[1:]):
+        distancia = abs(b - a)
+        passo = (largura if distancia >= largura else 1) * (
+            1 if b > a else -1)
+        for u in range(a, b, passo):
+            y, x = divmod(u, largura)
+            path.append((x - 1, y - 1))
+    y, x = divmod(pontos[-1], largura)
+    path.append((x - 1, y - 1))
+    return path
+
+
+def encontra_menor_caminho(img, src, dst, shape, estatisticas=None):
+    """Encontra o menor caminho entre a origem e o destino com Jump
+    Point Search. Mesma assinatura e retorno do encontra_menor_caminho
+    do labirinto_matriz.
+
+    Args:
+        img (list|nparray): matriz com os valores
+        src (tuple): Origem (y, x)
+        dst (tuple): Destino (y, x)
+        shape (tuple): (linhas, colunas)
+        estatisticas (dict): opcional, recebe os contadores e as fases
+            (ver estatisticas_matriz)
+
+    Returns:
+        [list|False]: trajeto reverso de (x, y) ou False
+    """
+    with cronometro(estatisticas, 'montagem'):
+        livre = grade_livre(img, shape)
+    largura = shape[1] + 2
+    origem = (src[0] + 1) * largura + src[1] + 1
+    destino = (dst[0] + 1) * largura + dst[1] + 1
+    dy_destino, dx_destino = divmod(destino, largura)
+    salto = Salto(livre, largura, destino)
+
+    def heuristica(u):
+        y, x = divmod(u, largura)
+        return abs(x - dx_destino) + abs(y - dy_destino)
+
+    inicio = (origem, INICIO)
+    g = {inicio: 0}
+    parente = {inicio: None}
+    fila = [(heuristica(origem), 0, inicio)]
+    fechados = set()
+    final = None
+    retiradas = expandidos = relaxamentos = 0
+    with cronometro(estatisticas, 'busca'):
+        if livre[origem] and livre[destino]:
+            while fila:
+                _, custo, estado = heapq.heappop(fila)
+                retiradas += 1
+                if estado in fechados:
+                    continue
+                fechados.add(estado)
+                u, chegada = estado
+                if u == destino:
+                    final = estado
+                    break
+                expandidos += 1
+                for passo, vertical in salto.direcoes(u, chegada):
+                    if vertical:
+                        v = salto.vertical(u, passo)
+                        direcao = (0, 1 if passo > 0 else -1)
+                    else:
+                        v = salto.horizontal(u, passo)
+                        direcao = (passo, 0)
+                    if v is None:
+                        continue
+                    distancia = abs(v - u)
+                    if vertical:
+                        distancia //= largura
+                    novo = (v, direcao)
+                    g_novo = custo + distancia
+                    if novo not in g or g_novo < g[novo]:
+                        g[novo] = g_novo
+                        parente[novo] = estado
+                        relaxamentos += 1
+                        heapq.heappush(
+                            fila, (g_novo + heuristica(v), g_novo, novo))
+
+    if estatisticas is not None:
+        estatisticas['nodos_expandidos'] = expandidos
+        estatisticas['retiradas'] = retiradas
+        estatisticas['relaxamentos'] = relaxamentos
+        estatisticas['celulas_varridas'] = salto.varridos
+    if final is None:
+        return False
+
+    with cronometro(estatisticas, 'reconstrucao'):
+        pontos = []
+        estado = final
+        while estado is not None:
+            pontos.append(estado[0])
+            estado = parente[estado]
+        return expande(pontos, largura)
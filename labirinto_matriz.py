@@ -1,4 +1,11 @@
-import numpy as np
+import time
+
+from estatisticas_matriz import cronometro, notifica
+
+
+class BuscaInterrompida(Exception):
+    """A busca foi interrompida pelo evento informado(cancelamento)
+    """
 
 
 class Vertice:
@@ -17,7 +24,7 @@ def nodos_vizinhos(matriz,linha,coluna):
     """ Retorna lista com os nodos vizinhos existentes
 
     Args:
-        matriz (nparray): matriz numpy 
+        matriz (list): matriz de Vertice, lista de listas
         linha (int): indice linha
         coluna (int): indice coluna
 
@@ -25,7 +32,7 @@ def nodos_vizinhos(matriz,linha,coluna):
         [list]: Lista com vizinhos acima, abaixo, direita e esquerda
     """
     
-    shape=matriz.shape
+    shape=(len(matriz), len(matriz[0]))
     vizinhos=[]
     # Em todos, garantir que estão dentro do limite da matriz e ainda não
     # foram processados
@@ -43,13 +50,14 @@ def nodos_vizinhos(matriz,linha,coluna):
         
     return vizinhos
 
-def r_indexa_acima(pilha, index):
+def r_indexa_acima(pilha, index, estatisticas=None):
     """Heapsort parte superior da pilha
 
 
     Args:
         pilha (list): Pilha de prioridades
         index (int): índice do nodo de interesse
+        estatisticas (dict): opcional, conta 'trocas_heap'
 
     Returns:
         [list]: Pilha de prioridades com novos índices
@@ -68,10 +76,12 @@ def r_indexa_acima(pilha, index):
             pilha[index], pilha[p_index]=pilha[p_index], pilha[index]
             pilha[index].indice_na_pilha=index
             pilha[p_index].indice_na_pilha=p_index
-            _ = r_indexa_acima(pilha, p_index)
+            if estatisticas is not None:
+                estatisticas['trocas_heap'] += 1
+            _ = r_indexa_acima(pilha, p_index, estatisticas)
     return pilha
     
-def r_indexa_abaixo(pilha, index):
+def r_indexa_abaixo(pilha, index, estatisticas=None):
     """Heapsort
         Ordena recursivamente os items na parte inferior da pilha
         a partir do índice do nodo de interesse(pilha[index]).
@@ -79,6 +89,7 @@ def r_indexa_abaixo(pilha, index):
     Args:
         pilha (list): Pilha de prioridades
         index (int): índice do nodo de interesse
+        estatisticas (dict): opcional, conta 'trocas_heap'
 
     Returns:
         [list]: Pilha de prioridades com novos índices
@@ -94,7 +105,9 @@ def r_indexa_abaixo(pilha, index):
             pilha[index], pilha[indice_e]=pilha[indice_e], pilha[index]
             pilha[index].indice_na_pilha=index
             pilha[indice_e].indice_na_pilha=indice_e
-            pilha = r_indexa_abaixo(pilha, indice_e)
+            if estatisticas is not None:
+                estatisticas['trocas_heap'] += 1
+            pilha = r_indexa_abaixo(pilha, indice_e, estatisticas)
     else:
         small = indice_e
         if pilha[indice_e].d > pilha[indice_d].d:
@@ -103,7 +116,9 @@ def r_indexa_abaixo(pilha, index):
             pilha[index],pilha[small]=pilha[small],pilha[index]
             pilha[index].indice_na_pilha=index
             pilha[small].indice_na_pilha=small
-            pilha = r_indexa_abaixo(pilha, small)
+            if estatisticas is not None:
+                estatisticas['trocas_heap'] += 1
+            pilha = r_indexa_abaixo(pilha, small, estatisticas)
     return pilha
 
 def calcula_distancia(matriz,u,v):
@@ -142,7 +157,8 @@ def calcula_distancia(matriz,u,v):
 
     return d
 
-def encontra_menor_caminho(img,src,dst,shape):
+def encontra_menor_caminho(img,src,dst,shape,estatisticas=None,
+        interrompe=None):
     """Encontra o menor caminho entre a origem e o destino
         * Estabelece pilha de prioridades
         * Define os pontos de origem e saida como x,y na matriz
@@ -155,6 +171,10 @@ def encontra_menor_caminho(img,src,dst,shape):
         img (list): Matriz com os valores, lista de lista
         src (tuple): Origem
         dst (tuple): Destino
+        estatisticas (dict): opcional, recebe os contadores e as fases
+            (ver estatisticas_matriz)
+        interrompe (threading.Event): opcional, quando setado a busca
+            para com BuscaInterrompida
 
     Returns:
         [list|False]: Lista com os nodos(y,x) do trajeto. Ou False
@@ -173,16 +193,26 @@ def encontra_menor_caminho(img,src,dst,shape):
     
     
     linhas,colunas=shape
+    if estatisticas is not None:
+        estatisticas['trocas_heap'] = 0
+    # cronometra heap e distância dentro da busca
+    detalhado = getattr(estatisticas, 'detalhado', False)
+    relogio = time.perf_counter
+    tempo_heap = tempo_distancia = 0.0
+    t = 0.0
     # seta valores na matriz com os vertices referentes aos nodos
     
-    matriz = np.full((linhas, colunas), None)    
-    for r in range(linhas):
-        for c in range(colunas):
-            # seta novo vertice na matriz e adiciona sua posição na pilha
-            # de prioridades
-            matriz[r][c]=Vertice(c,r)
-            matriz[r][c].indice_na_pilha=len(prioridades)
-            prioridades.append(matriz[r][c])
+    with cronometro(estatisticas, 'montagem'):
+        # lista de listas: evita importar o numpy só para alocar a
+        # matriz de objetos
+        matriz = [[None] * colunas for _ in range(linhas)]
+        for r in range(linhas):
+            for c in range(colunas):
+                # seta novo vertice na matriz e adiciona sua posição na
+                # pilha de prioridades
+                matriz[r][c]=Vertice(c,r)
+                matriz[r][c].indice_na_pilha=len(prioridades)
+                prioridades.append(matriz[r][c])
     
     # seta a distância da origem para zero no nodo de origem
     # Sobre: ao iniciar o vértice aqui o nodo(matriz[src.x][src.y])
@@ -194,10 +224,21 @@ def encontra_menor_caminho(img,src,dst,shape):
     # r_indexa_acima com nodo de interesse = posição de partida
     # isso vai trazer o nodo de origem para o inicio da pilha 
     prioridades=r_indexa_acima(prioridades, 
-        matriz[origem_y][origem_x].indice_na_pilha)    
+        matriz[origem_y][origem_x].indice_na_pilha, estatisticas)    
     counter = 0
+    relaxamentos = 0
+    calculos = 0
+    t_busca = relogio()
     while len(prioridades) > 0:
         counter += 1
+        # verifica o cancelamento e avisa o progresso a cada 1024 nodos
+        if not counter & 1023:
+            if interrompe is not None and interrompe.is_set():
+                raise BuscaInterrompida()
+            if estatisticas is not None:
+                estatisticas['retiradas'] = counter
+                estatisticas['nodos_expandidos'] = counter
+                notifica(estatisticas, 'progresso')
         # processa os nodos da pilha
         # o nodo de interesse é sempre o primeiro da fila
         u=prioridades[0]
@@ -212,12 +253,21 @@ def encontra_menor_caminho(img,src,dst,shape):
         # (ele acabou de ser copiado para o inicio)
         prioridades.pop()
         # r_indexa_abaixo com nodo de interesse
-        prioridades=r_indexa_abaixo(prioridades,0)
+        if detalhado:
+            t = relogio()
+        prioridades=r_indexa_abaixo(prioridades,0,estatisticas)
+        if detalhado:
+            tempo_heap += relogio() - t
         # vizinhos do nodo de interesse na matriz
         vizinhos = nodos_vizinhos(matriz,u.y,u.x)        
         for v in vizinhos:
             # a distância entre os nodos
+            if detalhado:
+                t = relogio()
             dist=calcula_distancia(img,(u.y,u.x),(v.y,v.x))            
+            if detalhado:
+                tempo_distancia += relogio() - t
+            calculos += 1
             if (u.d + dist < v.d):
                 # os vértices são iniciados com d = infinito
                 # a distância correta do vizinho é 
@@ -227,30 +277,50 @@ def encontra_menor_caminho(img,src,dst,shape):
                 # nodo parente para reconstruir o caminho
                 v.parente_x=u.x
                 v.parente_y=u.y                                
+                relaxamentos += 1
                 # indice atual do vizinho
                 idx=v.indice_na_pilha
+                if detalhado:
+                    t = relogio()
                 # re-orderna abaixo o vizinho na pilha
-                prioridades=r_indexa_abaixo(prioridades,idx)
+                prioridades=r_indexa_abaixo(prioridades,idx,estatisticas)
                 # re-orderna acima o vizinho na pilha
-                prioridades=r_indexa_acima(prioridades,idx)
+                prioridades=r_indexa_acima(prioridades,idx,estatisticas)
+                if detalhado:
+                    tempo_heap += relogio() - t
     
-    # lista com pontos a serem pintados                      
-    path=[]
-    # iterador vertical na matriz
-    iter_v=matriz[saida_y][saida_x]  
-    # o path é montado de modo reverso, então o primeiro ponto
-    # é o ponto de saída do labirinto
-    path.append((saida_x,saida_y))    
-    while(iter_v.y!=origem_y or iter_v.x!=origem_x):
-        # enquanto a coordenada do iterador vertical for diferente
-        # da posição de inicio, adiciona a coordenada a ser pintada
-        # e seta o próximo nodo do iterador vertical como o parent
-        # do nodo atual.
-        path.append((iter_v.x,iter_v.y))
-        iter_v=matriz[iter_v.parente_y][iter_v.parente_x]
-        if isinstance(iter_v,np.ndarray):
-            # nao foi possivel encontrar o caminho            
-            return False
+    if estatisticas is not None:
+        estatisticas['nodos_expandidos'] = counter
+        estatisticas['retiradas'] = counter
+        estatisticas['relaxamentos'] = relaxamentos
+        estatisticas['calculos_distancia'] = calculos
+        fases = estatisticas.setdefault('fases', {})
+        fases['busca'] = fases.get('busca', 0.0) + relogio() - t_busca
+        if detalhado:
+            # partes da busca
+            fases['heap'] = fases.get('heap', 0.0) + tempo_heap
+            fases['distancia'] = (
+                fases.get('distancia', 0.0) + tempo_distancia)
+        notifica(estatisticas, 'busca')
+
+    with cronometro(estatisticas, 'reconstrucao'):
+        # lista com pontos a serem pintados                      
+        path=[]
+        # iterador vertical na matriz
+        iter_v=matriz[saida_y][saida_x]  
+        # o path é montado de modo reverso, então o primeiro ponto
+        # é o ponto de saída do labirinto
+        path.append((saida_x,saida_y))    
+        while(iter_v.y!=origem_y or iter_v.x!=origem_x):
+            # enquanto a coordenada do iterador vertical for diferente
+            # da posição de inicio, adiciona a coordenada a ser pintada
+            # e seta o próximo nodo do iterador vertical como o parent
+            # do nodo atual.
+            path.append((iter_v.x,iter_v.y))
+            if iter_v.parente_y is None:
+                # nao foi possivel encontrar o caminho            
+                return False
+            iter_v=matriz[iter_v.parente_y][iter_v.parente_x]
 
     # o último ponto a ser pintado é o ponto de origem.
     path.append((origem_x,origem_y))
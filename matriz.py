@@ -1,9 +1,28 @@
+import time
+# mede a importação dos módulos abaixo(ver TEMPO_IMPORTACAO)
+_t_importacao = time.perf_counter()
+import argparse
+import csv
+import glob
 import itertools
-from datetime import datetime
-import labirinto_matriz
+import json
+from datetime import timedelta
+from functools import partial
+import estatisticas_matriz
+import modelo_matriz
+import motores_matriz
+import planejador_matriz
 import sys
 
 import os
+# numpy, caminho_matriz, imagem_matriz e os motores vetorizados são
+# importados só quando usados: em labirintos pequenos a importação
+# do numpy custa mais que a busca
+TEMPO_IMPORTACAO = time.perf_counter() - _t_importacao
+
+# trajetos com mais pontos que isso são guardados compactados
+# (caminho_matriz, usa numpy); os menores ficam na lista do motor
+COMPACTA_A_PARTIR = 4096
 # define o caminho BASE DIR
 BASE_DIR = os.path.normpath(repr(os.getcwd()).replace('\'','')) 
 sys.path.insert(0,BASE_DIR)
@@ -33,14 +52,28 @@ def trata_caminho(c):
     return info
 
 class Aplicativo:
-    def __init__(self, arquivo) -> None:
+    def __init__(self, arquivo, verboso=True,
+                 motor=motores_matriz.PADRAO, estatisticas=False) -> None:
         self.arquivo_matriz = arquivo
-        # matriz do labirinto
-        self.matriz_labirinto = []
+        # tempos de cada fase em segundos(perf_counter)
+        self.tempos = {}
+        # função de busca usada para cada par entrada/saída, o módulo
+        # do motor é importado aqui
+        self.motor = motor
+        t1 = time.perf_counter()
+        self.busca = motores_matriz.obtem(motor)
+        self.tempos['importacao'] = time.perf_counter() - t1
+        # mostra as informações no terminal
+        self.verboso = verboso
+        # matriz do labirinto(modelo_matriz.Labirinto)
+        self.matriz_labirinto = None
         # caminhos encontrados
         self.caminhos = []
-        # variavel para medir tempo de execução
-        self.t1 = None
+        # instrumentação dos motores: soma de todos os pares e
+        # uma Estatisticas por par, None quando desligada
+        self.estatisticas = (
+            estatisticas_matriz.Estatisticas() if estatisticas else None)
+        self.estatisticas_pares = []
         
         # entradas encontradas
         self.entradas = []
@@ -49,22 +82,24 @@ class Aplicativo:
         # carrega matriz
         self.carrega_matriz()
     
+    def info(self, *texto):
+        """Mostra uma informação no terminal se verboso
+        """
+        if self.verboso:
+            print(*texto)
+
     def formato_matriz(self):
         """Retorna o formato da matriz
 
         Returns:
             tuple: (linhas,colunas)
         """
-        colunas = 0
-        linhas = len(self.matriz_labirinto)
-        if linhas > 0:
-            linha0 = self.matriz_labirinto[0]
-            colunas = len(linha0)
-
-        return (linhas, colunas)
+        if self.matriz_labirinto is None:
+            return (0, 0)
+        return self.matriz_labirinto.shape
     
     def carrega_matriz(self):
-        """Carrega a matriz
+        """Carrega a matriz(ver modelo_matriz.Labirinto)
         
         Aqui espera-se uma matriz como a seguir:
             \n separando linhas
@@ -73,90 +108,68 @@ class Aplicativo:
             -1 saidas se a esquerda
              1 paredes
              0 piso
+        ou um arquivo .npy.
         """
         self.draw_path = False
-        self.matriz_labirinto = []
+        self.matriz_labirinto = None
         self.caminhos = []
         
         # arquivo matriz inicia como False
         if self.arquivo_matriz:
+            t1 = time.perf_counter()
             # ja foi informado o arquivo.
-            with open(self.arquivo_matriz, 'r') as arquivo:
-                matriz_lida = arquivo.read()
-            matriz = []
-
-            linhas = matriz_lida.split('\n')
-
-            for l in range(len(linhas)):
-                linha = list(map(int, linhas[l].split('\t')))
-                matriz.append(linha)
-
-            self.matriz_labirinto = matriz
+            self.matriz_labirinto = modelo_matriz.Labirinto.carrega(
+                self.arquivo_matriz)
+            t2 = time.perf_counter()
             self.entradas = self.identifica_entradas()
             self.saidas = self.identifica_saidas()
+            self.tempos['carga'] = t2 - t1
+            self.tempos['varredura'] = time.perf_counter() - t2
     
     def identifica_entradas(self,):
-        """Identifica as entradas no labirinto
+        """Entradas encontradas na carga do labirinto
 
         Returns:
             list: Uma lista de Tuplas ou vazia
         """
-        entradas = []
-
-        linhas, colunas = self.formato_matriz()
-        for i in range(linhas):
-            linha = self.matriz_labirinto[i]
-            valor = linha[colunas-1]
-
-            if valor == -1:
-                entradas.append((i, len(linha)-1))
+        entradas = self.matriz_labirinto.entradas
         total = len(entradas)
         if total > 0:
             info = str(total) + ' entradas encontradas.'
         else:
             info = 'Nenhuma entrada encontrada.'
-        print(info)
+        self.info(info)
         return entradas
     
     def identifica_saidas(self):
-        """Identifica as saídas do labirinto
+        """Saídas encontradas na carga do labirinto
 
         Returns:
             list: Uma lista de Tuplas ou vazia
         """
-        saidas = []
-        linhas, colunas = self.formato_matriz()
-        for i in range(linhas):
-            linha = self.matriz_labirinto[i]
-            valor = linha[0]
-            if valor == -1:
-                saidas.append((i, 0))
+        saidas = self.matriz_labirinto.saidas
         total = len(saidas)
         if total > 0:
             info = str(total) + ' saidas encontradas.'
         else:
             info = 'Nenhuma saída encontrada.'
-        print(info)
+        self.info(info)
         return saidas
 
     def menor_caminho(self):
         """ Os paths foram analisados pelos threads e se encontram
         na lista self.caminhos. 
-        O menor caminho é o caminho que tem o menor numero de nodos.        
+        O menor caminho é o caminho que tem o menor numero de nodos,
+        ou o menor custo nos motores de terreno ponderado.
 
         Returns:
             list: Lista de pontos a serem desenhados.
         """
-        menor = float("inf")
-        menor_caminho = False
-        for caminho in self.caminhos:
-            if len(caminho) < menor:
-                menor = len(caminho)
-                menor_caminho = caminho
-        return menor_caminho
+        return self.matriz_labirinto.menor_caminho(
+            self.caminhos, self.motor)
 
     def resolve_labirinto(self):
-        self.t1 = datetime.now()
+        t1 = time.perf_counter()
         
         matriz = self.matriz_labirinto
         shape = self.formato_matriz()
@@ -165,24 +178,43 @@ class Aplicativo:
                 self.entradas,
                 self.saidas
             ))
-        print('Resolvendo labirinto')
+        self.info('Resolvendo labirinto')
         for caminho in caminhos:
             path = False
             if caminho:
                 origem = caminho[0]
                 destino = caminho[1]
-                path = labirinto_matriz.encontra_menor_caminho(
-                    matriz, origem, destino, shape
+                estatisticas = None
+                if self.estatisticas is not None:
+                    estatisticas = estatisticas_matriz.Estatisticas(
+                        detalhado=True)
+                path = self.busca(
+                    matriz, origem, destino, shape,
+                    estatisticas=estatisticas
                 )
+                if estatisticas is not None:
+                    self.estatisticas.soma(estatisticas)
+                    self.estatisticas_pares.append((caminho, estatisticas))
+                    self.info('  ' + estatisticas.resumo())
                 if path:
-                    print(
+                    self.info(
                     trata_caminho(caminho)+' Distância: '+str(len(path)))
+                    if len(path) > COMPACTA_A_PARTIR:
+                        # guarda o trajeto compactado(2 bits por passo)
+                        import caminho_matriz
+                        path = caminho_matriz.CaminhoCompacto.de_lista(
+                            path)
                     self.caminhos.append(path)
                 else:
-                    print(
+                    self.info(
                         'Caminho não encontrado '+trata_caminho(caminho))
-        print('CAMINHOS',len(caminhos))
+        self.info('CAMINHOS',len(caminhos))
         menor = self.menor_caminho()
+        self.draw_path = menor
+        self.tempos['busca'] = time.perf_counter() - t1
+        if not menor:
+            self.info('Nenhum caminho encontrado.')
+            return
         
         # a lista de path é formada de modo reverso
         # a entrada é o ultimo da lista, a saida o primeiro
@@ -190,19 +222,335 @@ class Aplicativo:
         destino = str(menor[0])
         info = 'Menor trajeto: Origem:'
         info += origem + ' ->  Destino: ' + destino
-        print(info)                
-        t2 = datetime.now()
-        print(
-            'Tempo de execução: '+str(t2-self.t1))
+        self.info(info)                
+        self.info(
+            'Tempo de execução: '
+            + str(timedelta(seconds=self.tempos['busca'])))
+        self.info(
+            'Tempo de importação: '
+            + str(timedelta(seconds=TEMPO_IMPORTACAO
+                            + self.tempos['importacao'])))
+        if self.estatisticas is not None:
+            self.info('Estatísticas: ' + self.estatisticas.resumo())
+
+    def registro(self):
+        """Resultado da solução em formato de dicionário, para saída
+        em JSON/CSV. Os pontos são dados como [x, y].
+
+        Returns:
+            dict: formato, aberturas, melhor par, distância, caminho,
+            tempos de cada fase e, se coletadas, as estatísticas dos
+            motores somadas
+        """
+        linhas, colunas = self.formato_matriz()
+        menor = self.draw_path
+        registro = {
+            'arquivo': self.arquivo_matriz,
+            'motor': self.motor,
+            'linhas': linhas,
+            'colunas': colunas,
+            'entradas': [[x, y] for y, x in self.entradas],
+            'saidas': [[x, y] for y, x in self.saidas],
+            'origem': None,
+            'destino': None,
+            'distancia': None,
+            'caminho': None,
+            'tempos': dict(self.tempos),
+        }
+        if self.estatisticas is not None:
+            registro['estatisticas'] = dict(self.estatisticas)
+        if menor:
+            # a lista de path é formada de modo reverso
+            registro['origem'] = list(menor[-1])
+            registro['destino'] = list(menor[0])
+            registro['distancia'] = len(menor)
+            registro['caminho'] = [list(p) for p in menor]
+            if self.motor in motores_matriz.PONDERADOS:
+                registro['custo'] = motores_matriz.medida(
+                    self.motor, self.matriz_labirinto)(menor)
+        return registro
 
 
+    def exporta_png(self, arquivo, escala=1):
+        """Grava a matriz e o menor caminho(se já resolvido) em PNG
+
+        Args:
+            arquivo (str): caminho do PNG
+            escala (int): pixels por nodo
+        """
+        import imagem_matriz
+        rgb = imagem_matriz.renderiza(
+            self.matriz_labirinto, self.draw_path, escala)
+        imagem_matriz.salva_png(arquivo, rgb)
+        self.info('Imagem gravada em:', arquivo)
+
+    def exporta_distancias(self, arquivo, k=0, pares=None):
+        """Grava a matriz de distâncias entradas x saídas e, com k > 0,
+        os k menores trajetos dos pares escolhidos(.npz ou CSV).
+
+        Args:
+            arquivo (str): arquivo .npz ou .csv
+            k (int): total de trajetos por par
+            pares (list): pares ((y,x),(y,x)), None para o menor par
+        """
+        import rotas_matriz
+        ponderado = self.motor in motores_matriz.PONDERADOS
+        distancias = rotas_matriz.matriz_distancias(
+            self.matriz_labirinto, self.entradas, self.saidas, ponderado)
+        rotas = {}
+        if k > 0:
+            if pares is None and self.draw_path:
+                # a lista de path é formada de modo reverso
+                (ox, oy), (dx, dy) = self.draw_path[-1], self.draw_path[0]
+                pares = [((oy, ox), (dy, dx))]
+            for origem, destino in pares or []:
+                rotas[(origem, destino)] = rotas_matriz.k_menores_caminhos(
+                    self.matriz_labirinto, origem, destino, k, ponderado)
+        rotas_matriz.salva(
+            arquivo, distancias, self.entradas, self.saidas, rotas,
+            ponderado)
+        self.info('Distâncias gravadas em:', arquivo)
+
     def print_log(self):
         pass
 
 
+def le_par(texto):
+    """Converte 'x1,y1:x2,y2' no par ((y1,x1),(y2,x2))
+    """
+    origem, destino = texto.split(':')
+    ox, oy = map(int, origem.split(','))
+    dx, dy = map(int, destino.split(','))
+    return ((oy, ox), (dy, dx))
+
+
+def resolve_arquivo(arquivo, motor=motores_matriz.PADRAO,
+                    estatisticas=False, limite_memoria=None):
+    """Resolve um arquivo sem mostrar informações no terminal.
+    Usada pelo modo em lote, inclusive em outros processos.
+
+    Args:
+        arquivo (str): arquivo com a matriz
+        motor (str): nome do motor de busca
+        estatisticas (bool): inclui as estatísticas dos motores
+        limite_memoria (int): bytes, o planejador escolhe o motor,
+            de preferência com a regra de paredes do motor pedido
+
+    Returns:
+        dict: registro do Aplicativo ou {'arquivo', 'erro'}
+    """
+    t1 = time.perf_counter()
+    try:
+        aviso = None
+        if limite_memoria:
+            pedido = motor
+            motor = planejador_matriz.escolhe(planejador_matriz.planeja(
+                planejador_matriz.perfil_arquivo(arquivo), limite_memoria),
+                pedido)
+            if motor is None:
+                return {'arquivo': arquivo,
+                        'erro': 'nenhum motor cabe no limite de memória'}
+            aviso = planejador_matriz.aviso_regra(pedido, motor)
+        app = Aplicativo(arquivo, verboso=False, motor=motor,
+                         estatisticas=estatisticas)
+        app.resolve_labirinto()
+    except Exception as e:
+        return {'arquivo': arquivo, 'erro': repr(e)}
+    registro = app.registro()
+    registro['tempos']['total'] = time.perf_counter() - t1
+    if aviso:
+        registro['aviso'] = aviso
+    return registro
+
+
+def resolve_empilhado(arquivos, tamanho=1024):
+    """Resolve os arquivos empilhando as matrizes de mesmo formato
+    na busca vetorizada(vetorial_matriz.resolve_lote). Indicado para
+    muitos labirintos pequenos, onde o custo por chamada domina.
+
+    O tempo de busca de cada registro é a parte dele no tempo do lote.
+
+    Args:
+        arquivos (list): arquivos com as matrizes
+        tamanho (int): arquivos lidos por vez
+
+    Yields:
+        dict: registro de cada labirinto, agrupados por formato
+    """
+    import vetorial_matriz
+    for i in range(0, len(arquivos), tamanho):
+        formatos = {}
+        for arquivo in arquivos[i:i + tamanho]:
+            try:
+                app = Aplicativo(arquivo, verboso=False, motor='bfs')
+            except Exception as e:
+                yield {'arquivo': arquivo, 'erro': repr(e)}
+                continue
+            formatos.setdefault(app.formato_matriz(), []).append(app)
+        for apps in formatos.values():
+            t1 = time.perf_counter()
+            caminhos = vetorial_matriz.resolve_lote(
+                [app.matriz_labirinto for app in apps])
+            busca = (time.perf_counter() - t1) / len(apps)
+            for app, caminho in zip(apps, caminhos):
+                app.draw_path = caminho
+                app.tempos['busca'] = busca
+                registro = app.registro()
+                registro['motor'] = 'bfs-lote'
+                registro['tempos']['total'] = sum(app.tempos.values())
+                yield registro
+
+
+def expande_arquivos(entradas):
+    """Expande a lista de arquivos, diretórios(*.txt) e globs
+
+    Args:
+        entradas (list): argumentos da linha de comando
+
+    Returns:
+        list: arquivos encontrados, na ordem informada
+    """
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos += sorted(glob.glob(os.path.join(entrada, '*.txt')))
+        elif os.path.isfile(entrada):
+            arquivos.append(entrada)
+        else:
+            # sem correspondência o arquivo segue para gerar o erro
+            arquivos += sorted(glob.glob(entrada)) or [entrada]
+    return arquivos
+
+
+CAMPOS_CSV = [
+    'arquivo', 'motor', 'linhas', 'colunas', 'entradas', 'saidas', 'origem',
+    'destino', 'distancia', 'custo', 'caminho', 'tempo_importacao',
+    'tempo_carga', 'tempo_varredura', 'tempo_busca', 'tempo_total', 'erro',
+    'aviso'
+]
+
+
+def linha_csv(registro):
+    """Achata um registro para uma linha CSV, listas em JSON
+    """
+    linha = {}
+    for campo, valor in registro.items():
+        if campo == 'tempos':
+            for fase, tempo in valor.items():
+                linha['tempo_' + fase] = tempo
+        elif isinstance(valor, list):
+            linha[campo] = json.dumps(valor, separators=(',', ':'))
+        else:
+            linha[campo] = valor
+    return linha
+
+
+def resolve_lote(arquivos, formato='json', processos=1, saida=sys.stdout,
+                 motor=motores_matriz.PADRAO, empilha=False,
+                 estatisticas=False, limite_memoria=None):
+    """Resolve vários arquivos e escreve um registro por labirinto,
+    conforme cada resultado fica pronto.
+
+    Args:
+        arquivos (list): arquivos com as matrizes
+        formato (str): 'json'(uma linha JSON por registro) ou 'csv'
+        processos (int): total de processos, 1 resolve neste processo
+        saida (file): destino dos registros
+        motor (str): nome do motor de busca
+        empilha (bool): usa resolve_empilhado(ignora motor e processos)
+        estatisticas (bool): inclui as estatísticas dos motores
+        limite_memoria (int): bytes, escolhe o motor de cada arquivo
+            pelo planejador_matriz(de preferência com a regra de
+            paredes de motor)
+    """
+    if formato == 'csv':
+        escritor = csv.DictWriter(
+            saida, fieldnames=CAMPOS_CSV, extrasaction='ignore')
+        escritor.writeheader()
+
+    def escreve(registro):
+        if formato == 'csv':
+            escritor.writerow(linha_csv(registro))
+        else:
+            saida.write(json.dumps(registro, separators=(',', ':')))
+            saida.write('\n')
+        saida.flush()
+
+    if empilha:
+        for registro in resolve_empilhado(arquivos):
+            escreve(registro)
+        return
+    if processos == 1:
+        for arquivo in arquivos:
+            escreve(resolve_arquivo(
+                arquivo, motor, estatisticas, limite_memoria))
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        # lotes de arquivos por tarefa para diluir o custo de IPC
+        lote = max(1, len(arquivos) // ((processos or 1) * 16))
+        for registro in pool.map(
+                partial(resolve_arquivo, motor=motor,
+                        estatisticas=estatisticas,
+                        limite_memoria=limite_memoria), arquivos,
+                chunksize=lote):
+            escreve(registro)
+
+
 if __name__ == '__main__':
-    args = sys.argv
-    arquivo = args[1]
+    parser = argparse.ArgumentParser(
+        description='Resolve labirintos em arquivos de matriz.')
+    parser.add_argument('arquivos', nargs='+',
+                        help='arquivos, diretórios ou globs')
+    parser.add_argument('--formato', choices=['json', 'csv'],
+                        default=None,
+                        help='um registro por labirinto(modo em lote)')
+    parser.add_argument('-j', '--processos', type=int, default=1,
+                        help='processos em paralelo no modo em lote, '
+                             '0 para todos os núcleos')
+    parser.add_argument('--motor', default=motores_matriz.PADRAO,
+                        choices=sorted(motores_matriz.MOTORES),
+                        help='motor de busca para cada par')
+    parser.add_argument('--empilha', action='store_true',
+                        help='no modo em lote, resolve as matrizes de '
+                             'mesmo formato juntas(busca vetorizada)')
+    parser.add_argument('--distancias', default=None,
+                        help='grava a matriz de distâncias entradas x '
+                             'saídas em .npz ou .csv')
+    parser.add_argument('--k', type=int, default=0,
+                        help='com --distancias, grava também os k '
+                             'menores trajetos dos pares')
+    parser.add_argument('--par', action='append', type=le_par,
+                        default=None, metavar='X1,Y1:X2,Y2',
+                        help='par para os k menores trajetos, pode '
+                             'repetir. Padrão: o menor par')
+    parser.add_argument('--png', default=None,
+                        help='grava a solução em um arquivo PNG')
+    parser.add_argument('--escala', type=int, default=1,
+                        help='pixels por nodo no PNG')
+    parser.add_argument('--stats', action='store_true',
+                        help='mostra contadores e tempos por fase dos '
+                             'motores(deixa a busca mais lenta)')
+    parser.add_argument('--max-memory', type=planejador_matriz.le_tamanho,
+                        default=None, metavar='TAMANHO',
+                        help='orçamento de memória(ex. 512M, 2G): o '
+                             'planejador escolhe o motor, de preferência '
+                             'com a regra de paredes de --motor')
+    args = parser.parse_args()
+    if (args.formato or args.empilha or len(args.arquivos) > 1
+            or os.path.isdir(args.arquivos[0])):
+        # um só arquivo de saída não comporta vários labirintos
+        if args.png or args.distancias:
+            parser.error('--png e --distancias não funcionam no modo em '
+                         'lote(vários arquivos, --formato ou --empilha); '
+                         'para os PNG use imagem_matriz.py')
+        resolve_lote(
+            expande_arquivos(args.arquivos), args.formato or 'json',
+            args.processos or None, motor=args.motor,
+            empilha=args.empilha, estatisticas=args.stats,
+            limite_memoria=args.max_memory)
+        sys.exit(0)
+    arquivo = args.arquivos[0]
     arquivo_existe = False
     if '\\' in arquivo or '/' in arquivo:
         pass
@@ -211,8 +559,26 @@ if __name__ == '__main__':
         arquivo = os.path.join(BASE_DIR,arquivo)
         print('Tentando abrir:',arquivo)        
     if os.path.isfile(arquivo):
-        app = Aplicativo(arquivo)
+        motor = args.motor
+        if args.max_memory:
+            perfil = planejador_matriz.perfil_arquivo(arquivo)
+            planos = planejador_matriz.planeja(perfil, args.max_memory)
+            print(planejador_matriz.relatorio(
+                perfil, planos, args.max_memory, args.motor))
+            motor = planejador_matriz.escolhe(planos, args.motor)
+            if motor is None:
+                sys.exit(1)
+        app = Aplicativo(arquivo, motor=motor,
+                         estatisticas=args.stats)
         app.resolve_labirinto()
+        if args.png:
+            app.exporta_png(args.png, args.escala)
+        if args.distancias:
+            app.exporta_distancias(args.distancias, args.k, args.par)
+        pico = planejador_matriz.pico_rss()
+        if args.max_memory and pico:
+            print('Pico de memória(RSS):',
+                  planejador_matriz.formata_tamanho(pico))
     else:
         print('Favor informar um arquivo válido.')
 
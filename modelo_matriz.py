@@ -0,0 +1,335 @@
+"""Modelo do labirinto compartilhado pela linha de comando(matriz.py),
+pela janela(interface_matriz.py) e pelos motores de busca.
+
+    A matriz fica em um único bloco de inteiros de 1 byte por nodo(no
+    lugar dos ~30 bytes por nodo de uma lista de listas de int), com o
+    formato e as aberturas calculados uma vez na carga. Terrenos com
+    custos acima de 127 usam o menor tipo inteiro que comporta os
+    valores.
+
+    Labirinto se comporta como a lista de listas usada pelos motores:
+    lab[y][x] retorna int, len(lab) é o total de linhas e iterar
+    percorre as linhas. Cada linha é um memoryview sobre o bloco, então
+    nada é copiado. numpy.asarray(lab) retorna um array numpy sobre o
+    mesmo bloco, também sem cópia, para os motores vetorizados.
+
+    Início rápido: arquivos texto pequenos(até LIMITE_RAPIDO bytes) são
+    lidos só com a biblioteca padrão, em um array.array, e o numpy só é
+    importado se algum motor ou a janela pedir o array(lab.grade). Em
+    um labirinto pequeno a importação do numpy custa mais que a busca.
+    Arquivos maiores e .npy(memory-mapped) usam o numpy direto.
+
+    Índices derivados(linhas em memoryview, máscara de nodos livres)
+    são montados só quando usados e ficam guardados.
+"""
+
+from array import array
+
+import motores_matriz
+
+# arquivos texto até este tamanho são lidos sem numpy
+LIMITE_RAPIDO = 1024 * 1024
+
+# códigos do array.array, do menor para o maior
+CODIGOS = 'bhiq'
+
+# bytes do texto processados por vez na contagem dos valores por linha
+BLOCO_TEXTO = 1024 * 1024
+
+
+def menor_codigo(menor, maior):
+    """Código do menor tipo inteiro do array.array que comporta os
+    valores
+
+    Args:
+        menor (int): menor valor
+        maior (int): maior valor
+
+    Returns:
+        str: código do array.array('b' para os labirintos comuns)
+    """
+    for codigo in CODIGOS:
+        limite = 2 ** (8 * array(codigo).itemsize - 1)
+        if -limite <= menor and maior < limite:
+            return codigo
+    raise OverflowError('Valores fora do intervalo de 64 bits')
+
+
+def menor_tipo(grade):
+    """Converte a grade para o menor tipo inteiro que comporta os
+    valores, int8 para os labirintos comuns
+
+    Args:
+        grade (nparray): matriz de inteiros
+
+    Returns:
+        nparray: a grade convertida(ou a própria se já for o tipo)
+    """
+    if grade.size == 0:
+        return grade.astype('b')
+    codigo = menor_codigo(int(grade.min()), int(grade.max()))
+    return grade.astype(codigo, copy=False)
+
+
+def larguras(dados):
+    """Total de valores em cada linha do texto, com numpy. O texto é
+    percorrido em blocos de BLOCO_TEXTO bytes, sem arrays do tamanho
+    do arquivo além do índice das linhas.
+
+    Args:
+        dados (bytes): texto da matriz, sem espaços nas pontas
+
+    Returns:
+        nparray: valores por linha
+    """
+    import numpy as np
+    texto = np.frombuffer(dados, dtype=np.uint8)
+    # início de cada linha
+    inicios = [np.zeros(1, dtype=np.int64)]
+    for inicio in range(0, len(texto), BLOCO_TEXTO):
+        quebras = np.flatnonzero(texto[inicio:inicio + BLOCO_TEXTO] == 10)
+        inicios.append(quebras + (inicio + 1))
+    inicios = np.concatenate(inicios)
+    contagem = np.empty(len(inicios), dtype=np.int64)
+    i = 0
+    while i < len(inicios):
+        # linhas que cabem no bloco, pelo menos uma
+        j = max(i + 1, int(np.searchsorted(
+            inicios, inicios[i] + BLOCO_TEXTO, 'right')) - 1)
+        fim = inicios[j] if j < len(inicios) else len(texto)
+        # um valor começa em cada byte que não é espaço(' ', \t, \r e
+        # \n estão abaixo de 33) vindo de um espaço; o bloco começa no
+        # início de uma linha
+        valor = texto[inicios[i]:fim] > 32
+        comeco = valor.copy()
+        comeco[1:] &= ~valor[:-1]
+        contagem[i:j] = np.add.reduceat(
+            comeco, inicios[i:j] - inicios[i], dtype=np.int64)
+        i = j
+    return contagem
+
+
+def le_texto(arquivo):
+    """Lê a matriz em texto: \\t separando valores e \\n separando
+    linhas. Tolera \\r\\n e quebra de linha no final.
+
+    Até LIMITE_RAPIDO bytes os valores são lidos sem numpy, em um
+    array.array; acima disso com numpy.fromstring.
+
+    Args:
+        arquivo (str): arquivo com a matriz
+
+    Raises:
+        ValueError: linhas de tamanhos diferentes(informa a primeira)
+            ou valor inválido
+
+    Returns:
+        tuple: (array.array|nparray plano, (linhas, colunas))
+    """
+    with open(arquivo, 'rb') as texto:
+        dados = texto.read().strip()
+    if not dados:
+        return array('b'), (0, 0)
+    linhas = dados.count(b'\n') + 1
+    fim = dados.find(b'\n')
+    colunas = len((dados if fim < 0 else dados[:fim]).split())
+    if len(dados) <= LIMITE_RAPIDO:
+        numeros = []
+        contagem = []
+        for linha in dados.split(b'\n'):
+            valores = linha.split()
+            contagem.append(len(valores))
+            numeros.extend(map(int, valores))
+        total = len(numeros)
+    else:
+        import numpy as np
+        contagem = larguras(dados)
+        # o separador ' ' aceita qualquer espaço: \t, \n e \r
+        numeros = np.fromstring(dados, dtype=np.int32, sep=' ')
+        total = numeros.size
+    for i, largura in enumerate(contagem):
+        if largura != colunas:
+            raise ValueError(
+                'Matriz inválida em %s: linha %d com %d valores, '
+                'esperados %d' % (arquivo, i + 1, largura, colunas))
+    if total != linhas * colunas:
+        raise ValueError(
+            'Matriz inválida em %s: esperados %dx%d valores, lidos %d'
+            % (arquivo, linhas, colunas, total))
+    if isinstance(numeros, list):
+        return (array(menor_codigo(min(numeros), max(numeros)), numeros),
+                (linhas, colunas))
+    return menor_tipo(numeros), (linhas, colunas)
+
+
+class Labirinto:
+    """ Matriz do labirinto com formato e aberturas.
+
+    Atributos:
+        grade (nparray): matriz (linhas, colunas), int8 em geral;
+            montada sob demanda quando a carga foi sem numpy
+        shape (tuple): (linhas, colunas)
+        entradas (list): (y, x) com -1 na coluna direita
+        saidas (list): (y, x) com -1 na coluna esquerda
+        arquivo (str|None): arquivo de origem
+    """
+
+    __slots__ = ('shape', 'entradas', 'saidas', 'arquivo', '_valores',
+                 '_grade', '_linhas', '_livre')
+
+    def __init__(self, grade, arquivo=None, shape=None) -> None:
+        """
+        Args:
+            grade (array.array|nparray|list): valores planos(com shape)
+                ou matriz de duas dimensões
+            arquivo (str): arquivo de origem
+            shape (tuple): (linhas, colunas) dos valores planos
+        """
+        self.arquivo = arquivo
+        self._valores = None
+        self._grade = None
+        self._linhas = None
+        self._livre = None
+        if isinstance(grade, array):
+            self._inicia_valores(grade, shape)
+        else:
+            self._inicia_grade(grade, shape)
+
+    def _inicia_valores(self, valores, shape):
+        # array.array plano, sem numpy
+        linhas, colunas = shape
+        if len(valores) != linhas * colunas:
+            raise ValueError('A matriz precisa ter %dx%d valores'
+                             % (linhas, colunas))
+        self._valores = valores
+        self.shape = (linhas, colunas)
+        self.entradas = [
+            (y, colunas - 1) for y in range(linhas)
+            if valores[y * colunas + colunas - 1] == -1]
+        self.saidas = [
+            (y, 0) for y in range(linhas) if valores[y * colunas] == -1]
+
+    def _inicia_grade(self, grade, shape):
+        import numpy as np
+        grade = np.asarray(grade)
+        if shape is not None:
+            grade = grade.reshape(shape)
+        if grade.ndim != 2:
+            raise ValueError('A matriz precisa ter duas dimensões')
+        if grade.dtype.kind not in 'iu':
+            grade = grade.astype(np.int64)
+        if grade.dtype.itemsize > 1:
+            grade = menor_tipo(grade)
+        self._grade = grade = np.ascontiguousarray(grade)
+        self.shape = (int(grade.shape[0]), int(grade.shape[1]))
+        self.entradas = []
+        self.saidas = []
+        if grade.size:
+            colunas = self.shape[1]
+            self.entradas = [
+                (int(y), colunas - 1)
+                for y in np.flatnonzero(grade[:, -1] == -1)]
+            self.saidas = [
+                (int(y), 0) for y in np.flatnonzero(grade[:, 0] == -1)]
+
+    @classmethod
+    def carrega(cls, arquivo):
+        """Carrega de um arquivo texto ou .npy(memory-mapped)
+
+        Args:
+            arquivo (str): caminho do arquivo
+
+        Returns:
+            Labirinto: o labirinto carregado
+        """
+        if arquivo.endswith('.npy'):
+            import numpy as np
+            return cls(np.load(arquivo, mmap_mode='r'), arquivo)
+        valores, shape = le_texto(arquivo)
+        return cls(valores, arquivo, shape)
+
+    @property
+    def grade(self):
+        """Matriz numpy (linhas, colunas), sem cópia dos valores
+        """
+        if self._grade is None:
+            import numpy as np
+            self._grade = np.frombuffer(
+                self._valores, dtype=self._valores.typecode).reshape(
+                    self.shape)
+        return self._grade
+
+    def linhas(self):
+        """Linhas da matriz como memoryview(sem cópia), lab[y][x]
+        retorna int
+
+        Returns:
+            list: um memoryview por linha
+        """
+        if self._linhas is None:
+            if self._valores is None:
+                self._linhas = [memoryview(linha) for linha in self._grade]
+            else:
+                valores = memoryview(self._valores)
+                colunas = self.shape[1]
+                self._linhas = [
+                    valores[inicio:inicio + colunas]
+                    for inicio in range(0, len(valores), colunas or 1)]
+        return self._linhas
+
+    def livre(self):
+        """Máscara bool dos nodos que não são parede
+        """
+        if self._livre is None:
+            self._livre = self.grade != 1
+        return self._livre
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, linha):
+        return self.linhas()[linha]
+
+    def __iter__(self):
+        return iter(self.linhas())
+
+    def __reduce__(self):
+        # os memoryview não são serializáveis, refaz a partir dos valores
+        if self._valores is not None:
+            return (Labirinto, (self._valores, self.arquivo, self.shape))
+        return (Labirinto, (self._grade, self.arquivo))
+
+    def __array__(self, dtype=None, copy=None):
+        grade = self.grade
+        if dtype is None or grade.dtype == dtype:
+            return grade
+        return grade.astype(dtype)
+
+    @property
+    def nbytes(self):
+        """Bytes da matriz
+        """
+        if self._valores is not None:
+            return len(self._valores) * self._valores.itemsize
+        return self._grade.nbytes
+
+    def menor_caminho(self, caminhos, motor=motores_matriz.PADRAO):
+        """ O menor dos caminhos encontrados: o que tem o menor numero
+        de nodos, ou o menor custo nos motores de terreno ponderado.
+
+        Args:
+            caminhos (list): trajetos(lista ou CaminhoCompacto)
+            motor (str): nome do motor que encontrou os trajetos
+
+        Returns:
+            list|bool: o menor trajeto ou False se não houver
+        """
+        medida = motores_matriz.medida(motor, self)
+        menor = float("inf")
+        menor_caminho = False
+        for caminho in caminhos:
+            tamanho = medida(caminho)
+            if tamanho < menor:
+                menor = tamanho
+                menor_caminho = caminho
+        return menor_caminho
@@ -0,0 +1,66 @@
+"""Motores de busca disponíveis para resolver um par entrada/saída.
+
+    Todos seguem a assinatura do labirinto_matriz.encontra_menor_caminho:
+        fn(img, src, dst, shape, estatisticas=None) -> list|False
+    e retornam o trajeto reverso de (x, y).
+
+    Os módulos são importados só quando o motor é usado.
+"""
+
+import importlib
+
+# nome: (módulo, função)
+MOTORES = {
+    'dijkstra': ('labirinto_matriz', 'encontra_menor_caminho'),
+    'bfs': ('vetorial_matriz', 'encontra_menor_caminho'),
+    'dial': ('terreno_matriz', 'encontra_menor_caminho'),
+    'jps': ('jps_matriz', 'encontra_menor_caminho'),
+    'disco': ('disco_matriz', 'encontra_menor_caminho'),
+    'paralelo': ('paralelo_matriz', 'encontra_menor_caminho'),
+}
+
+# motores que tratam os valores da matriz como custo do terreno, o
+# melhor trajeto é o de menor custo e não o de menos nodos
+PONDERADOS = {'dial'}
+
+# motores que atravessam paredes(com custo alto) quando não há outro
+# caminho, os outros tratam a parede como intransponível
+ATRAVESSA_PAREDES = {'dijkstra'}
+
+PADRAO = 'dijkstra'
+
+
+def obtem(nome=PADRAO):
+    """Retorna a função de busca do motor
+
+    Args:
+        nome (str): nome do motor em MOTORES
+
+    Raises:
+        ValueError: motor desconhecido
+
+    Returns:
+        function: a função de busca
+    """
+    if nome not in MOTORES:
+        raise ValueError(
+            'Motor desconhecido: %s. Disponíveis: %s'
+            % (nome, ', '.join(sorted(MOTORES))))
+    modulo, funcao = MOTORES[nome]
+    return getattr(importlib.import_module(modulo), funcao)
+
+
+def medida(nome, img):
+    """Função usada para comparar os trajetos encontrados pelo motor
+
+    Args:
+        nome (str): nome do motor
+        img (list): matriz com os valores
+
+    Returns:
+        function: recebe o trajeto e retorna a medida(menor é melhor)
+    """
+    if nome in PONDERADOS:
+        import terreno_matriz
+        return lambda path: terreno_matriz.custo_caminho(img, path)
+    return len
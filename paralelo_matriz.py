@@ -0,0 +1,238 @@
+"""Busca em largura em faixas horizontais, em paralelo com threads.
+
+    A busca do labirinto_matriz roda em Python e segura o GIL, então
+    várias threads(o QThreadPool da janela) não ganham desempenho em
+    uma busca só. Aqui a matriz é dividida em faixas horizontais e cada
+    passo da frente de onda expande as faixas com operações numpy, que
+    liberam o GIL: as faixas avançam ao mesmo tempo em um
+    ThreadPoolExecutor, dentro do mesmo processo e sem serializar a
+    matriz como no ProcessPoolExecutor.
+
+    Cada faixa guarda a própria fronteira. Entre um passo e outro as
+    faixas trocam as linhas da borda: a última linha da fronteira da
+    faixa de cima e a primeira da de baixo entram na expansão. Faixas
+    sem fronteira(nem nas vizinhas) ficam paradas no passo.
+
+    Como no vetorial_matriz, parede(1) é intransponível, todas as
+    arestas custam 1 e o trajeto é reconstruído pelas distâncias no
+    formato do encontra_menor_caminho: lista reversa de (x, y), do
+    destino(repetido) até a origem.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from estatisticas_matriz import cronometro
+from vetorial_matriz import reconstroi
+
+# faixas por thread: faixas menores ficam paradas mais vezes
+FAIXAS_POR_THREAD = 4
+
+
+class Faixa:
+    """ Linhas [inicio, fim) da matriz e a fronteira delas.
+
+    A fronteira tem uma linha e uma coluna de borda em cada lado; as
+    linhas de borda recebem as linhas das faixas vizinhas antes de cada
+    passo. As operações do passo ficam restritas à caixa(retângulo)
+    que contém a fronteira.
+    """
+
+    def __init__(self, inicio, fim, livre, dist) -> None:
+        self.inicio = inicio
+        self.fim = fim
+        # nodos livres ainda não alcançados
+        self.abertos = livre[inicio:fim].copy()
+        # visão das distâncias da faixa
+        self.dist = dist[inicio:fim]
+        linhas, colunas = self.abertos.shape
+        # a fronteira atual e a do passo anterior, reaproveitada
+        self.fronteira = np.zeros((linhas + 2, colunas + 2), dtype=bool)
+        self.reserva = np.zeros_like(self.fronteira)
+        # caixa (a, b, c, d) das linhas [a, b) e colunas [c, d) com
+        # fronteira, None sem fronteira; e a caixa escrita na reserva
+        self.caixa = None
+        self.caixa_reserva = None
+
+    def semeia(self, y, x):
+        y -= self.inicio
+        self.fronteira[y + 1, x + 1] = True
+        self.abertos[y, x] = False
+        self.caixa = (y, y + 1, x, x + 1)
+
+    def borda(self, acima, abaixo):
+        """Copia as linhas de borda das faixas vizinhas e calcula a
+        região do próximo passo
+
+        Args:
+            acima (Faixa|None): faixa de cima
+            abaixo (Faixa|None): faixa de baixo
+
+        Returns:
+            tuple|None: (a, b, c, d) da região ou None se a faixa não
+            tem o que expandir
+        """
+        fronteira = self.fronteira
+        linhas = len(fronteira) - 2
+        colunas = fronteira.shape[1] - 2
+        regiao = None
+        if self.caixa is not None:
+            a, b, c, d = self.caixa
+            regiao = (max(0, a - 1), min(linhas, b + 1),
+                      max(0, c - 1), min(colunas, d + 1))
+        for borda, linha, vizinha, cima in (
+                (0, 0, acima, True), (linhas + 1, linhas - 1, abaixo, False)):
+            fronteira[borda] = False
+            if vizinha is None or vizinha.caixa is None:
+                continue
+            a, b, c, d = vizinha.caixa
+            if cima:
+                # última linha da faixa de cima
+                if b != len(vizinha.fronteira) - 2:
+                    continue
+                origem = vizinha.fronteira[-2]
+            else:
+                if a != 0:
+                    continue
+                origem = vizinha.fronteira[1]
+            fronteira[borda, c + 1:d + 1] = origem[c + 1:d + 1]
+            if regiao is None:
+                regiao = (linha, linha + 1, c, d)
+            else:
+                regiao = (min(regiao[0], linha), max(regiao[1], linha + 1),
+                          min(regiao[2], c), max(regiao[3], d))
+        return regiao
+
+    def expande(self, regiao, passo):
+        """Expande a fronteira dentro da região
+
+        Args:
+            regiao (tuple): (a, b, c, d), ver borda
+            passo (int): distância dos nodos alcançados
+
+        Returns:
+            int: nodos alcançados no passo
+        """
+        r0, r1, c0, c1 = regiao
+        fronteira = self.fronteira
+        novo = fronteira[r0:r1, c0 + 1:c1 + 1] | fronteira[
+            r0 + 2:r1 + 2, c0 + 1:c1 + 1]
+        novo |= fronteira[r0 + 1:r1 + 1, c0:c1]
+        novo |= fronteira[r0 + 1:r1 + 1, c0 + 2:c1 + 2]
+        abertos = self.abertos[r0:r1, c0:c1]
+        novo &= abertos
+        abertos ^= novo
+        np.copyto(self.dist[r0:r1, c0:c1], passo, where=novo)
+
+        # a nova fronteira vai para a reserva, limpa só na caixa antiga
+        reserva = self.reserva
+        if self.caixa_reserva is not None:
+            a, b, c, d = self.caixa_reserva
+            reserva[a + 1:b + 1, c + 1:d + 1] = False
+        self.caixa_reserva = self.caixa
+        linhas = np.flatnonzero(novo.any(axis=1))
+        if len(linhas):
+            colunas = np.flatnonzero(novo.any(axis=0))
+            a, b = int(linhas[0]), int(linhas[-1]) + 1
+            c, d = int(colunas[0]), int(colunas[-1]) + 1
+            reserva[r0 + a + 1:r0 + b + 1, c0 + c + 1:c0 + d + 1] = (
+                novo[a:b, c:d])
+            self.caixa = (r0 + a, r0 + b, c0 + c, c0 + d)
+        else:
+            self.caixa = None
+        self.fronteira, self.reserva = reserva, fronteira
+        return int(np.count_nonzero(novo))
+
+
+def divide(linhas, total):
+    """Limites de total faixas de alturas próximas
+
+    Returns:
+        list: tuplas (inicio, fim)
+    """
+    total = max(1, min(total, linhas))
+    limites = [linhas * i // total for i in range(total + 1)]
+    return list(zip(limites, limites[1:]))
+
+
+def busca(livre, origem, destino, threads=None, faixas=None):
+    """Busca em largura em faixas a partir da origem até alcançar o
+    destino
+
+    Args:
+        livre (nparray): bool (linhas, colunas), nodos que não são parede
+        origem (tuple): (y, x)
+        destino (tuple): (y, x)
+        threads (int): threads do pool, None para os núcleos
+        faixas (int): total de faixas, None para FAIXAS_POR_THREAD por
+            thread
+
+    Returns:
+        tuple: (dist int32 com -1 nos não alcançados, nodos alcançados)
+    """
+    threads = threads or os.cpu_count() or 1
+    dist = np.full(livre.shape, -1, dtype=np.int32)
+    lista = [Faixa(inicio, fim, livre, dist) for inicio, fim in divide(
+        livre.shape[0], faixas or threads * FAIXAS_POR_THREAD)]
+    for faixa in lista:
+        if faixa.inicio <= origem[0] < faixa.fim:
+            faixa.semeia(*origem)
+    dist[origem] = 0
+    alcancados = 1
+    passo = 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while dist[destino] < 0:
+            # troca das linhas de borda, antes de qualquer expansão
+            regioes = []
+            for i, faixa in enumerate(lista):
+                regiao = faixa.borda(
+                    lista[i - 1] if i > 0 else None,
+                    lista[i + 1] if i + 1 < len(lista) else None)
+                if regiao is not None:
+                    regioes.append((faixa, regiao))
+            if not regioes:
+                break
+            passo += 1
+            alcancados += sum(pool.map(
+                lambda item: item[0].expande(item[1], passo), regioes))
+    return dist, alcancados
+
+
+def encontra_menor_caminho(img, src, dst, shape, estatisticas=None,
+                           threads=None, faixas=None):
+    """Encontra o menor caminho entre a origem e o destino com a busca
+    em faixas paralelas. Mesma assinatura e retorno do
+    encontra_menor_caminho do labirinto_matriz.
+
+    Args:
+        img (list|nparray): matriz com os valores
+        src (tuple): Origem (y, x)
+        dst (tuple): Destino (y, x)
+        shape (tuple): (linhas, colunas)
+        estatisticas (dict): opcional, recebe os contadores e as fases
+            (ver estatisticas_matriz)
+        threads (int): threads do pool, None para os núcleos
+        faixas (int): total de faixas
+
+    Returns:
+        [list|False]: trajeto reverso de (x, y) ou False
+    """
+    with cronometro(estatisticas, 'montagem'):
+        livre = np.asarray(img).reshape(shape) != 1
+    origem = (int(src[0]), int(src[1]))
+    destino = (int(dst[0]), int(dst[1]))
+    if not (livre[origem] and livre[destino]):
+        return False
+    with cronometro(estatisticas, 'busca'):
+        dist, alcancados = busca(livre, origem, destino, threads, faixas)
+    if estatisticas is not None:
+        # sem fila: cada nodo alcançado sai da fronteira uma vez
+        estatisticas['nodos_expandidos'] = alcancados
+        estatisticas['retiradas'] = alcancados
+        estatisticas['relaxamentos'] = alcancados - 1
+    if dist[destino] < 0:
+        return False
+    with cronometro(estatisticas, 'reconstrucao'):
+        return reconstroi(dist, destino)
@@ -0,0 +1,399 @@
+"""Escolha do motor de busca por orçamento de memória.
+
+    Antes de carregar a matriz o arquivo é lido linha a linha para
+    montar o perfil do labirinto(formato, densidade de paredes,
+    entradas, saídas e se tem terreno ponderado), sem guardar a matriz.
+    Com o perfil cada motor estima a memória de pico e o tempo de uma
+    busca, e o planejador escolhe o mais rápido que cabe no limite.
+
+    A memória de cada motor soma a base medida do processo(RSS do
+    interpretador e dos módulos já importados) e a importação do numpy
+    nos motores que dependem dele. O planejador prefere motores com a
+    mesma regra de paredes do motor pedido(ATRAVESSA_PAREDES do
+    motores_matriz): o dijkstra atravessa paredes com custo alto e os
+    outros não, então trocar um pelo outro pode mudar o trajeto ou
+    deixar um par sem caminho. Se só um motor da outra regra couber,
+    ele é usado e o relatório avisa.
+
+    As estimativas são lineares no número de nodos, com constantes
+    medidas com tracemalloc e perf_counter em labirintos gerados pelo
+    gerador_matriz(ver benchmark_matriz). Servem para ordem de
+    grandeza, não para prever o tempo exato:
+        carga       o texto inteiro(bytes do arquivo) e ~5 bytes por
+                    nodo no pico da leitura(valores em int32 e a matriz
+                    int8 do modelo_matriz); até LIMITE_RAPIDO bytes a
+                    leitura sem numpy usa ~10 bytes por nodo. O .npy
+                    fica em memory-map
+        dijkstra    um Vertice por nodo e o heap, ~210 bytes por nodo
+        bfs         arrays numpy de bool/int32, ~17 bytes por nodo,
+                    cada passo da frente de onda percorre a matriz toda
+        dial        listas de custo, distância e parente, ~50 bytes
+                    por nodo
+        jps         grade e paradas em bytes, mais os pontos de salto:
+                    ~45 bytes por nodo em labirintos, até ~180 com
+                    obstáculos espalhados; muito rápido em salas
+                    abertas, lento com obstáculos espalhados
+        paralelo    faixas da busca em largura em threads, ~10 bytes
+                    por nodo; cada passo só percorre a caixa da
+                    fronteira de cada faixa
+        disco       blocos de distância em memory-map: memória fixa
+                    (~32MiB), 4 bytes por nodo no disco. Com .npy a
+                    matriz também não é carregada, o limite é o disco
+
+    Uso:
+        python3 planejador_matriz.py <arquivo_matriz.txt> --max-memory 2G
+"""
+
+import argparse
+import math
+import os
+import sys
+
+try:
+    import resource
+except ImportError:
+    # windows
+    resource = None
+
+import motores_matriz
+from modelo_matriz import LIMITE_RAPIDO
+
+# bytes por nodo no pico da leitura do texto pelo modelo_matriz, além
+# do próprio texto: com numpy(int32 e int8) e sem numpy(até
+# LIMITE_RAPIDO bytes, listas de int e array.array)
+MEMORIA_CARGA = 5
+MEMORIA_CARGA_RAPIDA = 10
+
+# motores que leem a matriz .npy em memory-map sem carregá-la
+MAPEADOS = {'disco'}
+
+# RSS do interpretador com o matriz.py importado, usado quando o
+# sistema não informa o pico do processo
+MEMORIA_BASE = 12 * 2**20
+
+# RSS da importação do numpy e os motores que o importam
+MEMORIA_NUMPY = 15 * 2**20
+USAM_NUMPY = {'bfs', 'paralelo', 'disco'}
+
+# bytes de matriz lidos por vez no perfil de um .npy
+BLOCO_PERFIL = 4 * 2**20
+
+UNIDADES = {'': 1, 'K': 2**10, 'M': 2**20, 'G': 2**30, 'T': 2**40}
+
+
+def le_tamanho(texto):
+    """Converte '512M', '2G', '1.5g' ou '1048576' em bytes
+
+    Raises:
+        ValueError: formato inválido
+    """
+    texto = texto.strip().upper().rstrip('B')
+    unidade = texto[-1:] if texto[-1:] in UNIDADES else ''
+    valor = float(texto[:len(texto) - len(unidade)])
+    return int(valor * UNIDADES[unidade])
+
+
+def formata_tamanho(nbytes):
+    """Bytes em texto legível, ex. 1.5GiB
+    """
+    for unidade in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(nbytes) < 1024:
+            return '%.1f%s' % (nbytes, unidade)
+        nbytes /= 1024
+    return '%.1fTiB' % nbytes
+
+
+def perfil_arquivo(arquivo):
+    """Perfil do labirinto lendo o arquivo uma linha por vez
+
+    Args:
+        arquivo (str): arquivo com a matriz
+
+    Returns:
+        dict: linhas, colunas, paredes(fração), entradas, saidas,
+        ponderado(valores de terreno além de -1, 0 e 1), memmap(.npy)
+        e bytes(tamanho do arquivo)
+    """
+    if arquivo.endswith('.npy'):
+        return perfil_npy(arquivo)
+    linhas = colunas = paredes = entradas = saidas = 0
+    ponderado = False
+    with open(arquivo, 'r') as texto:
+        for linha in texto:
+            valores = linha.rstrip('\r\n').split('\t')
+            if valores == ['']:
+                continue
+            linhas += 1
+            colunas = max(colunas, len(valores))
+            paredes += valores.count('1')
+            entradas += valores[-1] == '-1'
+            saidas += valores[0] == '-1'
+            if not ponderado:
+                ponderado = bool(set(valores) - {'-1', '0', '1'})
+    total = max(1, linhas * colunas)
+    return {
+        'linhas': linhas,
+        'colunas': colunas,
+        'paredes': paredes / total,
+        'entradas': entradas,
+        'saidas': saidas,
+        'ponderado': ponderado,
+        'memmap': False,
+        'bytes': os.path.getsize(arquivo),
+    }
+
+
+def perfil_npy(arquivo):
+    """Perfil de uma matriz .npy, lida em memory-map e percorrida em
+    faixas de linhas(BLOCO_PERFIL bytes), sem temporários do tamanho
+    da matriz
+    """
+    import numpy as np
+
+    grade = np.load(arquivo, mmap_mode='r')
+    linhas, colunas = grade.shape
+    paredes = 0
+    ponderado = False
+    passo = max(1, BLOCO_PERFIL // max(1, colunas * grade.itemsize))
+    for inicio in range(0, linhas if colunas else 0, passo):
+        faixa = grade[inicio:inicio + passo]
+        paredes += int(np.count_nonzero(faixa == 1))
+        if not ponderado:
+            ponderado = bool(faixa.min() < -1 or faixa.max() > 1)
+    return {
+        'linhas': linhas,
+        'colunas': colunas,
+        'paredes': paredes / max(1, grade.size),
+        'entradas': int(np.count_nonzero(grade[:, -1] == -1)),
+        'saidas': int(np.count_nonzero(grade[:, 0] == -1)),
+        'ponderado': ponderado,
+        'memmap': True,
+        'bytes': os.path.getsize(arquivo),
+    }
+
+
+def estima_carga(perfil):
+    """Pico de memória da leitura do texto, 0 para o .npy(memory-map)
+    """
+    if perfil.get('memmap'):
+        return 0
+    nodos = perfil['linhas'] * perfil['colunas']
+    tamanho = perfil.get('bytes', 0)
+    por_nodo = (MEMORIA_CARGA_RAPIDA if tamanho <= LIMITE_RAPIDO
+                else MEMORIA_CARGA)
+    return tamanho + por_nodo * nodos
+
+
+def estima_dijkstra(perfil):
+    nodos = perfil['linhas'] * perfil['colunas']
+    # o heap cresce com log(nodos)
+    return 210 * nodos, 0.7e-6 * nodos * math.log2(max(2, nodos))
+
+
+def passos_onda(perfil):
+    """Passos estimados da frente de onda das buscas em largura
+    """
+    livres = perfil['linhas'] * perfil['colunas'] * (1 - perfil['paredes'])
+    # a diagonal em áreas abertas, uma fração dos nodos livres em
+    # corredores(densidade perto de 0.5)
+    tortuosidade = min(1.0, max(0.0, (perfil['paredes'] - 0.2) / 0.3))
+    return max(perfil['linhas'] + perfil['colunas'],
+               0.15 * tortuosidade * livres)
+
+
+def estima_bfs(perfil):
+    nodos = perfil['linhas'] * perfil['colunas']
+    # cada passo tem ~30us de chamadas numpy além do custo por nodo
+    return 17 * nodos, passos_onda(perfil) * (3e-5 + 1.5e-9 * nodos)
+
+
+def estima_dial(perfil):
+    nodos = perfil['linhas'] * perfil['colunas']
+    return 50 * nodos, 0.35e-6 * nodos
+
+
+def estima_jps(perfil):
+    nodos = perfil['linhas'] * perfil['colunas']
+    # o pior caso(obstáculos espalhados), a densidade não separa
+    # salas de obstáculos soltos
+    return 180 * nodos, 1e-6 * nodos
+
+
+def estima_paralelo(perfil):
+    nodos = perfil['linhas'] * perfil['colunas']
+    livres = nodos * (1 - perfil['paredes'])
+    # o numpy fica limitado pela memória: conta metade dos núcleos
+    nucleos = max(1.0, (os.cpu_count() or 1) / 2)
+    # cada passo troca as bordas e despacha as faixas, ~150us
+    return 10 * nodos, (passos_onda(perfil) * 1.5e-4
+                        + 1.2e-6 * livres / nucleos)
+
+
+def estima_disco(perfil):
+    nodos = perfil['linhas'] * perfil['colunas']
+    # 64 blocos residentes de 256x256 int32 e a busca local de um
+    # bloco(ver disco_matriz), o resto das distâncias fica no disco
+    return 32 * 2**20, 1.5e-6 * nodos
+
+
+# motor: função perfil -> (bytes de pico, segundos) de uma busca
+ESTIMATIVAS = {
+    'dijkstra': estima_dijkstra,
+    'bfs': estima_bfs,
+    'dial': estima_dial,
+    'jps': estima_jps,
+    'paralelo': estima_paralelo,
+    'disco': estima_disco,
+}
+
+
+def memoria_base():
+    """Memória já usada pelo processo(interpretador e módulos
+    importados), MEMORIA_BASE se o sistema não informar
+    """
+    return pico_rss() or MEMORIA_BASE
+
+
+def planeja(perfil, limite=None, base=None):
+    """Estima cada motor aplicável ao labirinto
+
+    Args:
+        perfil (dict): ver perfil_arquivo
+        limite (int): orçamento de memória em bytes, None sem limite
+        base (int): memória já usada pelo processo, None para medir
+            (ver memoria_base)
+
+    Returns:
+        list: um dict por motor(motor, memoria, tempo, cabe), do mais
+        rápido para o mais lento
+    """
+    pares = max(1, perfil['entradas'] * perfil['saidas'])
+    nodos = perfil['linhas'] * perfil['colunas']
+    if base is None:
+        base = memoria_base()
+    numpy_importado = 'numpy' in sys.modules
+    # a leitura de texto grande e a do .npy importam o numpy
+    carga_numpy = (perfil.get('memmap')
+                   or perfil.get('bytes', 0) > LIMITE_RAPIDO)
+    carga = estima_carga(perfil)
+    planos = []
+    for motor, estima in ESTIMATIVAS.items():
+        if motor not in motores_matriz.MOTORES:
+            continue
+        if perfil['ponderado'] and motor not in motores_matriz.PONDERADOS:
+            # os outros motores ignoram o custo do terreno
+            continue
+        memoria, tempo = estima(perfil)
+        if not perfil.get('memmap'):
+            # o texto é liberado depois da leitura e fica a matriz int8
+            memoria = max(carga, nodos + memoria)
+        elif motor not in MAPEADOS:
+            # as páginas do .npy lidas pelo motor, 1 byte por nodo
+            memoria += nodos
+        memoria += base
+        if not numpy_importado and (motor in USAM_NUMPY or carga_numpy):
+            memoria += MEMORIA_NUMPY
+        planos.append({
+            'motor': motor,
+            'memoria': memoria,
+            # os pares são resolvidos um por vez
+            'tempo': tempo * pares,
+            'cabe': limite is None or memoria <= limite,
+        })
+    planos.sort(key=lambda plano: plano['tempo'])
+    return planos
+
+
+def mesma_regra(motor, outro):
+    """Os dois motores tratam as paredes do mesmo jeito
+    """
+    atravessam = motores_matriz.ATRAVESSA_PAREDES
+    return (motor in atravessam) == (outro in atravessam)
+
+
+def escolhe(planos, motor=None):
+    """O motor mais rápido que cabe no orçamento, de preferência
+    com a mesma regra de paredes do motor pedido
+
+    Args:
+        planos (list): ver planeja
+        motor (str): motor pedido, None para qualquer um
+
+    Returns:
+        str|None: nome do motor ou None se nenhum couber
+    """
+    cabem = [plano['motor'] for plano in planos if plano['cabe']]
+    for escolhido in cabem:
+        if motor is None or mesma_regra(motor, escolhido):
+            return escolhido
+    return cabem[0] if cabem else None
+
+
+def aviso_regra(motor, escolhido):
+    """Aviso quando o motor escolhido trata as paredes de outro jeito
+
+    Returns:
+        str|None: texto do aviso ou None se a regra é a mesma
+    """
+    if motor is None or escolhido is None or mesma_regra(motor, escolhido):
+        return None
+    if escolhido in motores_matriz.ATRAVESSA_PAREDES:
+        regra = '%s atravessa paredes, %s não' % (escolhido, motor)
+    else:
+        regra = '%s não atravessa paredes, %s sim' % (escolhido, motor)
+    return ('Aviso: nenhum motor com a regra de paredes de %s cabe; '
+            '%s: o trajeto pode mudar ou não existir' % (motor, regra))
+
+
+def relatorio(perfil, planos, limite=None, motor=None):
+    """Texto com o perfil e a estimativa de cada motor, motor é o
+    motor pedido(ver escolhe)
+    """
+    linhas = [
+        'Perfil: %dx%d, paredes %.0f%%, %d entradas, %d saidas%s' % (
+            perfil['linhas'], perfil['colunas'], perfil['paredes'] * 100,
+            perfil['entradas'], perfil['saidas'],
+            ', ponderado' if perfil['ponderado'] else ''),
+        'Limite de memória: '
+        + (formata_tamanho(limite) if limite else 'nenhum'),
+    ]
+    for plano in planos:
+        linhas.append('  %-10s memória ~%-10s tempo ~%8.2fs %s' % (
+            plano['motor'], formata_tamanho(plano['memoria']),
+            plano['tempo'], '' if plano['cabe'] else '(não cabe)'))
+    escolhido = escolhe(planos, motor)
+    linhas.append(
+        'Motor escolhido: ' + escolhido if escolhido
+        else 'Nenhum motor cabe no limite de memória.')
+    aviso = aviso_regra(motor, escolhido)
+    if aviso:
+        linhas.append(aviso)
+    return '\n'.join(linhas)
+
+
+def pico_rss():
+    """Pico de memória residente do processo em bytes, None se o
+    sistema não informar
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux informa em KiB, macOS em bytes
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Estima memória e tempo de cada motor de busca.')
+    parser.add_argument('arquivo')
+    parser.add_argument('--max-memory', type=le_tamanho, default=None,
+                        help='orçamento de memória, ex. 512M ou 2G')
+    parser.add_argument('--motor', default=motores_matriz.PADRAO,
+                        choices=sorted(motores_matriz.MOTORES),
+                        help='motor pedido: prefere motores com a mesma '
+                             'regra de paredes')
+    args = parser.parse_args()
+    perfil = perfil_arquivo(args.arquivo)
+    planos = planeja(perfil, args.max_memory)
+    print(relatorio(perfil, planos, args.max_memory, args.motor))
+    sys.exit(0 if escolhe(planos, args.motor) else 1)
@@ -0,0 +1,211 @@
+"""Matriz de distâncias entradas x saídas e k menores trajetos.
+
+    O menor_caminho do Aplicativo resolve cada par com uma busca
+    completa e guarda só o menor trajeto. Aqui uma única busca de Dial
+    sem destino por entrada(terreno_matriz.busca) já dá a distância
+    para todas as saídas, em tempo linear no total de nodos. No
+    labirinto comum todos os nodos livres custam 1 e a busca de Dial
+    vira uma busca em largura.
+
+    Os k menores trajetos sem ciclos de um par são calculados com o
+    algoritmo de Yen sobre a busca de Dial, bloqueando nodos e arestas
+    dos trajetos já encontrados.
+
+    As paredes(1) são intransponíveis. No labirinto comum as distâncias
+    são dadas em passos(arestas) e no terreno ponderado em custo. Pares
+    sem trajeto têm distância -1.
+"""
+
+import csv
+import heapq
+import json
+
+import numpy as np
+
+import terreno_matriz
+
+
+def custos_planos(img, ponderado=False):
+    """Custos planos usados pela busca de Dial
+
+    Args:
+        img (list|nparray): matriz com os valores
+        ponderado (bool): valores como custo do terreno
+
+    Returns:
+        list: custo de entrar em cada nodo, 0 para parede
+    """
+    if ponderado:
+        return terreno_matriz.custos_planos(img)
+    return [0 if v == 1 else 1 for linha in img for v in linha]
+
+
+def matriz_distancias(img, entradas, saidas, ponderado=False):
+    """Distância de cada entrada para cada saída
+
+    Args:
+        img (list|nparray): matriz com os valores
+        entradas (list): pontos (y, x) das entradas
+        saidas (list): pontos (y, x) das saídas
+        ponderado (bool): valores como custo do terreno
+
+    Returns:
+        nparray: (entradas, saidas) int64, -1 sem trajeto
+    """
+    distancias = np.full((len(entradas), len(saidas)), -1, dtype=np.int64)
+    if not entradas or not saidas:
+        return distancias
+    colunas = len(img[0])
+    custos = custos_planos(img, ponderado)
+    planos = [y * colunas + x for y, x in saidas]
+    for i, (y, x) in enumerate(entradas):
+        # sem destino a busca cobre todo o labirinto alcançável
+        dist, _, _ = terreno_matriz.busca(custos, colunas, y * colunas + x)
+        for j, p in enumerate(planos):
+            if dist[p] != float('inf'):
+                distancias[i, j] = dist[p]
+    return distancias
+
+
+def _trajeto(parente, origem, destino):
+    """Trajeto em índices planos, da origem ao destino
+    """
+    trajeto = [destino]
+    while trajeto[-1] != origem:
+        trajeto.append(parente[trajeto[-1]])
+    trajeto.reverse()
+    return trajeto
+
+
+def k_menores_caminhos(img, origem, destino, k, ponderado=False):
+    """Os k menores trajetos sem ciclos entre a origem e o destino
+    (algoritmo de Yen).
+
+    Args:
+        img (list|nparray): matriz com os valores
+        origem (tuple): (y, x) da entrada
+        destino (tuple): (y, x) da saída
+        k (int): total de trajetos
+        ponderado (bool): valores como custo do terreno
+
+    Returns:
+        list: (distância, trajeto) em ordem crescente, trajetos no
+        formato do encontra_menor_caminho(reverso de (x, y))
+    """
+    colunas = len(img[0])
+    custos = custos_planos(img, ponderado)
+    s = origem[0] * colunas + origem[1]
+    t = destino[0] * colunas + destino[1]
+
+    def custo(trajeto):
+        return sum(custos[u] for u in trajeto[1:])
+
+    dist, parente, _ = terreno_matriz.busca(custos, colunas, s, t)
+    if dist[t] == float('inf'):
+        return []
+    encontrados = [_trajeto(parente, s, t)]
+    candidatos = []
+    vistos = {tuple(encontrados[0])}
+
+    while len(encontrados) < k:
+        anterior = encontrados[-1]
+        for i in range(len(anterior) - 1):
+            desvio = anterior[i]
+            raiz = anterior[:i + 1]
+            # arestas que repetiriam trajetos já encontrados
+            arestas = {
+                (p[i], p[i + 1]) for p in encontrados
+                if len(p) > i + 1 and p[:i + 1] == raiz
+            }
+            dist, parente, _ = terreno_matriz.busca(
+                custos, colunas, desvio, t,
+                bloqueados=set(raiz[:-1]), arestas=arestas)
+            if dist[t] == float('inf'):
+                continue
+            trajeto = raiz[:-1] + _trajeto(parente, desvio, t)
+            if tuple(trajeto) not in vistos:
+                vistos.add(tuple(trajeto))
+                heapq.heappush(candidatos, (custo(trajeto), trajeto))
+        if not candidatos:
+            break
+        encontrados.append(heapq.heappop(candidatos)[1])
+
+    resultado = []
+    for trajeto in encontrados:
+        # formato do encontra_menor_caminho: reverso, destino repetido
+        pontos = [(u % colunas, u // colunas) for u in reversed(trajeto)]
+        resultado.append((custo(trajeto), pontos[:1] + pontos))
+    return resultado
+
+
+def salva_npz(arquivo, distancias, entradas, saidas, rotas=None,
+              ponderado=False):
+    """Grava a matriz de distâncias(e as rotas) em .npz
+
+    Campos: distancias, entradas, saidas(pontos [x, y]) e ponderado
+    (True se as distâncias são custo do terreno, False se são passos).
+    Com rotas:
+    rotas_par(origem_x, origem_y, destino_x, destino_y, ordem),
+    rotas_distancia, rotas_inicio e rotas_pontos, onde os pontos da
+    rota r são rotas_pontos[rotas_inicio[r]:rotas_inicio[r + 1]].
+
+    Args:
+        arquivo (str): arquivo de saída
+        distancias (nparray): (entradas, saidas)
+        entradas (list): pontos (y, x)
+        saidas (list): pontos (y, x)
+        rotas (dict): {(origem, destino): k_menores_caminhos(...)}
+        ponderado (bool): regra de custo usada nas distâncias
+    """
+    campos = {
+        'ponderado': np.array(bool(ponderado)),
+        'distancias': distancias,
+        'entradas': np.array([[x, y] for y, x in entradas]).reshape(-1, 2),
+        'saidas': np.array([[x, y] for y, x in saidas]).reshape(-1, 2),
+    }
+    if rotas:
+        pares, distancia, inicio, pontos = [], [], [0], []
+        for (o, d), caminhos in rotas.items():
+            for ordem, (dist, caminho) in enumerate(caminhos):
+                pares.append([o[1], o[0], d[1], d[0], ordem])
+                distancia.append(dist)
+                pontos += caminho
+                inicio.append(len(pontos))
+        campos['rotas_par'] = np.array(pares).reshape(-1, 5)
+        campos['rotas_distancia'] = np.array(distancia)
+        campos['rotas_inicio'] = np.array(inicio)
+        campos['rotas_pontos'] = np.array(pontos).reshape(-1, 2)
+    np.savez(arquivo, **campos)
+
+
+def salva_csv(arquivo, distancias, entradas, saidas, rotas=None):
+    """Grava a matriz de distâncias(e as rotas) em CSV
+
+    Uma linha por par com a distância e, com rotas, uma linha por rota
+    com a ordem e o trajeto em JSON.
+    """
+    with open(arquivo, 'w', newline='') as saida:
+        escritor = csv.writer(saida)
+        escritor.writerow([
+            'origem_x', 'origem_y', 'destino_x', 'destino_y',
+            'distancia', 'rota', 'caminho'])
+        for i, (oy, ox) in enumerate(entradas):
+            for j, (dy, dx) in enumerate(saidas):
+                escritor.writerow(
+                    [ox, oy, dx, dy, int(distancias[i, j]), '', ''])
+        for (o, d), caminhos in (rotas or {}).items():
+            for ordem, (dist, caminho) in enumerate(caminhos):
+                escritor.writerow([
+                    o[1], o[0], d[1], d[0], dist, ordem,
+                    json.dumps([list(p) for p in caminho],
+                               separators=(',', ':'))])
+
+
+def salva(arquivo, distancias, entradas, saidas, rotas=None,
+          ponderado=False):
+    """Grava em .npz ou CSV conforme a extensão do arquivo
+    """
+    if arquivo.endswith('.npz'):
+        salva_npz(arquivo, distancias, entradas, saidas, rotas, ponderado)
+    else:
+        salva_csv(arquivo, distancias, entradas, saidas, rotas)
@@ -0,0 +1,312 @@
+"""Serviço local que resolve labirintos com cache quente.
+
+    Cada execução de `python3 matriz.py <arquivo>` paga a inicialização
+    do interpretador, a importação do numpy, a leitura da matriz e uma
+    busca a frio. Aqui um processo fica residente, escutando HTTP em
+    localhost(ou em um socket Unix), e mantém em memória as matrizes já
+    lidas(Aplicativo com entradas e saídas identificadas) e os
+    resultados já calculados. A chave do cache inclui o mtime e o
+    tamanho do arquivo, então um arquivo alterado é lido novamente.
+
+    Rotas:
+        POST /resolve   corpo JSON {"arquivo": "<caminho>"}
+        GET  /resolve?arquivo=<caminho>
+        GET  /stats     latência, vazão e uso do cache
+
+    A resposta de /resolve é o mesmo registro do modo em lote do
+    matriz.py, com o campo extra "servico"(cache e latência).
+
+    Uso:
+        python3 servico_matriz.py [--porta 8765] [--unix /tmp/m.sock]
+                                  [--workers 4] [--cache 256]
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import matriz
+
+
+class EntradaCache:
+    """Matriz lida e resultado da solução de um arquivo
+    """
+    __slots__ = ('app', 'registro', 'trava')
+
+    def __init__(self, app):
+        self.app = app
+        self.registro = None
+        # evita que dois pedidos simultâneos resolvam a mesma matriz
+        self.trava = threading.Lock()
+
+
+class CacheLabirintos:
+    """Cache LRU de matrizes lidas, por arquivo
+    """
+
+    def __init__(self, limite=256):
+        self.limite = limite
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+
+    def obtem(self, arquivo):
+        """Retorna a entrada do arquivo, lendo a matriz se preciso
+
+        Args:
+            arquivo (str): arquivo com a matriz
+
+        Returns:
+            tuple: (EntradaCache, bool se já estava no cache)
+        """
+        info = os.stat(arquivo)
+        chave = (os.path.abspath(arquivo), info.st_mtime_ns, info.st_size)
+        with self.trava:
+            entrada = self.entradas.get(chave)
+            if entrada is not None:
+                self.entradas.move_to_end(chave)
+                return entrada, True
+        # leitura fora da trava, outros pedidos seguem em paralelo
+        entrada = EntradaCache(matriz.Aplicativo(arquivo, verboso=False))
+        with self.trava:
+            entrada = self.entradas.setdefault(chave, entrada)
+            while len(self.entradas) > self.limite:
+                self.entradas.popitem(last=False)
+        return entrada, False
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+class Metricas:
+    """Latência e vazão dos pedidos atendidos
+    """
+
+    def __init__(self, janela=10000):
+        self.inicio = time.perf_counter()
+        self.requisicoes = 0
+        self.erros = 0
+        self.acertos_cache = 0
+        # latências dos últimos pedidos, em segundos
+        self.latencias = deque(maxlen=janela)
+        self.trava = threading.Lock()
+
+    def registra(self, latencia, erro=False, cache=False):
+        with self.trava:
+            self.requisicoes += 1
+            self.erros += erro
+            self.acertos_cache += cache
+            self.latencias.append(latencia)
+
+    def resumo(self):
+        """Retorna as estatísticas em formato de dicionário
+        """
+        with self.trava:
+            latencias = sorted(self.latencias)
+            requisicoes = self.requisicoes
+            erros = self.erros
+            acertos = self.acertos_cache
+        ativo = time.perf_counter() - self.inicio
+
+        def percentil(p):
+            if not latencias:
+                return None
+            i = min(len(latencias) - 1, int(p * len(latencias)))
+            return latencias[i] * 1000
+
+        return {
+            'requisicoes': requisicoes,
+            'erros': erros,
+            'acertos_cache': acertos,
+            'tempo_ativo': ativo,
+            'vazao_rps': requisicoes / ativo if ativo else 0,
+            'latencia_media_ms': (
+                sum(latencias) / len(latencias) * 1000
+                if latencias else None),
+            'latencia_p50_ms': percentil(0.50),
+            'latencia_p95_ms': percentil(0.95),
+            'latencia_p99_ms': percentil(0.99),
+        }
+
+
+class Servico:
+    """Resolve os pedidos em um pool de workers usando o cache
+    """
+
+    def __init__(self, workers=4, limite_cache=256):
+        self.cache = CacheLabirintos(limite_cache)
+        self.metricas = Metricas()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _resolve(self, arquivo):
+        entrada, em_cache = self.cache.obtem(arquivo)
+        with entrada.trava:
+            if entrada.registro is None:
+                t1 = time.perf_counter()
+                entrada.app.resolve_labirinto()
+                entrada.registro = entrada.app.registro()
+                entrada.registro['tempos']['total'] = (
+                    time.perf_counter() - t1
+                    + entrada.registro['tempos'].get('carga', 0)
+                    + entrada.registro['tempos'].get('varredura', 0))
+            else:
+                em_cache = True
+        return entrada.registro, em_cache
+
+    def resolve(self, arquivo):
+        """Resolve um arquivo no pool de workers
+
+        Args:
+            arquivo (str): arquivo com a matriz
+
+        Returns:
+            dict: registro com o campo extra "servico"
+        """
+        t1 = time.perf_counter()
+        try:
+            registro, em_cache = self.pool.submit(
+                self._resolve, arquivo).result()
+        except Exception as e:
+            self.metricas.registra(time.perf_counter() - t1, erro=True)
+            return {'arquivo': arquivo, 'erro': repr(e)}
+        latencia = time.perf_counter() - t1
+        self.metricas.registra(latencia, cache=em_cache)
+        resposta = dict(registro)
+        resposta['servico'] = {'cache': em_cache, 'latencia': latencia}
+        return resposta
+
+    def resumo(self):
+        resumo = self.metricas.resumo()
+        resumo['matrizes_em_cache'] = len(self.cache)
+        return resumo
+
+
+class Handler(BaseHTTPRequestHandler):
+    '''
+    Handler HTTP do serviço, o Servico fica em self.server.servico
+
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def responde(self, status, dados):
+        corpo = json.dumps(dados, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            self.responde(200, self.server.servico.resumo())
+        elif url.path == '/resolve':
+            arquivo = parse_qs(url.query).get('arquivo', [None])[0]
+            self.trata_resolve(arquivo)
+        else:
+            self.responde(404, {'erro': 'rota desconhecida'})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/resolve':
+            self.responde(404, {'erro': 'rota desconhecida'})
+            return
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            tamanho = -1
+        if tamanho < 0:
+            # sem o tamanho o corpo não pode ser descartado
+            self.close_connection = True
+            self.responde(400, {'erro': 'Content-Length inválido'})
+            return
+        try:
+            pedido = json.loads(self.rfile.read(tamanho) or b'{}')
+        except ValueError:
+            self.responde(400, {'erro': 'JSON inválido'})
+            return
+        if not isinstance(pedido, dict):
+            self.responde(400, {'erro': 'o corpo deve ser um objeto JSON'})
+            return
+        self.trata_resolve(pedido.get('arquivo'))
+
+    def trata_resolve(self, arquivo):
+        if not arquivo:
+            self.responde(400, {'erro': 'informe o arquivo'})
+            return
+        registro = self.server.servico.resolve(arquivo)
+        self.responde(400 if 'erro' in registro else 200, registro)
+
+    def address_string(self):
+        # socket Unix não tem endereço(host, porta)
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return 'unix'
+
+    def log_message(self, format, *args):
+        # o log por pedido custaria mais que a resposta em cache
+        pass
+
+
+class ServidorHTTPUnix(socketserver.ThreadingMixIn,
+                       socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def cria_servidor(servico, porta=8765, unix=None):
+    """Cria o servidor HTTP em localhost ou no socket Unix
+
+    Args:
+        servico (Servico): quem resolve os pedidos
+        porta (int): porta em localhost
+        unix (str): caminho do socket Unix, tem prioridade sobre a porta
+
+    Raises:
+        FileExistsError: o caminho do socket Unix existe e não é um
+            socket
+
+    Returns:
+        socketserver.BaseServer: servidor pronto para serve_forever()
+    """
+    if unix:
+        if os.path.exists(unix):
+            # só apaga o socket de uma execução anterior
+            if not stat.S_ISSOCK(os.stat(unix).st_mode):
+                raise FileExistsError(
+                    '%s existe e não é um socket Unix' % unix)
+            os.remove(unix)
+        servidor = ServidorHTTPUnix(unix, Handler)
+    else:
+        servidor = ThreadingHTTPServer(('127.0.0.1', porta), Handler)
+    servidor.servico = servico
+    return servidor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Serviço local para resolver labirintos.')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--unix', default=None,
+                        help='escuta em um socket Unix no lugar da porta')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--cache', type=int, default=256,
+                        help='total de matrizes mantidas em memória')
+    args = parser.parse_args()
+    try:
+        servidor = cria_servidor(
+            Servico(args.workers, args.cache), args.porta, args.unix)
+    except FileExistsError as erro:
+        parser.error(str(erro))
+    print('Escutando em', args.unix or '127.0.0.1:%d' % args.porta)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
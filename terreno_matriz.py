@@ -0,0 +1,182 @@
+"""Labirintos com terreno ponderado, resolvidos com a fila de baldes
+de Dial.
+
+    No terreno cada valor da matriz é o custo de entrar no nodo:
+        -1 e 0 custam 1(aberturas e piso)
+         1 é parede, intransponível
+         2 ou mais custam o próprio valor
+    Valores negativos além de -1 também são tratados como parede.
+
+    Com custos inteiros pequenos(até C), as distâncias pendentes ficam
+    sempre dentro de uma janela de C+1 valores. A fila de prioridades
+    vira um vetor circular de C+1 baldes, um por distância, e cada
+    operação custa O(1) no lugar do O(log n) do heap. O total é
+    O(nodos + distância_máxima).
+
+    Os trajetos seguem o formato do encontra_menor_caminho: lista
+    reversa de (x, y), do destino(repetido) até a origem.
+"""
+
+from estatisticas_matriz import cronometro
+
+
+def custo_nodo(valor):
+    """Custo de entrar no nodo, 0 para intransponível
+
+    Args:
+        valor (int): valor da matriz
+
+    Returns:
+        int: custo
+    """
+    if valor == 0 or valor == -1:
+        return 1
+    if valor >= 2:
+        return int(valor)
+    return 0
+
+
+def custos_planos(img):
+    """Lista plana com o custo de cada nodo
+
+    Args:
+        img (list|nparray): matriz com os valores
+
+    Returns:
+        list: custos na ordem linha a linha
+    """
+    return [custo_nodo(v) for linha in img for v in linha]
+
+
+def custo_caminho(img, path):
+    """Custo total de um trajeto: soma dos custos dos nodos em que
+    ele entra(a origem não conta).
+
+    Args:
+        img (list|nparray): matriz com os valores
+        path (list): trajeto reverso de (x, y)
+
+    Returns:
+        int: custo total
+    """
+    # o primeiro ponto é o destino repetido
+    nodos = path[1:] if len(path) > 1 and path[0] == path[1] else path
+    return sum(custo_nodo(img[y][x]) for x, y in nodos[:-1])
+
+
+def busca(custos, colunas, origem, destino=-1, bloqueados=None,
+          arestas=None, estatisticas=None):
+    """Busca de menor custo com a fila de baldes de Dial sobre os
+    custos planos. Sem destino calcula as distâncias para todos os
+    nodos alcançáveis.
+
+    Args:
+        custos (list): custos planos(ver custos_planos)
+        colunas (int): total de colunas da matriz
+        origem (int): índice plano da origem
+        destino (int): índice plano do destino, -1 para nenhum
+        bloqueados (set): índices planos que não podem ser usados
+        arestas (set): arestas (u, v) que não podem ser usadas
+        estatisticas (dict): opcional, recebe 'retiradas' e
+            'relaxamentos'
+
+    Returns:
+        tuple: (dist, parente, nodos expandidos), dist com inf nos
+        nodos não alcançados e parente -1 na origem
+    """
+    total = len(custos)
+    infinito = float('inf')
+    dist = [infinito] * total
+    parente = [-1] * total
+    # um balde por distância dentro da janela de max(custo)+1
+    tamanho = max(custos) + 1
+    baldes = [[] for _ in range(tamanho)]
+
+    dist[origem] = 0
+    baldes[0].append(origem)
+    pendentes = 1
+    atual = 0
+    expandidos = 0
+    retiradas = 0
+    relaxamentos = 0
+    while pendentes:
+        balde = baldes[atual % tamanho]
+        while not balde:
+            atual += 1
+            balde = baldes[atual % tamanho]
+        u = balde.pop()
+        pendentes -= 1
+        retiradas += 1
+        if dist[u] != atual:
+            # entrada antiga, o nodo já foi alcançado com menor custo
+            continue
+        if u == destino:
+            break
+        expandidos += 1
+        coluna = u % colunas
+        for v in (u - colunas, u + colunas,
+                  u - 1 if coluna else -1,
+                  u + 1 if coluna < colunas - 1 else -1):
+            if v < 0 or v >= total:
+                continue
+            custo = custos[v]
+            if not custo:
+                continue
+            if bloqueados and v in bloqueados:
+                continue
+            if arestas and (u, v) in arestas:
+                continue
+            nova = atual + custo
+            if nova < dist[v]:
+                dist[v] = nova
+                parente[v] = u
+                baldes[nova % tamanho].append(v)
+                pendentes += 1
+                relaxamentos += 1
+    if estatisticas is not None:
+        estatisticas['retiradas'] = retiradas
+        estatisticas['relaxamentos'] = relaxamentos
+    return dist, parente, expandidos
+
+
+def encontra_menor_caminho(img, src, dst, shape, estatisticas=None):
+    """Encontra o caminho de menor custo entre a origem e o destino
+    com a fila de baldes de Dial. Mesma assinatura e retorno do
+    encontra_menor_caminho do labirinto_matriz.
+
+    Args:
+        img (list|nparray): matriz com os valores(custos)
+        src (tuple): Origem (y, x)
+        dst (tuple): Destino (y, x)
+        shape (tuple): (linhas, colunas)
+        estatisticas (dict): opcional, recebe 'custo', os contadores
+            e as fases(ver estatisticas_matriz)
+
+    Returns:
+        [list|False]: trajeto reverso de (x, y) ou False
+    """
+    colunas = shape[1]
+    origem = src[0] * colunas + src[1]
+    destino = dst[0] * colunas + dst[1]
+    with cronometro(estatisticas, 'montagem'):
+        custos = custos_planos(img)
+    with cronometro(estatisticas, 'busca'):
+        dist, parente, expandidos = busca(
+            custos, colunas, origem, destino, estatisticas=estatisticas)
+
+    if estatisticas is not None:
+        estatisticas['nodos_expandidos'] = expandidos
+        estatisticas['custo'] = dist[destino]
+    if dist[destino] == float('inf'):
+        return False
+
+    with cronometro(estatisticas, 'reconstrucao'):
+        saida_y, saida_x = divmod(destino, colunas)
+        path = [(saida_x, saida_y)]
+        u = destino
+        while u != origem:
+            y, x = divmod(u, colunas)
+            path.append((x, y))
+            u = parente[u]
+        path.append((src[1], src[0]))
+    return path
@@ -0,0 +1,284 @@
+"""Verificação em lote de trajetos resolvidos.
+
+    Confere muitos trajetos de um labirinto de uma vez, com operações
+    numpy sobre todos os pontos juntos(sem laço em Python por ponto):
+        dentro      todos os pontos dentro da matriz
+        adjacente   pontos consecutivos vizinhos(4-conectados); o
+                    destino repetido no início da lista é aceito
+        paredes     pontos sobre parede(1); no modo estrito o trajeto
+                    não pode ter nenhum
+        extremos    origem e destino em aberturas(-1)
+        distancia   total de pontos, a Distância do matriz.py
+        custo       custo do terreno(ver terreno_matriz.custo_caminho)
+        passos      arestas percorridas, o custo sem terreno
+
+    Os trajetos estão no formato do encontra_menor_caminho(lista
+    reversa de (x, y), destino repetido no início), como
+    CaminhoCompacto ou já planos: todos os pontos em um array (N, 2) e
+    o início de cada trajeto, como as rotas gravadas pelo rotas_matriz
+    (rotas_pontos e rotas_inicio do .npz).
+
+    Uso:
+        python3 verifica_matriz.py registros.jsonl
+        python3 verifica_matriz.py rotas.npz --matriz matriz.txt
+    Os registros JSON são os do matriz.py --formato json.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+
+import numpy as np
+
+import modelo_matriz
+import motores_matriz
+
+# campos bool de verifica_planos que precisam ser verdadeiros
+CONDICOES = ('dentro', 'adjacente', 'extremos')
+
+
+def planifica(caminhos):
+    """Junta os trajetos em um array de pontos
+
+    Args:
+        caminhos (list): trajetos(lista de (x, y) ou CaminhoCompacto),
+            False ou vazios para trajetos não encontrados
+
+    Returns:
+        tuple: (pontos int64 (N, 2) com x, y; inicio int64 com o
+        início de cada trajeto e o total no final)
+    """
+    tamanhos = [len(c) if c else 0 for c in caminhos]
+    inicio = np.zeros(len(caminhos) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=inicio[1:])
+    if all(isinstance(c, list) or not c for c in caminhos):
+        # listas de tuplas: um só fromiter sobre todas as coordenadas
+        valores = itertools.chain.from_iterable(
+            itertools.chain.from_iterable(c for c in caminhos if c))
+        pontos = np.fromiter(valores, dtype=np.int64,
+                             count=2 * int(inicio[-1]))
+        return pontos.reshape(-1, 2), inicio
+    partes = []
+    for caminho in caminhos:
+        if not caminho:
+            continue
+        if hasattr(caminho, 'pontos'):
+            # CaminhoCompacto guarda o destino repetido como um flag
+            pontos = caminho.pontos()
+            if caminho.repete_inicio:
+                pontos = np.concatenate([pontos[:1], pontos])
+            partes.append(pontos)
+        else:
+            partes.append(np.asarray(caminho, dtype=np.int64))
+    if not partes:
+        return np.zeros((0, 2), dtype=np.int64), inicio
+    return np.concatenate(partes).reshape(-1, 2), inicio
+
+
+def verifica_planos(grade, pontos, inicio, estrito=True):
+    """Verifica os trajetos planos
+
+    Args:
+        grade (nparray): matriz (linhas, colunas)
+        pontos (nparray): (N, 2) com x, y de todos os trajetos
+        inicio (nparray): início de cada trajeto em pontos e o total
+            no final
+        estrito (bool): parede no trajeto invalida o trajeto
+
+    Returns:
+        dict: arrays com um valor por trajeto: valido, dentro,
+        adjacente, extremos(bool), paredes, distancia, custo e
+        passos(int)
+    """
+    grade = np.asarray(grade)
+    linhas, colunas = grade.shape
+    inicio = np.asarray(inicio, dtype=np.int64)
+    pontos = np.asarray(pontos, dtype=np.int64).reshape(-1, 2)
+    total = len(inicio) - 1
+    tamanhos = np.diff(inicio)
+    trajeto = np.repeat(np.arange(total), tamanhos)
+
+    def por_trajeto(marcas):
+        # soma das marcas de cada trajeto
+        return np.bincount(trajeto, weights=marcas,
+                           minlength=total).astype(np.int64)
+
+    x, y = pontos[:, 0], pontos[:, 1]
+    dentro = (x >= 0) & (x < colunas) & (y >= 0) & (y < linhas)
+    valores = np.where(
+        dentro, grade[np.clip(y, 0, linhas - 1), np.clip(x, 0, colunas - 1)],
+        1)
+
+    # passos: pares de pontos consecutivos do mesmo trajeto
+    passo = np.abs(np.diff(x)) + np.abs(np.diff(y))
+    mesmo = trajeto[1:] == trajeto[:-1]
+    # o primeiro par pode repetir o ponto(destino repetido)
+    primeiro = np.zeros(len(pontos), dtype=bool)
+    primeiro[inicio[:-1][tamanhos > 0]] = True
+    repetido = mesmo & primeiro[:-1] & (passo == 0)
+    ruins = mesmo & (passo != 1) & ~repetido
+
+    # custo de entrar em cada nodo, sem a origem(último ponto) e sem
+    # a repetição do destino
+    custo = np.where((valores == 0) | (valores == -1), 1,
+                     np.where(valores >= 2, valores, 0))
+    conta = np.ones(len(pontos), dtype=bool)
+    conta[inicio[1:][tamanhos > 0] - 1] = False
+    conta[:-1][repetido] = False
+
+    ocupados = tamanhos > 0
+    extremos = np.zeros(total, dtype=bool)
+    primeiros = inicio[:-1][ocupados]
+    ultimos = inicio[1:][ocupados] - 1
+    extremos[ocupados] = (valores[primeiros] == -1) & (
+        valores[ultimos] == -1)
+
+    resultado = {
+        'dentro': ocupados & (por_trajeto(~dentro) == 0),
+        'adjacente': ocupados & (np.bincount(
+            trajeto[:-1], weights=ruins, minlength=total) == 0),
+        'extremos': extremos,
+        'paredes': por_trajeto(dentro & (valores == 1)),
+        'distancia': tamanhos,
+        'custo': por_trajeto(np.where(conta, custo, 0)),
+        'passos': por_trajeto(conta),
+    }
+    valido = ocupados.copy()
+    for condicao in CONDICOES:
+        valido &= resultado[condicao]
+    if estrito:
+        valido &= resultado['paredes'] == 0
+    resultado['valido'] = valido
+    return resultado
+
+
+def verifica(img, caminhos, estrito=True):
+    """Verifica os trajetos de um labirinto
+
+    Args:
+        img (list|nparray): matriz com os valores(ou Labirinto)
+        caminhos (list): trajetos no formato dos motores
+        estrito (bool): parede no trajeto invalida o trajeto
+
+    Returns:
+        dict: ver verifica_planos
+    """
+    pontos, inicio = planifica(caminhos)
+    return verifica_planos(img, pontos, inicio, estrito)
+
+
+def motivos(resultado, i, estrito=True):
+    """Texto com as falhas do trajeto i
+
+    Returns:
+        str: ex. 'fora da matriz, passo inválido'
+    """
+    falhas = []
+    if not resultado['distancia'][i]:
+        return 'vazio'
+    if not resultado['dentro'][i]:
+        falhas.append('fora da matriz')
+    if not resultado['adjacente'][i]:
+        falhas.append('passo inválido')
+    if not resultado['extremos'][i]:
+        falhas.append('extremo fora de abertura')
+    if estrito and resultado['paredes'][i]:
+        falhas.append('%d paredes' % resultado['paredes'][i])
+    return ', '.join(falhas)
+
+
+def verifica_registros(arquivo, matriz=None, estrito=True):
+    """Verifica os caminhos dos registros JSON do matriz.py, agrupados
+    por labirinto. Também confere a distância e o custo registrados.
+
+    Args:
+        arquivo (str): registros, um JSON por linha
+        matriz (str): labirinto de todos os registros, None para usar o
+            campo arquivo de cada registro
+        estrito (bool): parede no trajeto invalida o trajeto, exceto
+            nos motores que atravessam paredes
+
+    Yields:
+        tuple: (labirinto, registro, motivo da falha ou '')
+    """
+    grupos = {}
+    with open(arquivo) as texto:
+        for linha in texto:
+            if linha.strip():
+                registro = json.loads(linha)
+                if registro.get('caminho'):
+                    grupos.setdefault(
+                        matriz or registro['arquivo'], []).append(registro)
+    for labirinto, registros in grupos.items():
+        grade = modelo_matriz.Labirinto.carrega(labirinto).grade
+        for modo in (True, False):
+            # motores que atravessam paredes ficam fora do modo estrito
+            grupo = [
+                r for r in registros if modo == (estrito and r.get(
+                    'motor') not in motores_matriz.ATRAVESSA_PAREDES)]
+            if not grupo:
+                continue
+            resultado = verifica(
+                grade, [[tuple(p) for p in r['caminho']] for r in grupo],
+                modo)
+            for i, registro in enumerate(grupo):
+                motivo = motivos(resultado, i, modo)
+                if (not motivo and registro.get('distancia') is not None
+                        and registro['distancia']
+                        != resultado['distancia'][i]):
+                    motivo = 'distância registrada %s, trajeto %d' % (
+                        registro['distancia'], resultado['distancia'][i])
+                if (not motivo and registro.get('custo') is not None
+                        and registro['custo'] != resultado['custo'][i]):
+                    motivo = 'custo registrado %s, trajeto %d' % (
+                        registro['custo'], resultado['custo'][i])
+                yield labirinto, registro, motivo
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Verifica trajetos resolvidos em lote.')
+    parser.add_argument('arquivo',
+                        help='registros JSON do matriz.py ou rotas .npz')
+    parser.add_argument('--matriz', default=None,
+                        help='labirinto dos trajetos(obrigatório no .npz)')
+    parser.add_argument('--permite-paredes', action='store_true',
+                        help='não invalida trajetos que passam por '
+                             'paredes')
+    args = parser.parse_args()
+
+    invalidos = total = 0
+    if args.arquivo.endswith('.npz'):
+        if not args.matriz:
+            parser.error('--matriz é obrigatório para rotas .npz')
+        rotas = np.load(args.arquivo)
+        estrito = not args.permite_paredes
+        resultado = verifica_planos(
+            modelo_matriz.Labirinto.carrega(args.matriz).grade,
+            rotas['rotas_pontos'], rotas['rotas_inicio'], estrito)
+        # a regra de custo gravada pelo rotas_matriz; arquivos antigos
+        # sem o campo aceitam as duas
+        gravada = rotas['rotas_distancia']
+        if 'ponderado' not in rotas.files:
+            divergente = ((resultado['custo'] != gravada)
+                          & (resultado['passos'] != gravada))
+        elif rotas['ponderado']:
+            divergente = resultado['custo'] != gravada
+        else:
+            divergente = resultado['passos'] != gravada
+        total = len(divergente)
+        for i in np.flatnonzero(~resultado['valido'] | divergente):
+            invalidos += 1
+            print('rota %d: %s' % (i, motivos(resultado, i, estrito)
+                                   or 'custo divergente'))
+    else:
+        for labirinto, registro, motivo in verifica_registros(
+                args.arquivo, args.matriz, not args.permite_paredes):
+            total += 1
+            if motivo:
+                invalidos += 1
+                print('%s(%s): %s' % (
+                    labirinto, registro.get('motor'), motivo))
+    print('%d trajetos verificados, %d inválidos' % (total, invalidos))
+    sys.exit(1 if invalidos else 0)
@@ -0,0 +1,178 @@
+"""Busca em largura vetorizada com numpy, para um ou vários labirintos.
+
+    Em labirintos pequenos(50x50, como o matriz.txt) o custo do
+    encontra_menor_caminho é quase todo do interpretador: um objeto
+    Vertice por nodo e um heap em Python. Aqui as matrizes de mesmo
+    formato são empilhadas em um array (labirintos, linhas, colunas) e
+    as frentes de onda de todas avançam juntas, um passo por iteração,
+    com operações de array.
+
+    Todas as arestas têm custo 1 e as paredes(1) são intransponíveis,
+    então o resultado é o caminho com o menor número de nodos; valores
+    de terreno(2 ou mais) contam como piso. O 
+    encontra_menor_caminho do labirinto_matriz ainda atravessa paredes
+    com custo 1000 quando não existe outra saída; aqui esse caso
+    retorna False.
+
+    Os trajetos seguem o formato do encontra_menor_caminho: lista
+    reversa de (x, y), do destino(repetido) até a origem.
+"""
+
+import numpy as np
+
+from estatisticas_matriz import cronometro
+from modelo_matriz import menor_tipo
+
+
+def vizinhos(fronteira):
+    """Marca os vizinhos(4-conectados) dos nodos da fronteira
+
+    Args:
+        fronteira (nparray): bool (labirintos, linhas, colunas)
+
+    Returns:
+        nparray: bool com os vizinhos, incluindo a própria fronteira
+        fora das bordas
+    """
+    novo = np.zeros_like(fronteira)
+    novo[:, 1:, :] |= fronteira[:, :-1, :]
+    novo[:, :-1, :] |= fronteira[:, 1:, :]
+    novo[:, :, 1:] |= fronteira[:, :, :-1]
+    novo[:, :, :-1] |= fronteira[:, :, 1:]
+    return novo
+
+
+def reconstroi(dist, fim):
+    """Monta o trajeto seguindo distâncias decrescentes até a origem
+
+    Args:
+        dist (nparray): distâncias de um labirinto, -1 não alcançado
+        fim (tuple): (y, x) do destino
+
+    Returns:
+        list: trajeto reverso de (x, y), destino repetido no início
+    """
+    linhas, colunas = dist.shape
+    y, x = fim
+    d = int(dist[y, x])
+    path = [(x, y), (x, y)]
+    while d > 0:
+        d -= 1
+        for vy, vx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if (0 <= vy < linhas and 0 <= vx < colunas
+                    and dist[vy, vx] == d):
+                y, x = vy, vx
+                break
+        path.append((x, y))
+    return path
+
+
+def busca_lote(grades, origens, alvos):
+    """Busca em largura simultânea em labirintos empilhados.
+    Cada labirinto para quando a frente de onda toca um dos alvos.
+
+    Args:
+        grades (nparray): (labirintos, linhas, colunas)
+        origens (nparray): bool, nodos de partida de cada labirinto
+        alvos (nparray): bool, nodos de destino de cada labirinto
+
+    Returns:
+        tuple: (dist int32 com -1 nos não alcançados,
+                destino (y, x) ou None por labirinto,
+                nodos expandidos por labirinto)
+    """
+    livre = grades != 1
+    dist = np.full(grades.shape, -1, dtype=np.int32)
+    fronteira = origens & livre
+    dist[fronteira] = 0
+    expandidos = fronteira.sum(axis=(1, 2))
+    destinos = [None] * grades.shape[0]
+
+    # labirintos que já encontraram um alvo
+    chegou = (fronteira & alvos).any(axis=(1, 2))
+    fronteira[chegou] = False
+    passo = 0
+    while fronteira.any():
+        passo += 1
+        novo = vizinhos(fronteira)
+        novo &= livre
+        novo &= dist < 0
+        dist[novo] = passo
+        expandidos += novo.sum(axis=(1, 2))
+        fronteira = novo
+        tocou = (novo & alvos).any(axis=(1, 2))
+        if tocou.any():
+            fronteira[tocou] = False
+            chegou |= tocou
+
+    for i in np.flatnonzero(chegou):
+        ys, xs = np.nonzero(alvos[i] & (dist[i] >= 0))
+        menor = np.argmin(dist[i, ys, xs])
+        destinos[i] = (int(ys[menor]), int(xs[menor]))
+    return dist, destinos, expandidos
+
+
+def resolve_lote(grades):
+    """Resolve labirintos de mesmo formato de uma vez.
+    A busca parte de todas as entradas(coluna direita) ao mesmo tempo
+    e para na primeira saída(coluna esquerda) alcançada, então já
+    retorna o menor trajeto entre todos os pares de cada labirinto.
+
+    Args:
+        grades (list|nparray): matrizes de mesmo formato
+
+    Returns:
+        list: trajeto(ou False) por labirinto
+    """
+    # menor tipo que comporta os valores: terrenos acima de 127 não
+    # viram outros valores(um int8 direto faria 257 virar parede)
+    grades = menor_tipo(np.asarray(grades))
+    if grades.ndim == 2:
+        grades = grades[None]
+    aberturas = grades == -1
+    origens = np.zeros_like(aberturas)
+    alvos = np.zeros_like(aberturas)
+    origens[:, :, -1] = aberturas[:, :, -1]
+    alvos[:, :, 0] = aberturas[:, :, 0]
+    dist, destinos, _ = busca_lote(grades, origens, alvos)
+    return [
+        reconstroi(dist[i], fim) if fim is not None else False
+        for i, fim in enumerate(destinos)
+    ]
+
+
+def encontra_menor_caminho(img, src, dst, shape, estatisticas=None):
+    """Encontra o menor caminho entre a origem e o destino com a busca
+    vetorizada. Mesma assinatura e retorno do encontra_menor_caminho
+    do labirinto_matriz.
+
+    Args:
+        img (list|nparray): matriz com os valores
+        src (tuple): Origem (y, x)
+        dst (tuple): Destino (y, x)
+        shape (tuple): (linhas, colunas)
+        estatisticas (dict): opcional, recebe os contadores e as fases
+            (ver estatisticas_matriz)
+
+    Returns:
+        [list|False]: trajeto reverso de (x, y) ou False
+    """
+    with cronometro(estatisticas, 'montagem'):
+        grade = menor_tipo(np.asarray(img)).reshape((1,) + tuple(shape))
+        origens = np.zeros(grade.shape, dtype=bool)
+        alvos = np.zeros(grade.shape, dtype=bool)
+        origens[0, src[0], src[1]] = True
+        alvos[0, dst[0], dst[1]] = True
+    with cronometro(estatisticas, 'busca'):
+        dist, destinos, expandidos = busca_lote(grade, origens, alvos)
+    if estatisticas is not None:
+        # sem fila: cada nodo alcançado sai da fronteira uma vez e foi
+        # alcançado por um único relaxamento(exceto a origem)
+        expandidos = int(expandidos[0])
+        estatisticas['nodos_expandidos'] = expandidos
+        estatisticas['retiradas'] = expandidos
+        estatisticas['relaxamentos'] = max(0, expandidos - 1)
+    if destinos[0] is None:
+        return False
+    with cronometro(estatisticas, 'reconstrucao'):
+        return reconstroi(dist[0], destinos[0])
@@ -0,0 +1,494 @@
+"""Viewport com zoom e pan para labirintos grandes.
+
+    O desenho célula a célula não escala para matrizes com milhões de
+    nodos: o tamanho do nodo cai abaixo de um pixel e ainda assim todos
+    os nodos são pintados. Aqui a matriz é dividida em tiles de
+    TAMANHO_TILE x TAMANHO_TILE pixels, organizados em uma pirâmide de
+    resoluções. No nível n cada pixel do tile representa um bloco de
+    2^n x 2^n nodos, com a cor média do bloco.
+
+    Somente os tiles visíveis são desenhados. Tiles que ainda não estão
+    no cache são montados em segundo plano(QThreadPool) e, enquanto não
+    ficam prontos, o tile de um nível mais grosso é usado no lugar.
+    O cache é um LRU limitado em bytes, então a memória usada pelo
+    desenho não depende do tamanho da matriz.
+
+    Existem duas camadas, como no desenho original: o fundo(paredes e
+    piso), invalidado somente quando a matriz muda, e o caminho,
+    invalidado somente quando o trajeto muda.
+"""
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from PySide6.QtCore import (
+    QEvent, QObject, QPointF, QRectF, QRunnable, QThreadPool, Qt,
+    Signal, Slot
+)
+from PySide6.QtGui import QImage, QPainter
+
+import caminho_matriz
+import imagem_matriz
+
+# lado do tile em pixels(do nível)
+TAMANHO_TILE = 256
+# amostras por eixo usadas para calcular a cor média de um pixel
+# nos níveis mais grossos
+AMOSTRAS = 8
+# limite padrão do cache de tiles
+LIMITE_CACHE = 64 * 1024 * 1024
+# zoom máximo em pixels por nodo
+ESCALA_MAXIMA = 64.0
+
+# cores RGBA, as mesmas da exportação em PNG
+COR_PISO = imagem_matriz.COR_PISO + (255,)
+COR_OUTRO = imagem_matriz.COR_OUTRO + (255,)
+COR_PAREDE = imagem_matriz.COR_PAREDE + (255,)
+COR_PATH = imagem_matriz.COR_PATH + (255,)
+
+
+def categorias(bloco):
+    """Classifica os valores da matriz para o desenho
+
+    Args:
+        bloco (nparray): valores da matriz
+
+    Returns:
+        nparray: 0 piso(e aberturas), 1 parede, 2 outro
+    """
+    cat = np.full(bloco.shape, 2, dtype=np.uint8)
+    cat[(bloco == 0) | (bloco == -1)] = 0
+    cat[bloco == 1] = 1
+    return cat
+
+
+def renderiza_fundo(grade, nivel, tx, ty):
+    """Monta os pixels RGBA de um tile da camada de fundo
+
+    Args:
+        grade (nparray): matriz do labirinto
+        nivel (int): nível da pirâmide, 2^nivel nodos por pixel
+        tx (int): coluna do tile
+        ty (int): linha do tile
+
+    Returns:
+        nparray: array (altura, largura, 4) uint8
+    """
+    f = 1 << nivel
+    linhas, colunas = grade.shape
+    lado = TAMANHO_TILE * f
+    y0, x0 = ty * lado, tx * lado
+    y1, x1 = min(linhas, y0 + lado), min(colunas, x0 + lado)
+    altura = -(-(y1 - y0) // f)
+    largura = -(-(x1 - x0) // f)
+
+    # nos níveis grossos apenas algumas amostras de cada bloco são
+    # lidas, assim o custo do tile não cresce com 4^nivel
+    passo = max(1, f // AMOSTRAS)
+    k = f // passo
+    amostra = categorias(np.asarray(grade[y0:y1:passo, x0:x1:passo]))
+    # 3 marca amostras fora da matriz(tiles da borda)
+    cheio = np.full((altura * k, largura * k), 3, dtype=np.uint8)
+    cheio[:amostra.shape[0], :amostra.shape[1]] = amostra
+    blocos = cheio.reshape(altura, k, largura, k)
+
+    cores = np.array([COR_PISO, COR_PAREDE, COR_OUTRO], dtype=np.float32)
+    soma = np.zeros((altura, largura, 4), dtype=np.float32)
+    for c in range(3):
+        total = (blocos == c).sum(axis=(1, 3), dtype=np.float32)
+        soma += total[..., None] * cores[c]
+    validos = (blocos != 3).sum(axis=(1, 3), dtype=np.float32)
+    return (soma / np.maximum(validos, 1)[..., None]).astype(np.uint8)
+
+
+def renderiza_caminho(caminho, shape, nivel, tx, ty):
+    """Monta os pixels RGBA de um tile da camada do caminho
+
+    Args:
+        caminho (nparray): array (n, 2) com os nodos (x, y)
+        shape (tuple): (linhas, colunas) da matriz
+        nivel (int): nível da pirâmide
+        tx (int): coluna do tile
+        ty (int): linha do tile
+
+    Returns:
+        nparray|None: array (altura, largura, 4) uint8 ou None se o
+        caminho não passa pelo tile
+    """
+    f = 1 << nivel
+    linhas, colunas = shape
+    lado = TAMANHO_TILE * f
+    y0, x0 = ty * lado, tx * lado
+    y1, x1 = min(linhas, y0 + lado), min(colunas, x0 + lado)
+    xs = caminho[:, 0]
+    ys = caminho[:, 1]
+    dentro = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+    if not dentro.any():
+        return None
+    altura = -(-(y1 - y0) // f)
+    largura = -(-(x1 - x0) // f)
+    rgba = np.zeros((altura, largura, 4), dtype=np.uint8)
+    rgba[(ys[dentro] - y0) // f, (xs[dentro] - x0) // f] = COR_PATH
+    return rgba
+
+
+def para_qimage(rgba):
+    """Converte um array RGBA em QImage(com cópia dos dados)
+
+    Args:
+        rgba (nparray): array (altura, largura, 4) uint8
+
+    Returns:
+        QImage: imagem independente do array
+    """
+    rgba = np.ascontiguousarray(rgba)
+    altura, largura = rgba.shape[:2]
+    imagem = QImage(
+        rgba.data, largura, altura, largura * 4,
+        QImage.Format_RGBA8888)
+    return imagem.copy()
+
+
+class CacheTiles:
+    """Cache LRU de tiles limitado pelo total de bytes das imagens
+    """
+
+    def __init__(self, limite_bytes=LIMITE_CACHE):
+        self.limite_bytes = limite_bytes
+        self.bytes = 0
+        self.tiles = OrderedDict()
+
+    def __contains__(self, chave):
+        return chave in self.tiles
+
+    def obtem(self, chave):
+        """Retorna o tile e o marca como usado recentemente
+
+        Returns:
+            QImage|None: None também para tiles vazios
+        """
+        self.tiles.move_to_end(chave)
+        return self.tiles[chave]
+
+    def adiciona(self, chave, imagem):
+        """Adiciona um tile, descartando os menos usados se preciso
+        """
+        if chave in self.tiles:
+            self.remove(chave)
+        self.tiles[chave] = imagem
+        self.bytes += imagem.sizeInBytes() if imagem is not None else 0
+        while self.bytes > self.limite_bytes and len(self.tiles) > 1:
+            self.remove(next(iter(self.tiles)))
+
+    def remove(self, chave):
+        imagem = self.tiles.pop(chave)
+        self.bytes -= imagem.sizeInBytes() if imagem is not None else 0
+
+    def remove_camada(self, camada):
+        """Remove todos os tiles de uma camada
+        """
+        for chave in [c for c in self.tiles if c[0] == camada]:
+            self.remove(chave)
+
+    def limpa(self):
+        self.tiles.clear()
+        self.bytes = 0
+
+
+class TileSignals(QObject):
+    '''
+    Signals utilizados pelo TileWorker
+
+    '''
+    pronto = Signal(object, object)
+
+
+class TileWorker(QRunnable):
+    '''
+    Monta um tile fora do thread da interface.
+
+    :param chave: (camada, geracao, nivel, tx, ty)
+    :param fn: função que retorna o array RGBA do tile ou None
+    '''
+
+    def __init__(self, chave, fn, *args):
+        super(TileWorker, self).__init__()
+        self.chave = chave
+        self.fn = fn
+        self.args = args
+        self.signals = TileSignals()
+
+    @Slot()
+    def run(self):
+        rgba = self.fn(*self.args)
+        imagem = para_qimage(rgba) if rgba is not None else None
+        self.signals.pronto.emit(self.chave, imagem)
+
+
+class Viewport(QObject):
+    """ Estado de zoom/pan e desenho em tiles de uma matriz.
+
+    A posição é dada por escala(pixels por nodo) e pela origem, a
+    posição em pixels do canto do nodo (0, 0) no widget.
+
+    Implementa:
+        QObject : Qt6.
+    """
+
+    def __init__(self, widget, limite_bytes=LIMITE_CACHE) -> None:
+        super().__init__(widget)
+        self.widget = widget
+        # matriz numpy e caminho(array (n, 2) com x, y)
+        self.grade = None
+        self.caminho = None
+        # zoom e pan
+        self.escala = 1.0
+        self.origem_x = 0.0
+        self.origem_y = 0.0
+        # enquanto o usuário não mexer no zoom a matriz acompanha
+        # a largura do widget, como no desenho original
+        self.ajustar = True
+        # ponto inicial do arrasto(pan)
+        self.arrasto = None
+        # geracoes invalidam tiles montados para dados antigos
+        self.geracao_fundo = 0
+        self.geracao_caminho = 0
+        self.cache = CacheTiles(limite_bytes)
+        self.pendentes = set()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+    def define_grade(self, grade):
+        """Troca a matriz desenhada, invalidando as duas camadas
+
+        Args:
+            grade (nparray|None): matriz do labirinto
+        """
+        self.pool.clear()
+        self.grade = grade
+        self.caminho = None
+        self.geracao_fundo += 1
+        self.geracao_caminho += 1
+        self.cache.limpa()
+        self.pendentes.clear()
+        self.ajustar = True
+        self.widget.update()
+
+    def define_caminho(self, caminho):
+        """Troca o caminho desenhado, invalidando somente a sua camada
+
+        Args:
+            caminho (list|CaminhoCompacto|bool): nodos (x, y) ou False
+        """
+        if isinstance(caminho, caminho_matriz.CaminhoCompacto):
+            self.caminho = caminho.pontos()
+        elif caminho:
+            self.caminho = np.asarray(caminho, dtype=np.int64).reshape(-1, 2)
+        else:
+            self.caminho = None
+        self.geracao_caminho += 1
+        self.cache.remove_camada('caminho')
+        self.widget.update()
+
+    def nivel_maximo(self):
+        """Nível em que um único tile cobre toda a matriz
+        """
+        maior = max(self.grade.shape)
+        return max(0, math.ceil(math.log2(max(1, maior / TAMANHO_TILE))))
+
+    def nivel_atual(self):
+        """Nível da pirâmide para a escala atual.
+        Cada pixel do nível ocupa no máximo um pixel da tela.
+        """
+        if self.escala >= 1:
+            return 0
+        nivel = int(math.floor(math.log2(1 / self.escala)))
+        return min(nivel, self.nivel_maximo())
+
+    def ajusta_largura(self):
+        """Ajusta a escala para a matriz ocupar a largura do widget
+        """
+        colunas = self.grade.shape[1]
+        # 20 de margem
+        escala = (self.widget.width() - 20) / colunas
+        if escala >= 1:
+            escala = float(int(escala))
+        self.escala = max(escala, 1e-6)
+        self.origem_x = 0.0
+        self.origem_y = 0.0
+
+    def zoom(self, fator, ponto: QPointF):
+        """Aplica zoom mantendo fixo o nodo sob o ponto
+
+        Args:
+            fator (float): multiplicador da escala
+            ponto (QPointF): posição do cursor no widget
+        """
+        linhas, colunas = self.grade.shape
+        # escala mínima: a matriz inteira em um quarto do widget
+        minima = min(
+            self.widget.width() / colunas,
+            self.widget.height() / linhas) / 4
+        nova = min(ESCALA_MAXIMA, max(minima, self.escala * fator))
+        fator = nova / self.escala
+        self.origem_x = ponto.x() - (ponto.x() - self.origem_x) * fator
+        self.origem_y = ponto.y() - (ponto.y() - self.origem_y) * fator
+        self.escala = nova
+        self.ajustar = False
+        self.widget.update()
+
+    def trata_evento(self, event: QEvent) -> bool:
+        """Trata os eventos de mouse do widget(zoom e pan)
+
+        Args:
+            event (QEvent): Evento emitido
+
+        Returns:
+            bool: True se o evento foi consumido
+        """
+        if self.grade is None:
+            return False
+        tipo = event.type()
+        if tipo == QEvent.Wheel:
+            passos = event.angleDelta().y() / 120
+            self.zoom(1.25 ** passos, event.position())
+            return True
+        if tipo == QEvent.MouseButtonDblClick:
+            # volta a acompanhar a largura do widget
+            self.ajustar = True
+            self.widget.update()
+            return True
+        if tipo == QEvent.MouseButtonPress and (
+                event.button() == Qt.LeftButton):
+            self.arrasto = (
+                event.position(), self.origem_x, self.origem_y)
+            return True
+        if tipo == QEvent.MouseMove and self.arrasto:
+            inicio, x, y = self.arrasto
+            delta = event.position() - inicio
+            self.origem_x = x + delta.x()
+            self.origem_y = y + delta.y()
+            self.ajustar = False
+            self.widget.update()
+            return True
+        if tipo == QEvent.MouseButtonRelease and self.arrasto:
+            self.arrasto = None
+            return True
+        return False
+
+    def retangulo_tile(self, nivel, tx, ty):
+        """Retângulo do tile na tela, em pixels do widget
+        """
+        lado = TAMANHO_TILE * (1 << nivel) * self.escala
+        return QRectF(
+            self.origem_x + tx * lado, self.origem_y + ty * lado,
+            lado, lado)
+
+    def solicita(self, chave):
+        """Agenda a montagem de um tile em segundo plano
+        """
+        if chave in self.pendentes:
+            return
+        camada, _, nivel, tx, ty = chave
+        if camada == 'fundo':
+            worker = TileWorker(
+                chave, renderiza_fundo, self.grade, nivel, tx, ty)
+        else:
+            worker = TileWorker(
+                chave, renderiza_caminho, self.caminho,
+                self.grade.shape, nivel, tx, ty)
+        worker.signals.pronto.connect(self.tile_pronto)
+        self.pendentes.add(chave)
+        self.pool.start(worker)
+
+    @Slot(object, object)
+    def tile_pronto(self, chave, imagem):
+        """Callback do TileWorker, guarda o tile e redesenha
+        """
+        self.pendentes.discard(chave)
+        geracao = (self.geracao_fundo if chave[0] == 'fundo'
+                   else self.geracao_caminho)
+        if chave[1] != geracao:
+            # montado para uma matriz ou caminho antigo
+            return
+        self.cache.adiciona(chave, imagem)
+        self.widget.update(
+            self.retangulo_tile(*chave[2:]).toAlignedRect())
+
+    def desenha_tile(self, painter, camada, nivel, tx, ty):
+        """Desenha um tile, usando um nível mais grosso enquanto o
+        tile não estiver pronto.
+
+        Args:
+            painter (QPainter): painter do widget
+            camada (str): 'fundo' ou 'caminho'
+            nivel (int): nível da pirâmide
+            tx (int): coluna do tile
+            ty (int): linha do tile
+        """
+        geracao = (self.geracao_fundo if camada == 'fundo'
+                   else self.geracao_caminho)
+        chave = (camada, geracao, nivel, tx, ty)
+        if chave not in self.cache:
+            self.solicita(chave)
+            # procura um tile pronto nos níveis mais grossos
+            for k in range(1, self.nivel_maximo() - nivel + 1):
+                pai = (camada, geracao, nivel + k, tx >> k, ty >> k)
+                if pai in self.cache:
+                    painter.save()
+                    painter.setClipRect(self.retangulo_tile(nivel, tx, ty))
+                    self.desenha_imagem(painter, pai)
+                    painter.restore()
+                    break
+            return
+        self.desenha_imagem(painter, chave)
+
+    def desenha_imagem(self, painter, chave):
+        imagem = self.cache.obtem(chave)
+        if imagem is None:
+            return
+        nivel, tx, ty = chave[2:]
+        alvo = self.retangulo_tile(nivel, tx, ty)
+        # tiles da borda são menores que TAMANHO_TILE
+        alvo.setWidth(alvo.width() * imagem.width() / TAMANHO_TILE)
+        alvo.setHeight(alvo.height() * imagem.height() / TAMANHO_TILE)
+        painter.drawImage(alvo, imagem)
+
+    def desenha(self, painter: QPainter, regiao):
+        """Desenha os tiles visíveis dentro da região exposta
+
+        Args:
+            painter (QPainter): painter do widget
+            regiao (QRect): região exposta do widget
+        """
+        if self.grade is None:
+            return
+        if self.ajustar:
+            self.ajusta_largura()
+        linhas, colunas = self.grade.shape
+        nivel = self.nivel_atual()
+        nodos_tile = TAMANHO_TILE * (1 << nivel)
+
+        # nodos visíveis na região exposta
+        c0 = int((regiao.left() - self.origem_x) // self.escala)
+        c1 = int((regiao.right() + 1 - self.origem_x) // self.escala) + 1
+        l0 = int((regiao.top() - self.origem_y) // self.escala)
+        l1 = int((regiao.bottom() + 1 - self.origem_y) // self.escala) + 1
+        c0, c1 = max(0, c0), min(colunas, c1)
+        l0, l1 = max(0, l0), min(linhas, l1)
+        if c0 >= c1 or l0 >= l1:
+            return
+
+        painter.setClipRect(regiao)
+        tiles = [
+            (tx, ty)
+            for ty in range(l0 // nodos_tile, (l1 - 1) // nodos_tile + 1)
+            for tx in range(c0 // nodos_tile, (c1 - 1) // nodos_tile + 1)
+        ]
+        for tx, ty in tiles:
+            self.desenha_tile(painter, 'fundo', nivel, tx, ty)
+        if self.caminho is not None:
+            for tx, ty in tiles:
+                self.desenha_tile(painter, 'caminho', nivel, tx, ty)